@@ -1,49 +1,31 @@
 import pandas as pd
-import plotly.express as px
 import streamlit as st
 
+from analytics import add_error_bars, load_group_intervals
+from charts import create_profit_timeline, create_roi_bar_chart
 from commons import (
     DOUBLE_VERTICAL_SPACE,
-    GREEN_COLOR,
     HORIZONTAL_LINE,
-    RED_COLOR,
+    LEDGER_COLUMN_CONFIG,
     SINGLE_VERTICAL_SPACE,
+    get_data_version,
     load_bets,
     setup,
 )
-from sidebar import render_sidebar
+from compute import calculate_metrics, calculate_roi_by_wager_type, load_or_compute
+from metrics import record_page_render
+from rollups import (
+    GRANULARITIES,
+    calculate_period_totals,
+    format_period_comparison,
+)
+from sidebar import get_filters_key, render_sidebar
+from validation import get_quarantine_report, render_quarantine_report
 
-WIN_SYMBOL = "W"
 PAGE_NAME = "Betting Dashboard"
 ERROR_MESSAGE = "Failed to load data. Please check the data source."
 
 
-def calculate_metrics(data: pd.DataFrame) -> dict:
-    """
-    Calculate metrics such as total bets, winrate, profit, and ROI.
-
-    Args:
-        data (pd.DataFrame): The data frame containing the bets ledger.
-
-    Returns:
-        dict: A dictionary containing calculated metrics.
-    """
-    total_bets = len(data)
-    total_wins = data["Result"].eq(WIN_SYMBOL).sum()
-    total_winrate = (total_wins / total_bets) * 100 if total_bets > 0 else 0
-    total_profit = data["Profit"].sum()
-    total_wager = data["Wager"].sum()
-    total_roi = (total_profit / total_wager) * 100 if total_wager > 0 else 0
-
-    return {
-        "total_bets": total_bets,
-        "total_wager": round(total_wager, 2),
-        "total_winrate": round(total_winrate, 2),
-        "total_profit": round(total_profit, 2),
-        "total_roi": round(total_roi, 2),
-    }
-
-
 def render_metrics(metrics: dict) -> None:
     """
     Display metrics for the total number of bets, winrate, profit, and ROI.
@@ -76,144 +58,74 @@ def render_metrics(metrics: dict) -> None:
     st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
 
 
-def render_profit_timeline(data: pd.DataFrame, timespan: str = "D") -> None:
+def render_timespan_selector() -> str:
     """
-    Display a line chart showing the cumulative profit timeline with adjustable timespan.
+    Display a selector for the granularity of the time-based views.
 
-    Args:
-        data (pd.DataFrame): The data frame containing the bets ledger.
-        timespan (str): The frequency for resampling the data.
-                        Options: 'D' for daily, 'M' for monthly.
+    Returns:
+        str: The selected granularity, one of the keys of `GRANULARITIES`.
     """
-    if timespan not in ["D", "M"]:
-        raise ValueError("Invalid timespan. Choose 'D' for daily or 'M' for monthly.")
+    return st.radio(
+        "**Timespan**",
+        options=list(GRANULARITIES),
+        format_func=GRANULARITIES.get,
+        horizontal=True,
+    )
 
-    chart_name = "### Profit Timeline (Units)"
-    x_axis = "Date"
-    y_axis = "Cumulative Profit"
 
-    # Resample data based on the selected timespan and calculate cumulative profit
-    if timespan == "D":
-        resampled_profit = (
-            data.resample("D", on="Date")["Profit"].sum().cumsum().reset_index()
-        )
-        tick_format = "%Y-%m-%d"
-        max_date = resampled_profit[x_axis].max()
-        x_axis_range = [
-            max_date - pd.DateOffset(days=14),
-            max_date + pd.DateOffset(days=1),
-        ]
-    elif timespan == "M":
-        resampled_profit = (
-            data.resample("M", on="Date")["Profit"].sum().cumsum().reset_index()
-        )
-        tick_format = "%Y-%m"
-        max_date = resampled_profit[x_axis].max()
-        x_axis_range = [
-            max_date - pd.DateOffset(months=12),
-            max_date + pd.DateOffset(months=1),
-        ]
-
-    # Rename the cumulative sum column for clarity
-    resampled_profit.columns = [x_axis, y_axis]
-
-    # Create the Plotly figure
-    fig = px.line(resampled_profit, x=x_axis, y=y_axis, markers=True)
-
-    fig.update_layout(
-        xaxis_title=None,
-        yaxis_title=y_axis,
-        xaxis={
-            "tickformat": tick_format,
-            "range": x_axis_range,
-            "tickmode": "linear",
-        },
-        margin=dict(t=40, b=40),
-        autosize=True,  # Allow plot to resize based on the dimensions of its container
-        width=None,  # Remove the fixed width setting
-    )
+def render_profit_timeline(period_totals: pd.DataFrame, timespan: str = "D") -> None:
+    """
+    Display a line chart showing the cumulative profit timeline with adjustable timespan.
 
-    st.write(chart_name)
+    Args:
+        period_totals (pd.DataFrame): The per-period totals of the bets ledger.
+        timespan (str): The granularity of the periods.
+                        Options: 'D' for daily, 'W' for weekly, 'M' for monthly,
+                        'S' for LoL seasons.
+    """
+    st.write("### Profit Timeline (Units)")
     st.plotly_chart(
-        fig, use_container_width=True
+        create_profit_timeline(period_totals, timespan), use_container_width=True
     )  # Ensure the plot uses the full container width
     st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
 
 
-def render_bet_df(data: pd.DataFrame) -> None:
+def render_period_comparison(period_totals: pd.DataFrame, timespan: str = "D") -> None:
     """
-    Display the bets ledger in a DataFrame.
+    Display the bets count, wager, profit, ROI and winrate of every period.
 
     Args:
-        data (pd.DataFrame): The data frame containing the bets ledger.
+        period_totals (pd.DataFrame): The per-period totals of the bets ledger.
+        timespan (str): The granularity of the periods.
     """
-    st.write("### Bets Ledger")
+    st.write(f"### Results by {GRANULARITIES[timespan]}")
     st.markdown(SINGLE_VERTICAL_SPACE, unsafe_allow_html=True)
 
-    data["Date"] = data["Date"].dt.date
-    data = data.sort_values(by="Date", ascending=False)
-
-    st.dataframe(data, hide_index=True, use_container_width=True)
+    st.dataframe(
+        format_period_comparison(period_totals),
+        hide_index=True,
+        use_container_width=True,
+    )
     st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
 
 
-def calculate_roi_by_wager_type(data: pd.DataFrame) -> pd.DataFrame:
+def render_bet_df(data: pd.DataFrame) -> None:
     """
-    Calculate ROI by wager type and count the number of bets per type.
+    Display the bets ledger in a DataFrame.
 
     Args:
         data (pd.DataFrame): The data frame containing the bets ledger.
-
-    Returns:
-        pd.DataFrame: DataFrame containing ROI and count of bets per wager type.
-    """
-    roi_by_wager = data.groupby("Type").agg(
-        {"Profit": "sum", "Wager": "sum", "Result": "count"}
-    )
-    roi_by_wager["ROI"] = round(
-        (roi_by_wager["Profit"] / roi_by_wager["Wager"]) * 100, 2
-    )
-    return roi_by_wager.reset_index().rename(columns={"Result": "Bets Count"})
-
-
-def create_roi_bar_chart(roi_data: pd.DataFrame):
-    """
-    Create a horizontal bar chart for ROI by wager type.
-
-    Args:
-        roi_data (pd.DataFrame): DataFrame containing ROI and bet count per wager type.
-
-    Returns:
-        plotly.graph_objects.Figure: The bar chart figure.
     """
-    roi_data["color"] = roi_data["ROI"].apply(
-        lambda x: GREEN_COLOR if x > 0 else RED_COLOR
-    )
-
-    fig = px.bar(
-        roi_data,
-        x="ROI",
-        y="Type",
-        orientation="h",
-        labels={"Type": "Wager Type", "ROI": "ROI %"},
-        color="color",
-        color_discrete_map={GREEN_COLOR: GREEN_COLOR, RED_COLOR: RED_COLOR},
-        text="ROI",
-        hover_data={
-            "Type": False,
-            "color": False,
-            "ROI": False,
-            "Bets Count": True,
-        },
-    )
+    st.write("### Bets Ledger")
+    st.markdown(SINGLE_VERTICAL_SPACE, unsafe_allow_html=True)
 
-    fig.update_traces(
-        texttemplate="%{x:.2f}%",
-        textposition="outside",
-        marker={"line": {"width": 1, "color": "DarkSlateGrey"}},
+    st.dataframe(
+        data.sort_values(by="Date", ascending=False),
+        hide_index=True,
+        use_container_width=True,
+        column_config=LEDGER_COLUMN_CONFIG,
     )
-    fig.update_layout(showlegend=False, yaxis=dict(autorange="reversed"))
-    return fig
+    st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
 
 
 def render_roi_by_wager_type(roi_data: pd.DataFrame) -> None:
@@ -236,11 +148,44 @@ if __name__ == "__main__":
     if not data.empty:
         filtered_data = render_sidebar(data)
 
-        render_metrics(calculate_metrics(filtered_data))
-        render_profit_timeline(filtered_data)
+        render_metrics(
+            load_or_compute(data, "overview", calculate_metrics, filtered_data)
+        )
+        timespan = render_timespan_selector()
+        period_totals = load_or_compute(
+            data,
+            f"timeline_{timespan}",
+            calculate_period_totals,
+            data,
+            filtered_data,
+            timespan,
+        )
+        render_profit_timeline(period_totals, timespan)
+        render_period_comparison(period_totals, timespan)
         render_bet_df(filtered_data)
-        render_roi_by_wager_type(calculate_roi_by_wager_type(filtered_data))
+        render_quarantine_report(get_quarantine_report(get_data_version(data)))
+        type_intervals = load_or_compute(
+            data,
+            "type_intervals",
+            load_group_intervals,
+            filtered_data,
+            get_data_version(filtered_data),
+            get_filters_key(),
+            "Type",
+        )
+        render_roi_by_wager_type(
+            add_error_bars(
+                load_or_compute(
+                    data, "type", calculate_roi_by_wager_type, filtered_data
+                ),
+                type_intervals,
+                "Type",
+                "ROI",
+            )
+        )
 
         st.markdown(HORIZONTAL_LINE, unsafe_allow_html=True)
     else:
         st.error(ERROR_MESSAGE)
+
+    record_page_render()
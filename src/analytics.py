@@ -0,0 +1,407 @@
+"""
+Analytics Module
+
+This module computes the risk analytics of the bets ledger: drawdowns, win and loss
+streaks and rolling ROI. Every metric is computed in a single vectorized pass over the
+date-sorted bets, either for the whole ledger or for every group (e.g. League) at once,
+with groups laid out as contiguous segments of the sorted arrays. It also bootstraps
+confidence intervals of the ROI and winrate of every group in batched arrays.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from caches import MB, budgeted_cache
+
+WIN_SYMBOL = "W"
+LOSS_SYMBOLS = ["L", "Loss", "Lose"]
+OVERALL_LABEL = "Overall"
+BOOTSTRAP_SAMPLES = 1_000
+BOOTSTRAP_CHUNK = 1_000_000  # Resampled rows per chunk, across all samples
+BOOTSTRAP_SEED = 42
+CONFIDENCE_LEVEL = 95
+GROUP_INTERVALS_BUDGET = 32 * MB
+
+
+def sort_into_segments(data: pd.DataFrame, group_column: Optional[str] = None) -> tuple:
+    """
+    Order the bets by group and date, so that each group is a contiguous segment.
+
+    Args:
+        data (pd.DataFrame): The processed DataFrame containing the bets ledger.
+        group_column (Optional[str]): The column to segment by, a single segment if None.
+
+    Returns:
+        tuple: The positions of the bets in sorted order, the segment id of each sorted
+               bet and the segment labels.
+    """
+    dates = data["Date"].to_numpy()
+    if group_column is None:
+        order = np.argsort(dates, kind="stable")
+        return order, np.zeros(len(data), dtype=np.int64), np.array([OVERALL_LABEL])
+
+    codes, labels = pd.factorize(data[group_column], sort=True)
+    order = np.lexsort((dates, codes))
+    # Bets without a group value are coded -1 and sorted first, leave them out
+    order = order[codes[order] >= 0]
+    return order, codes[order], np.asarray(labels)
+
+
+def sorted_columns(data: pd.DataFrame, order: np.ndarray) -> tuple:
+    """
+    Extract the profit, wager and outcome arrays of the bets in sorted order.
+
+    Args:
+        data (pd.DataFrame): The processed DataFrame containing the bets ledger.
+        order (np.ndarray): The positions of the bets in sorted order.
+
+    Returns:
+        tuple: The profit, wager and outcome code of each sorted bet.
+    """
+    profit = data["Profit"].to_numpy(dtype=float)[order]
+    wager = data["Wager"].to_numpy(dtype=float)[order]
+    return profit, wager, outcome_codes(data["Result"])[order]
+
+
+def segment_starts(segments: np.ndarray) -> np.ndarray:
+    """
+    Find the position of the first element of every segment.
+
+    Args:
+        segments (np.ndarray): The sorted segment id of each element.
+
+    Returns:
+        np.ndarray: The start position of each element's segment.
+    """
+    is_start = np.ones(len(segments), dtype=bool)
+    is_start[1:] = segments[1:] != segments[:-1]
+    start_positions = np.flatnonzero(is_start)
+    return start_positions[np.cumsum(is_start) - 1]
+
+
+def segment_cumsum(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """
+    Compute the cumulative sum of the values, restarting at every segment.
+
+    Args:
+        values (np.ndarray): The values to accumulate.
+        starts (np.ndarray): The start position of each element's segment.
+
+    Returns:
+        np.ndarray: The cumulative sums within each segment.
+    """
+    totals = np.concatenate(([0.0], np.cumsum(values)))
+    return totals[1:] - totals[starts]
+
+
+def drawdowns(profit: np.ndarray, segments: np.ndarray) -> np.ndarray:
+    """
+    Compute the drawdown after every bet: the distance below the previous profit peak.
+
+    The running peak is taken per segment with a single `maximum.accumulate`: each
+    segment is shifted above all the previous ones, so earlier peaks never leak into it.
+
+    Args:
+        profit (np.ndarray): The profit of each bet, sorted by segment and date.
+        segments (np.ndarray): The sorted segment id of each bet.
+
+    Returns:
+        np.ndarray: The drawdown after each bet, zero or negative, in units.
+    """
+    if not len(profit):
+        return np.zeros(0)
+
+    cumulative = segment_cumsum(profit, segment_starts(segments))
+    span = cumulative.max() - min(cumulative.min(), 0.0) + 1.0
+    offsets = segments * span
+    peaks = np.maximum.accumulate(cumulative + offsets) - offsets
+    return cumulative - np.maximum(peaks, 0.0)
+
+
+def streak_runs(outcomes: np.ndarray, segments: np.ndarray) -> tuple:
+    """
+    Run-length encode the bet outcomes within each segment.
+
+    Args:
+        outcomes (np.ndarray): 1 for a win, -1 for a loss, 0 otherwise, sorted by
+                               segment and date.
+        segments (np.ndarray): The sorted segment id of each bet.
+
+    Returns:
+        tuple: The outcome, the length and the segment of every run.
+    """
+    is_start = np.ones(len(outcomes), dtype=bool)
+    is_start[1:] = (outcomes[1:] != outcomes[:-1]) | (segments[1:] != segments[:-1])
+    run_starts = np.flatnonzero(is_start)
+    run_lengths = np.diff(np.append(run_starts, len(outcomes)))
+    return outcomes[run_starts], run_lengths, segments[run_starts]
+
+
+def rolling_roi(
+    profit: np.ndarray, wager: np.ndarray, segments: np.ndarray, window: int
+) -> np.ndarray:
+    """
+    Compute the ROI over the last `window` bets of the segment, after every bet.
+
+    Args:
+        profit (np.ndarray): The profit of each bet, sorted by segment and date.
+        wager (np.ndarray): The wager of each bet, sorted by segment and date.
+        segments (np.ndarray): The sorted segment id of each bet.
+        window (int): The number of bets in the window.
+
+    Returns:
+        np.ndarray: The rolling ROI in percent, NaN until the segment has `window` bets.
+    """
+    starts = segment_starts(segments)
+    positions = np.arange(len(profit))
+    window_starts = np.maximum(positions + 1 - window, starts)
+
+    profit_totals = np.concatenate(([0.0], np.cumsum(profit)))
+    wager_totals = np.concatenate(([0.0], np.cumsum(wager)))
+    window_profit = profit_totals[positions + 1] - profit_totals[window_starts]
+    window_wager = wager_totals[positions + 1] - wager_totals[window_starts]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = window_profit / window_wager * 100
+    return np.where(positions - starts + 1 >= window, roi, np.nan)
+
+
+def outcome_codes(results: pd.Series) -> np.ndarray:
+    """
+    Encode bet results as 1 for a win, -1 for a loss and 0 otherwise.
+
+    Args:
+        results (pd.Series): The bet results.
+
+    Returns:
+        np.ndarray: The encoded outcomes.
+    """
+    wins = results.eq(WIN_SYMBOL).to_numpy(dtype=np.int8)
+    losses = results.isin(LOSS_SYMBOLS).to_numpy(dtype=np.int8)
+    return wins - losses
+
+
+def calculate_risk_series(data: pd.DataFrame, window: int) -> pd.DataFrame:
+    """
+    Calculate the cumulative profit, drawdown and rolling ROI after every bet.
+
+    Args:
+        data (pd.DataFrame): The processed DataFrame containing the bets ledger.
+        window (int): The number of bets in the rolling ROI window.
+
+    Returns:
+        pd.DataFrame: One row per bet in date order, with Date, Cumulative Profit,
+                      Drawdown and Rolling ROI columns.
+    """
+    order, segments, _ = sort_into_segments(data)
+    profit, wager, _ = sorted_columns(data, order)
+    return pd.DataFrame(
+        {
+            "Date": data["Date"].to_numpy()[order],
+            "Cumulative Profit": np.cumsum(profit),
+            "Drawdown": drawdowns(profit, segments),
+            "Rolling ROI": rolling_roi(profit, wager, segments, window),
+        }
+    )
+
+
+def calculate_risk_metrics(
+    data: pd.DataFrame, window: int, group_column: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Calculate drawdown, streak and rolling ROI metrics for the ledger or each group.
+
+    Args:
+        data (pd.DataFrame): The processed DataFrame containing the bets ledger.
+        window (int): The number of bets in the rolling ROI window.
+        group_column (Optional[str]): The column to group by, the whole ledger if None.
+
+    Returns:
+        pd.DataFrame: One row per group with the bets count, max and current drawdown,
+                      longest win and loss streaks, current streak (positive for wins,
+                      negative for losses) and the latest rolling ROI.
+    """
+    label_column = group_column or "Scope"
+    order, segments, labels = sort_into_segments(data, group_column)
+    n_segments = len(labels)
+    if not len(order):
+        return pd.DataFrame({label_column: []})
+
+    profit, wager, outcomes = sorted_columns(data, order)
+    last_positions = np.append(np.flatnonzero(np.diff(segments)), len(segments) - 1)
+
+    drawdown = drawdowns(profit, segments)
+    max_drawdown = np.zeros(n_segments)
+    np.minimum.at(max_drawdown, segments, drawdown)
+
+    run_outcomes, run_lengths, run_segments = streak_runs(outcomes, segments)
+    longest = {}
+    for outcome in (1, -1):
+        longest[outcome] = np.zeros(n_segments, dtype=np.int64)
+        is_outcome = run_outcomes == outcome
+        np.maximum.at(
+            longest[outcome], run_segments[is_outcome], run_lengths[is_outcome]
+        )
+    last_runs = np.append(np.flatnonzero(np.diff(run_segments)), len(run_segments) - 1)
+
+    return pd.DataFrame(
+        {
+            label_column: labels,
+            "Bets": np.bincount(segments, minlength=n_segments),
+            "Max Drawdown": max_drawdown.round(2),
+            "Current Drawdown": drawdown[last_positions].round(2),
+            "Longest Win Streak": longest[1],
+            "Longest Loss Streak": longest[-1],
+            "Current Streak": run_outcomes[last_runs] * run_lengths[last_runs],
+            "Rolling ROI": rolling_roi(profit, wager, segments, window)[
+                last_positions
+            ].round(2),
+        }
+    )
+
+
+def bootstrap_group_sums(
+    columns: list,
+    codes: np.ndarray,
+    n_samples: int,
+    rng: np.random.Generator,
+) -> list:
+    """
+    Bootstrap-resample every group at once and total the columns of each resample.
+
+    Rows are sorted by group, and each resample draws, for every row, a random row of
+    the same group, so a single (samples x rows) index array resamples all the groups.
+    Samples are drawn in chunks to bound memory.
+
+    Args:
+        columns (list): The columns to total, as 1-D arrays with one value per row.
+        codes (np.ndarray): The group code of each row, from 0 to the number of groups.
+        n_samples (int): The number of bootstrap resamples.
+        rng (np.random.Generator): The random generator to draw with.
+
+    Returns:
+        list: The totals of each column, as (samples x groups) arrays.
+    """
+    order = np.argsort(codes, kind="stable")
+    columns = [column[order] for column in columns]
+    counts = np.bincount(codes)
+    starts = np.cumsum(counts) - counts
+    row_starts = np.repeat(starts, counts)
+    row_counts = np.repeat(counts, counts)
+
+    chunk_samples = max(1, BOOTSTRAP_CHUNK // max(len(codes), 1))
+    sums = [[] for _ in columns]
+    for first in range(0, n_samples, chunk_samples):
+        size = (min(chunk_samples, n_samples - first), len(codes))
+        indices = row_starts + (rng.random(size) * row_counts).astype(np.int64)
+        for column, column_sums in zip(columns, sums):
+            column_sums.append(np.add.reduceat(column[indices], starts, axis=1))
+    return [np.concatenate(column_sums) for column_sums in sums]
+
+
+def calculate_group_intervals(
+    data: pd.DataFrame,
+    group_column: str,
+    n_samples: int = BOOTSTRAP_SAMPLES,
+    confidence: float = CONFIDENCE_LEVEL,
+    seed: Optional[int] = BOOTSTRAP_SEED,
+) -> pd.DataFrame:
+    """
+    Calculate bootstrap confidence intervals of the ROI and winrate of every group.
+
+    Args:
+        data (pd.DataFrame): The processed DataFrame containing the bets ledger.
+        group_column (str): The column to group by.
+        n_samples (int): The number of bootstrap resamples.
+        confidence (float): The confidence level of the intervals, in percent.
+        seed (Optional[int]): The seed of the resampling, random if None.
+
+    Returns:
+        pd.DataFrame: One row per group with the lower and upper bounds of its ROI and
+                      winrate, in percent.
+    """
+    data = data[data[group_column].notna()]
+    if data.empty:
+        return pd.DataFrame(
+            columns=[group_column, "ROI Low", "ROI High", "Winrate Low", "Winrate High"]
+        )
+
+    codes, labels = pd.factorize(data[group_column], sort=True)
+    columns = [
+        data["Profit"].to_numpy(dtype=float),
+        data["Wager"].to_numpy(dtype=float),
+        data["Result"].eq(WIN_SYMBOL).to_numpy(dtype=float),
+    ]
+    profit, wager, wins = bootstrap_group_sums(
+        columns, codes, n_samples, np.random.default_rng(seed)
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = profit / wager * 100
+    winrate = wins / np.bincount(codes) * 100
+    bounds = [(100 - confidence) / 2, (100 + confidence) / 2]
+    roi_low, roi_high = np.nanpercentile(roi, bounds, axis=0)
+    winrate_low, winrate_high = np.percentile(winrate, bounds, axis=0)
+
+    return pd.DataFrame(
+        {
+            group_column: np.asarray(labels),
+            "ROI Low": roi_low,
+            "ROI High": roi_high,
+            "Winrate Low": winrate_low,
+            "Winrate High": winrate_high,
+        }
+    ).round(2)
+
+
+@budgeted_cache("group_intervals", GROUP_INTERVALS_BUDGET)
+def load_group_intervals(
+    _data: pd.DataFrame, data_version: str, filters_key: str, group_column: str
+) -> pd.DataFrame:
+    """
+    Calculate the group confidence intervals once per data version and filter state.
+
+    Args:
+        _data (pd.DataFrame): The filtered bets. Not hashed, the data version and the
+                              filters identify them.
+        data_version (str): The version of the ledger the bets were filtered from.
+        filters_key (str): The key of the sidebar filters applied to the bets.
+        group_column (str): The column to group by.
+
+    Returns:
+        pd.DataFrame: The intervals, as returned by `calculate_group_intervals`.
+    """
+    return calculate_group_intervals(_data, group_column)
+
+
+def add_error_bars(
+    stats: pd.DataFrame, intervals: pd.DataFrame, group_column: str, measure: str
+) -> pd.DataFrame:
+    """
+    Add the error bar lengths of a measure's confidence intervals to group statistics.
+
+    Args:
+        stats (pd.DataFrame): The group statistics, with a column for the measure.
+        intervals (pd.DataFrame): The group confidence intervals.
+        group_column (str): The column the groups are keyed by.
+        measure (str): 'ROI' or 'Winrate'.
+
+    Returns:
+        pd.DataFrame: The statistics with '<measure> Error Plus' and
+                      '<measure> Error Minus' columns.
+    """
+    bounds = stats[[group_column, measure]].merge(
+        intervals, on=group_column, how="left"
+    )
+    return stats.assign(
+        **{
+            f"{measure} Error Plus": (bounds[f"{measure} High"] - bounds[measure])
+            .clip(lower=0)
+            .values,
+            f"{measure} Error Minus": (bounds[measure] - bounds[f"{measure} Low"])
+            .clip(lower=0)
+            .values,
+        }
+    )
@@ -0,0 +1,308 @@
+"""
+API Module
+
+This module serves the default view of the ledger as read-only JSON for bots and
+embeds, alongside the Streamlit app:
+
+    python src/api.py [--ledger <ledger name>] --port 8502
+
+The ledger is loaded through the same cached loaders as the app and refreshed in the
+background. Every response body is serialized once per ledger version, and served with
+an ETag so clients polling unchanged data get a 304 without a body.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+from commons import (
+    LEDGER_SOURCE,
+    LEDGERS,
+    PENDING_TTL,
+    START_DATE,
+    combine_data_versions,
+    get_data_version,
+    load_source,
+    process_bets_data,
+)
+from compute import (
+    aggregate_by,
+    apply_default_filters,
+    calculate_metrics,
+    calculate_roi_by_wager_type,
+)
+
+API_HOST = "127.0.0.1"
+API_PORT = 8502
+REFRESH_INTERVAL = PENDING_TTL  # Seconds between two reloads of the ledger
+CACHE_CONTROL = f"public, max-age={REFRESH_INTERVAL}"
+JSON_CONTENT_TYPE = "application/json"
+
+logger = logging.getLogger(__name__)
+
+
+def frame_records(frame: pd.DataFrame) -> list:
+    """
+    Convert a DataFrame to JSON-serializable records.
+
+    Args:
+        frame (pd.DataFrame): The DataFrame.
+
+    Returns:
+        list: One dict per row, with ISO dates and nulls for missing values.
+    """
+    return json.loads(frame.to_json(orient="records", date_format="iso"))
+
+
+def build_payloads(data: pd.DataFrame, pending: pd.DataFrame) -> dict:
+    """
+    Compute the payload of every endpoint from the raw ledger.
+
+    Args:
+        data (pd.DataFrame): The raw bets ledger.
+        pending (pd.DataFrame): The raw ledger of the pending bets.
+
+    Returns:
+        dict: The payload of each endpoint path.
+    """
+    default_view = apply_default_filters(process_bets_data(data))
+    pending_view = pending
+    if not pending.empty:
+        pending_view = apply_default_filters(process_bets_data(pending, pending=True))
+
+    return {
+        "/api/overview": calculate_metrics(default_view),
+        "/api/leagues": frame_records(
+            aggregate_by(default_view, "League").drop(columns="Win")
+        ),
+        "/api/types": frame_records(calculate_roi_by_wager_type(default_view)),
+        "/api/pending": frame_records(pending_view),
+    }
+
+
+def encode_response(payload, data_version: str, generated_at: str) -> tuple:
+    """
+    Serialize the response of an endpoint.
+
+    Args:
+        payload: The JSON-serializable payload.
+        data_version (str): The version of the ledger the payload was computed from.
+        generated_at (str): When the payload was computed.
+
+    Returns:
+        tuple: The ETag and the body of the response.
+    """
+    body = json.dumps(
+        {"data_version": data_version, "generated_at": generated_at, "data": payload},
+        default=float,
+        separators=(",", ":"),
+    ).encode()
+    return f'"{hashlib.sha256(body).hexdigest()[:16]}"', body
+
+
+class StatsStore:
+    """The serialized responses of the latest ledger version."""
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.data_version = None
+        self.responses = {}
+        self.lock = threading.Lock()
+
+    def refresh(self) -> bool:
+        """
+        Reload the ledger and rebuild the responses if the ledger changed.
+
+        Returns:
+            bool: True if the responses were rebuilt.
+        """
+        with self.lock:
+            data = load_source(self.source, start_date=START_DATE)
+            pending = load_source(self.source, pending=True)
+            if data.empty:
+                return False
+
+            data_version = combine_data_versions(
+                get_data_version(data), get_data_version(pending)
+            )
+            if data_version == self.data_version:
+                return False
+
+            generated_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            # Swapped in a single assignment, so readers never see a partial update
+            self.responses = {
+                path: encode_response(payload, data_version, generated_at)
+                for path, payload in build_payloads(data, pending).items()
+            }
+            self.data_version = data_version
+            return True
+
+    def get(self, path: str) -> Optional[tuple]:
+        """
+        Get the response of an endpoint.
+
+        Args:
+            path (str): The path of the endpoint.
+
+        Returns:
+            Optional[tuple]: The ETag and the body, None for an unknown path.
+        """
+        return self.responses.get(path)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match request header against the ETag of a response.
+
+    Args:
+        if_none_match (Optional[str]): The header, a list of ETags or '*'.
+        etag (str): The ETag of the response.
+
+    Returns:
+        bool: True if the client already has the response.
+    """
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(
+        candidate.removeprefix("W/") == etag for candidate in candidates
+    )
+
+
+class StatsRequestHandler(BaseHTTPRequestHandler):
+    """Serve the responses of a `StatsStore`."""
+
+    protocol_version = "HTTP/1.1"  # Keep connections alive between requests
+    disable_nagle_algorithm = True  # Don't delay the body behind the headers' ACK
+    store: StatsStore = None
+
+    def do_GET(self) -> None:  # noqa: N802
+        """Serve a response, or a 304 if the client has the current one."""
+        response = self.store.get(urlsplit(self.path).path.rstrip("/"))
+        if response is None:
+            self.send_json(HTTPStatus.NOT_FOUND, b'{"error":"Not found"}')
+            return
+
+        etag, body = response
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", CACHE_CONTROL)
+            self.end_headers()
+            return
+
+        self.send_json(HTTPStatus.OK, body, etag)
+
+    def send_json(
+        self, status: HTTPStatus, body: bytes, etag: Optional[str] = None
+    ) -> None:
+        """
+        Send a JSON response.
+
+        Args:
+            status (HTTPStatus): The status of the response.
+            body (bytes): The serialized body.
+            etag (Optional[str]): The ETag of the body, if it is cacheable.
+        """
+        self.send_response(status)
+        self.send_header("Content-Type", JSON_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", CACHE_CONTROL)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        """Skip the per-request access log, which would dominate the serving cost."""
+
+
+def refresh_periodically(
+    store: StatsStore, stop: threading.Event, interval: float = REFRESH_INTERVAL
+) -> None:
+    """
+    Refresh the store every `interval` seconds until stopped.
+
+    A failed refresh is logged and the store keeps serving its current responses
+    until a later refresh succeeds.
+
+    Args:
+        store (StatsStore): The store to refresh.
+        stop (threading.Event): Set to stop refreshing.
+        interval (float): The seconds between two refreshes.
+    """
+    while not stop.wait(interval):
+        try:
+            store.refresh()
+        except Exception:
+            logger.exception(
+                "Failed to refresh the stats of %s, serving version %s",
+                store.source,
+                store.data_version,
+            )
+
+
+def create_server(
+    source: str = LEDGER_SOURCE, host: str = API_HOST, port: int = API_PORT
+) -> ThreadingHTTPServer:
+    """
+    Create an API server with a loaded store.
+
+    Args:
+        source (str): The ledger source.
+        host (str): The interface to listen on.
+        port (int): The port to listen on, 0 for any free port.
+
+    Returns:
+        ThreadingHTTPServer: The server, not yet serving.
+    """
+    store = StatsStore(source)
+    store.refresh()
+    handler = type("Handler", (StatsRequestHandler,), {"store": store})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main() -> None:
+    """Serve the stats API of the configured ledger until interrupted."""
+    parser = argparse.ArgumentParser(description="Serve the ledger stats as JSON.")
+    parser.add_argument("--ledger", choices=list(LEDGERS), default=next(iter(LEDGERS)))
+    parser.add_argument(
+        "--source",
+        help="Serve this Google Sheets URL, file or synthetic source instead",
+    )
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    args = parser.parse_args()
+
+    server = create_server(args.source or LEDGERS[args.ledger], args.host, args.port)
+    stop = threading.Event()
+    threading.Thread(
+        target=refresh_periodically,
+        args=(server.RequestHandlerClass.store, stop),
+        daemon=True,
+    ).start()
+
+    print(f"Serving the stats API on http://{args.host}:{server.server_port}/api/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
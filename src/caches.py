@@ -0,0 +1,327 @@
+"""
+Caches Module
+
+This module keeps the results the pages derive from the ledgers (aggregates, indexes,
+simulations, artifacts) within a fixed memory envelope. Streamlit caches only bound
+their number of entries, so a cache keyed by the sidebar filters grows with every
+filter combination viewers try, by however much each result weighs. Here, each cache
+has a budget in bytes: the size of every result is estimated as it is stored, and the
+least recently used (LRU) or least often used (LFU) entries are evicted until the
+cache fits its budget again.
+
+Budgets can be overridden per cache, in megabytes, e.g.
+
+    CACHE_BUDGETS='{"rollups": 128, "drilldowns": 1024}'
+
+and the occupancy of every cache is reported with the app metrics.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import object_bytes
+from metrics import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES, REGISTRY, Gauge
+
+MB = 2**20
+LRU = "lru"
+LFU = "lfu"
+CACHE_BUDGETS = {
+    name: int(megabytes * MB)
+    for name, megabytes in json.loads(os.environ.get("CACHE_BUDGETS") or "{}").items()
+}
+
+logger = logging.getLogger(__name__)
+caches = {}  # The caches of the process, by name
+caches_lock = threading.Lock()
+
+
+class CacheEntry:
+    """A cached result, with its estimated size and how often it was used."""
+
+    def __init__(self, value, size: int) -> None:
+        self.value = value
+        self.size = size
+        self.hits = 0
+
+
+class BudgetedCache:
+    """A cache of results, evicting entries to stay within a budget in bytes."""
+
+    def __init__(self, name: str, max_bytes: int, policy: str = LRU) -> None:
+        if policy not in (LRU, LFU):
+            raise ValueError(f"Invalid eviction policy. Choose '{LRU}' or '{LFU}'.")
+        self.name = name
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.entries = OrderedDict()  # Least recently used first
+        self.total_bytes = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple) -> tuple:
+        """
+        Look a result up.
+
+        Args:
+            key (tuple): The key of the result.
+
+        Returns:
+            tuple: Whether the result was cached, and the result or None.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False, None
+            entry.hits += 1
+            self.entries.move_to_end(key)
+            return True, entry.value
+
+    def put(self, key: tuple, value) -> None:
+        """
+        Store a result, evicting other entries until the cache fits its budget.
+
+        A result larger than the whole budget is not stored.
+
+        Args:
+            key (tuple): The key of the result.
+            value: The result.
+        """
+        size = object_bytes(value)
+        if size > self.max_bytes:
+            logger.warning(
+                "Not caching a %.1fMB result in the %s cache, over its %.1fMB budget",
+                size / MB,
+                self.name,
+                self.max_bytes / MB,
+            )
+            return
+
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous.size
+            self.entries[key] = CacheEntry(value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                self.evict(key)
+
+    def evict(self, new_key: tuple) -> None:
+        """
+        Evict the least recently or least often used entry. Hold the lock.
+
+        Under LFU, the hits of the entries left are halved on each eviction, so the
+        entries once used often but no longer, e.g. of an old data version, age out.
+
+        Args:
+            new_key (tuple): The key being stored, never evicted for its own sake.
+        """
+        candidates = (key for key in self.entries if key != new_key)
+        if self.policy == LRU:
+            key = next(candidates)
+        else:
+            # The least recently used entry breaks ties, since it comes first
+            key = min(candidates, key=lambda key: self.entries[key].hits)
+        self.total_bytes -= self.entries.pop(key).size
+        self.evictions += 1
+        CACHE_EVICTIONS.inc(cache=self.name)
+        if self.policy == LFU:
+            for entry in self.entries.values():
+                entry.hits //= 2
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def occupancy(self) -> dict:
+        """
+        Report how full the cache is.
+
+        Returns:
+            dict: The number of entries, their estimated size and the budget, in
+                  bytes, and the number of evictions so far.
+        """
+        with self.lock:
+            return {
+                "Cache": self.name,
+                "Policy": self.policy,
+                "Entries": len(self.entries),
+                "Bytes": self.total_bytes,
+                "Budget": self.max_bytes,
+                "Evictions": self.evictions,
+            }
+
+
+def get_cache(name: str, max_bytes: int, policy: str = LRU) -> BudgetedCache:
+    """
+    Get a cache of the process by name, creating it on first use.
+
+    Args:
+        name (str): The name of the cache.
+        max_bytes (int): The budget of the cache, unless `CACHE_BUDGETS` overrides it.
+        policy (str): 'lru' or 'lfu', the entries evicted first.
+
+    Returns:
+        BudgetedCache: The cache.
+    """
+    with caches_lock:
+        if name not in caches:
+            caches[name] = BudgetedCache(
+                name, CACHE_BUDGETS.get(name, max_bytes), policy
+            )
+        return caches[name]
+
+
+def hash_argument(value):
+    """
+    Turn an argument of a cached function into a hashable part of its cache key.
+
+    Args:
+        value: The argument.
+
+    Returns:
+        A hashable value identifying the argument.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        hashes = pd.util.hash_pandas_object(value).to_numpy()
+        return hashlib.sha256(hashes.tobytes()).hexdigest()
+    if isinstance(value, np.ndarray):
+        digest = hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()
+        return value.dtype.str, value.shape, digest
+    if isinstance(value, (list, tuple)):
+        return tuple(hash_argument(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, hash_argument(item)) for key, item in value.items()))
+    return value
+
+
+def share(value):
+    """
+    Hand a cached result out, so the caller cannot modify the cached one.
+
+    With copy-on-write, a shallow copy of a DataFrame shares its buffers until it is
+    written to, and the writes stay in the copy.
+
+    Args:
+        value: The cached result.
+
+    Returns:
+        The result, with its DataFrames and Series shallow copied.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if isinstance(value, dict):
+        return {key: share(item) for key, item in value.items()}
+    return value
+
+
+def budgeted_cache(name: str, max_bytes: int, policy: str = LRU) -> Callable:
+    """
+    Cache the results of a function within a memory budget, shared by every session.
+
+    Like Streamlit's caches, the arguments whose name starts with an underscore are
+    not hashed, so another argument, e.g. the data version, must identify them.
+
+    Args:
+        name (str): The name of the cache, in the metrics and in `CACHE_BUDGETS`.
+        max_bytes (int): The budget of the cache, in bytes.
+        policy (str): 'lru' or 'lfu', the entries evicted first.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def decorator(function: Callable) -> Callable:
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            cache = get_cache(name, max_bytes, policy)
+            arguments = signature.bind(*args, **kwargs)
+            arguments.apply_defaults()
+            key = (function.__qualname__,) + tuple(
+                hash_argument(value)
+                for parameter, value in arguments.arguments.items()
+                if not parameter.startswith("_")
+            )
+
+            found, value = cache.get(key)
+            if found:
+                CACHE_HITS.inc(cache=name)
+                return share(value)
+
+            CACHE_MISSES.inc(cache=name)
+            value = function(*args, **kwargs)
+            cache.put(key, value)
+            return share(value)
+
+        return wrapper
+
+    return decorator
+
+
+def report_occupancy() -> pd.DataFrame:
+    """
+    Report how full every cache of the process is.
+
+    Returns:
+        pd.DataFrame: One row per cache, see `BudgetedCache.occupancy`.
+    """
+    with caches_lock:
+        occupancy = [cache.occupancy() for cache in caches.values()]
+    return pd.DataFrame(
+        occupancy,
+        columns=["Cache", "Policy", "Entries", "Bytes", "Budget", "Evictions"],
+    )
+
+
+def read_occupancy(column: str) -> dict:
+    """
+    Read a column of the occupancy report, for the cache gauges.
+
+    Args:
+        column (str): 'Entries', 'Bytes' or 'Budget'.
+
+    Returns:
+        dict: The value of each cache, keyed by its label values.
+    """
+    with caches_lock:
+        occupancy = [cache.occupancy() for cache in caches.values()]
+    return {(cache["Cache"],): cache[column] for cache in occupancy}
+
+
+CACHE_ENTRIES = REGISTRY.register(
+    Gauge(
+        "cache_entries",
+        "Entries in each budgeted cache.",
+        ("cache",),
+        function=functools.partial(read_occupancy, "Entries"),
+    )
+)
+CACHE_BYTES = REGISTRY.register(
+    Gauge(
+        "cache_memory_bytes",
+        "Estimated memory of the entries of each budgeted cache.",
+        ("cache",),
+        function=functools.partial(read_occupancy, "Bytes"),
+    )
+)
+CACHE_BUDGET_BYTES = REGISTRY.register(
+    Gauge(
+        "cache_budget_bytes",
+        "Memory budget of each budgeted cache.",
+        ("cache",),
+        function=functools.partial(read_occupancy, "Budget"),
+    )
+)
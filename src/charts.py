@@ -0,0 +1,326 @@
+"""
+Charts Module
+
+This module builds the Plotly figures of the pages from precomputed statistics, so the
+same figures can be rendered by Streamlit or exported to static HTML.
+"""
+
+import pandas as pd
+import plotly.express as px
+from plotly.graph_objects import Figure
+
+from commons import BLUE_COLOR, GREEN_COLOR, RED_COLOR
+from rollups import GRANULARITIES
+
+TIMELINE_TICK_FORMATS = {"D": "%Y-%m-%d", "W": "%Y-%m-%d", "M": "%Y-%m", "S": "%Y-%m"}
+TIMELINE_WINDOWS = {
+    "D": pd.DateOffset(days=14),
+    "W": pd.DateOffset(weeks=12),
+    "M": pd.DateOffset(months=12),
+    "S": pd.DateOffset(years=2),
+}
+TIMELINE_PADDINGS = {
+    "D": pd.DateOffset(days=1),
+    "W": pd.DateOffset(weeks=1),
+    "M": pd.DateOffset(months=1),
+    "S": pd.DateOffset(months=4),
+}
+BAR_OUTLINE = {"line": {"width": 1, "color": "DarkSlateGrey"}}
+
+
+def profit_colors(values: pd.Series) -> pd.Series:
+    """
+    Color positive values green and the others red.
+
+    Args:
+        values (pd.Series): The profit or ROI of each bar.
+
+    Returns:
+        pd.Series: The color of each bar.
+    """
+    return values.gt(0).map({True: GREEN_COLOR, False: RED_COLOR})
+
+
+def error_bar_options(stats: pd.DataFrame, measure: str) -> dict:
+    """
+    Get the error bar arguments of a bar chart, if the statistics have error bars.
+
+    Args:
+        stats (pd.DataFrame): The group statistics.
+        measure (str): The measure of the bars.
+
+    Returns:
+        dict: The `error_x` and `error_x_minus` arguments, empty without error bars.
+    """
+    if f"{measure} Error Plus" not in stats:
+        return {}
+    return {
+        "error_x": f"{measure} Error Plus",
+        "error_x_minus": f"{measure} Error Minus",
+    }
+
+
+def create_profit_timeline(period_totals: pd.DataFrame, timespan: str = "D") -> Figure:
+    """
+    Create a line chart of the cumulative profit with adjustable timespan.
+
+    Args:
+        period_totals (pd.DataFrame): The per-period totals of the bets ledger.
+        timespan (str): The granularity of the periods.
+                        Options: 'D' for daily, 'W' for weekly, 'M' for monthly,
+                        'S' for LoL seasons.
+
+    Returns:
+        Figure: The line chart.
+    """
+    if timespan not in GRANULARITIES:
+        raise ValueError(
+            "Invalid timespan. Choose 'D' for daily, 'W' for weekly, 'M' for monthly "
+            "or 'S' for seasons."
+        )
+
+    x_axis = "Date"
+    y_axis = "Cumulative Profit"
+
+    max_date = period_totals[x_axis].max()
+    x_axis_range = [
+        max_date - TIMELINE_WINDOWS[timespan],
+        max_date + TIMELINE_PADDINGS[timespan],
+    ]
+
+    fig = px.line(
+        period_totals,
+        x=x_axis,
+        y=y_axis,
+        markers=True,
+        hover_data={x_axis: False, "Period": True},
+    )
+
+    fig.update_layout(
+        xaxis_title=None,
+        yaxis_title=y_axis,
+        xaxis={
+            "tickformat": TIMELINE_TICK_FORMATS[timespan],
+            "range": x_axis_range,
+            "tickmode": "linear",
+        },
+        margin=dict(t=40, b=40),
+        autosize=True,  # Allow plot to resize based on the dimensions of its container
+        width=None,  # Remove the fixed width setting
+    )
+    return fig
+
+
+def create_roi_bar_chart(roi_data: pd.DataFrame) -> Figure:
+    """
+    Create a horizontal bar chart for ROI by wager type.
+
+    Args:
+        roi_data (pd.DataFrame): DataFrame containing ROI, bet count and ROI confidence
+                                 interval error bars per wager type.
+
+    Returns:
+        Figure: The bar chart.
+    """
+    roi_data = roi_data.assign(color=profit_colors(roi_data["ROI"]))
+
+    fig = px.bar(
+        roi_data,
+        x="ROI",
+        y="Type",
+        orientation="h",
+        labels={"Type": "Wager Type", "ROI": "ROI %"},
+        color="color",
+        color_discrete_map={GREEN_COLOR: GREEN_COLOR, RED_COLOR: RED_COLOR},
+        text="ROI",
+        error_x="ROI Error Plus",
+        error_x_minus="ROI Error Minus",
+        hover_data={
+            "Type": False,
+            "color": False,
+            "ROI": False,
+            "Bets Count": True,
+            "ROI Error Plus": False,
+            "ROI Error Minus": False,
+        },
+    )
+
+    fig.update_traces(
+        texttemplate="%{x:.2f}%", textposition="outside", marker=BAR_OUTLINE
+    )
+    fig.update_layout(showlegend=False, yaxis=dict(autorange="reversed"))
+    return fig
+
+
+def create_share_pie(stats: pd.DataFrame, column: str) -> Figure:
+    """
+    Create a pie chart of the share of bets of each group.
+
+    Args:
+        stats (pd.DataFrame): The group statistics, as returned by `aggregate_by`.
+        column (str): The column the groups are keyed by.
+
+    Returns:
+        Figure: The pie chart.
+    """
+    fig = px.pie(
+        stats.rename(columns={"Bets_Count": "Bets Count"}),
+        values="Bets Count",
+        names=column,
+    )
+    fig.update_layout(
+        yaxis=dict(autorange="reversed"),
+        showlegend=True,
+        autosize=True,
+        legend=dict(orientation="v", x=1.1, y=0.5),
+    )
+    return fig
+
+
+def create_profit_bar(stats: pd.DataFrame, column: str) -> Figure:
+    """
+    Create a horizontal bar chart of the profit of each group.
+
+    Args:
+        stats (pd.DataFrame): The group statistics, as returned by `aggregate_by`.
+        column (str): The column the groups are keyed by.
+
+    Returns:
+        Figure: The bar chart.
+    """
+    stats = stats.assign(Profit=stats["Profit"].round(2))
+
+    fig = px.bar(
+        stats,
+        x="Profit",
+        y=column,
+        orientation="h",
+        labels={column: "", "Profit": "Profit (Units)"},
+        color=profit_colors(stats["Profit"]),
+        color_discrete_map={GREEN_COLOR: GREEN_COLOR, RED_COLOR: RED_COLOR},
+        text="Profit",
+        hover_data={"Profit": False, "Bets_Count": True, column: False},
+    )
+    fig.update_traces(
+        texttemplate="%{text}", textposition="outside", marker=BAR_OUTLINE
+    )
+    fig.update_layout(showlegend=False, yaxis=dict(autorange="reversed"))
+    return fig
+
+
+def create_winrate_bar(stats: pd.DataFrame, column: str) -> Figure:
+    """
+    Create a horizontal bar chart of the winrate of each group.
+
+    Confidence intervals are drawn as error bars when the statistics have them.
+
+    Args:
+        stats (pd.DataFrame): The group statistics, as returned by `aggregate_by`.
+        column (str): The column the groups are keyed by.
+
+    Returns:
+        Figure: The bar chart.
+    """
+    error_bars = error_bar_options(stats, "Winrate")
+
+    fig = px.bar(
+        stats,
+        x="Winrate",
+        y=column,
+        orientation="h",
+        labels={column: "", "Winrate": "Winrate %"},
+        color_discrete_sequence=[BLUE_COLOR],  # Darker blue for winrate
+        text="Winrate",
+        hover_data={
+            "Winrate": False,
+            "Bets_Count": True,
+            column: False,
+            **dict.fromkeys(error_bars.values(), False),
+        },
+        **error_bars,
+    )
+    fig.update_traces(
+        texttemplate="%{text}%", textposition="outside", marker=BAR_OUTLINE
+    )
+    fig.update_layout(showlegend=False, yaxis=dict(autorange="reversed"))
+    return fig
+
+
+def create_roi_bar(stats: pd.DataFrame, column: str) -> Figure:
+    """
+    Create a horizontal bar chart of the ROI of each group.
+
+    Confidence intervals are drawn as error bars when the statistics have them.
+
+    Args:
+        stats (pd.DataFrame): The group statistics, as returned by `aggregate_by`.
+        column (str): The column the groups are keyed by.
+
+    Returns:
+        Figure: The bar chart.
+    """
+    error_bars = error_bar_options(stats, "ROI")
+
+    fig = px.bar(
+        stats,
+        x="ROI",
+        y=column,
+        orientation="h",
+        labels={column: "", "ROI": "ROI %"},
+        color=profit_colors(stats["ROI"]),
+        color_discrete_map={GREEN_COLOR: GREEN_COLOR, RED_COLOR: RED_COLOR},
+        text="ROI",
+        hover_data={
+            "ROI": False,
+            "Bets_Count": True,
+            column: False,
+            **dict.fromkeys(error_bars.values(), False),
+        },
+        **error_bars,
+    )
+    fig.update_traces(
+        texttemplate="%{text}%", textposition="outside", marker=BAR_OUTLINE
+    )
+    fig.update_layout(showlegend=False, yaxis=dict(autorange="reversed"))
+    return fig
+
+
+def create_calibration_chart(calibration: pd.DataFrame, column: str) -> Figure:
+    """
+    Create a scatter chart of the actual against the implied winrate of each group.
+
+    Groups above the diagonal won more often than their odds implied.
+
+    Args:
+        calibration (pd.DataFrame): The calibration of each group, as returned by
+                                    `calculate_calibration`.
+        column (str): The column the groups are keyed by.
+
+    Returns:
+        Figure: The scatter chart, with a marker per group sized by its bets count.
+    """
+    fig = px.scatter(
+        calibration,
+        x="Implied Winrate %",
+        y="Actual Winrate %",
+        size="Bets",
+        text=column,
+        color=profit_colors(calibration["Edge %"]),
+        color_discrete_map={GREEN_COLOR: GREEN_COLOR, RED_COLOR: RED_COLOR},
+        hover_data={"Bets": True, "Edge %": True, "Brier Score": True},
+    )
+    fig.update_traces(textposition="top center", marker=BAR_OUTLINE)
+
+    # The perfectly calibrated diagonal, across the range of both winrates
+    winrates = calibration[["Implied Winrate %", "Actual Winrate %"]]
+    low, high = winrates.min().min(), winrates.max().max()
+    fig.add_shape(
+        type="line",
+        x0=low,
+        y0=low,
+        x1=high,
+        y1=high,
+        line={"dash": "dash", "color": "DarkSlateGrey"},
+    )
+    fig.update_layout(showlegend=False)
+    return fig
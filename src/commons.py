@@ -1,17 +1,70 @@
-from typing import Optional
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
 
 import gspread
+import numpy as np
 import pandas as pd
 import streamlit as st
-from oauth2client.service_account import ServiceAccountCredentials
-
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from history import get_history, is_recorded, record_version
+from instrumentation import MEMORY_ATTR, frame_bytes
+from metrics import (
+    LEDGER_BYTES,
+    LEDGER_ROWS,
+    PROCESS_SECONDS,
+    QUARANTINED_ROWS,
+    record_cache_miss,
+    start_metrics_server,
+    start_page_render,
+    track_cache,
+)
 from paths import RELATIVE_LOGO_PATH as LOGO_PATH
+from quota import CircuitOpenError, QuotaExhaustedError
+from sheets import (
+    HEADER_ROW,
+    fetch_all_rows,
+    fetch_rows_from,
+    list_worksheets,
+    open_worksheet,
+)
+from sources import (
+    FILE_SOURCE,
+    PARTITIONED_SOURCE,
+    SYNTHETIC_SOURCE,
+    make_synthetic_ledger,
+    parse_ledgers,
+    parse_source,
+    read_ledger_file,
+)
+from validation import (
+    get_quarantine_report,
+    store_quarantine_report,
+    validate_ledger,
+)
 
 # Constants
 HORIZONTAL_LINE = "<hr>"
 SINGLE_VERTICAL_SPACE = "<br>"
 DOUBLE_VERTICAL_SPACE = "<br><br>"
 SHEET_URL = "https://docs.google.com/spreadsheets/d/1rrBtklorbir3zrsHkzTAFlmahxu_S9Gnyrg1RQhRtHw/edit?usp=drive_link"
+LEDGER_SOURCE = os.environ.get("LEDGER_SOURCE", SHEET_URL)
+LEDGERS = parse_ledgers(os.environ.get("LEDGERS"), LEDGER_SOURCE)
+LEDGER_ATTR = "ledger"
+LEDGER_STATE_KEY = "selected_ledger"
+AS_OF_STATE_KEY = "as_of_version"
+SECTION_MEMO_KEY = "section_memo"
+REFRESH_WORKERS = 4  # Ledgers fetched at the same time
+PARTITION_WORKERS = 8  # Worksheets of a partitioned ledger fetched at the same time
+PARTITION_INDEX_NAME = "Partition"
+START_DATE = pd.Timestamp("2024-08-01")
+START_DATE_KEY = "start_date"
+END_DATE_KEY = "end_date"
 GREEN_COLOR = "#00CC96"
 RED_COLOR = "#FF6692"
 BLUE_COLOR = "#0057B8"
@@ -22,6 +75,38 @@ REFERRAL_BUTTON = f"📢 **Click here to copy Referral Code:** '_{REFERRAL_CODE}
 REFERRAL_BUTTON_TOOLTIP = "Copied Referral to Clipboard"
 ABOUT_TEXT = "Public ledger of LoL Oracle betting activity.\nTwitter: @Oracle_Betss"
 PREMIUM_STRING = "Premium"
+DATA_VERSION_ATTR = "data_version"
+ODDS_GROUP_STR = "Odds Group"
+IMPLIED_PROBABILITY_STR = "Implied Probability"
+EV_STR = "EV"
+CLOSING_ODDS_STR = "Closing Odds"  # Optional column of the ledger
+# Computed at ingest for the pages, not displayed
+DERIVED_COLUMNS = [ODDS_GROUP_STR, IMPLIED_PROBABILITY_STR, EV_STR]
+ODDS_GROUP_EDGES = [1.5, 2.0, 2.5, 3.0]
+ODDS_GROUP_LABELS = [
+    "1.00 - 1.49",
+    "1.50 - 1.99",
+    "2.00 - 2.49",
+    "2.50 - 2.99",
+    ">= 3.00",
+]
+SETTLED_TTL = 6 * 60 * 60  # Refresh the settled history every 6 hours
+PENDING_TTL = 60  # Poll the open bets every minute
+PARTITIONS_TTL = 60 * 60  # Look for new season worksheets every hour
+LOADER_ENTRIES = 16  # Sheets, worksheets or files each loader keeps per ledger
+# Seconds between two background refreshes of the ledgers not being viewed
+BACKGROUND_REFRESH_INTERVAL = PENDING_TTL
+LEDGER_COLUMN_CONFIG = {
+    "Date": st.column_config.DateColumn(format="YYYY-MM-DD"),
+    **dict.fromkeys(DERIVED_COLUMNS),
+}
+
+# Frames derived from the shared ledgers share its buffers until they are written to,
+# and writes never reach the ledgers
+pd.set_option("mode.copy_on_write", True)
+
+logger = logging.getLogger(__name__)
+refresh_lock = threading.Lock()
 
 
 def render_horizontal_line() -> None:
@@ -60,6 +145,8 @@ def setup(page_title: str, page_icon: Optional[str] = LOGO_PATH) -> None:
             "About": ABOUT_TEXT,
         },
     )
+    start_page_render(page_title)
+    start_metrics_server()
     st.logo(LOGO_PATH, link="https://thunderpick.io?r=ORACLE_BETS")
     increase_logo_size()
     st.title(page_title)
@@ -69,6 +156,63 @@ def setup(page_title: str, page_icon: Optional[str] = LOGO_PATH) -> None:
     st.markdown(SINGLE_VERTICAL_SPACE, unsafe_allow_html=True)
 
 
+def render_section_selector(sections: list, key: str) -> str:
+    """
+    Display the sections of a page as tabs, of which only the selected one is built.
+
+    The body of every Streamlit tab and expander runs on each rerun, so sections are
+    switched with a horizontal radio instead, and the page only computes what it shows.
+
+    Args:
+        sections (list): The names of the sections.
+        key (str): The widget key, so each page keeps its selected section.
+
+    Returns:
+        str: The name of the selected section.
+    """
+    return st.radio(
+        "**Section**",
+        sections,
+        horizontal=True,
+        key=key,
+        label_visibility="collapsed",
+    )
+
+
+def memoize_in_session(name: str, key: tuple, compute: Callable, *args, **kwargs):
+    """
+    Compute a result once per session for a key, e.g. the figure of a page section.
+
+    Only the latest key of each name is kept, so the memo does not grow with every
+    filter combination the session tries.
+
+    Args:
+        name (str): The name of the result, e.g. the page and section.
+        key (tuple): What the result depends on, e.g. the data version and filters.
+        compute (Callable): The function computing the result on a miss.
+        *args: The positional arguments of `compute`.
+        **kwargs: The keyword arguments of `compute`.
+
+    Returns:
+        The memoized or computed result.
+    """
+    memo = st.session_state.setdefault(SECTION_MEMO_KEY, {})
+    if name not in memo or memo[name][0] != key:
+        memo[name] = (key, compute(*args, **kwargs))
+    return memo[name][1]
+
+
+def get_memo_keys() -> tuple:
+    """
+    Get the keys of the results memoized in the session, see `memoize_in_session`.
+
+    Returns:
+        tuple: The name and key of every memoized result.
+    """
+    memo = st.session_state.get(SECTION_MEMO_KEY, {})
+    return tuple((name, key) for name, (key, _) in memo.items())
+
+
 def copy_referral_code() -> None:
     # use javascript to copy the referral code to the clipboard
     pass
@@ -114,57 +258,643 @@ def compute_profit(bets_df: pd.DataFrame) -> pd.Series:
     return profit
 
 
-@st.cache_data(ttl=300)  # Cache the data for 5 minutes
-def load_bets_from_google_sheet(sheet_url: str) -> pd.DataFrame:
+def compute_odds_group(odds: pd.Series) -> pd.Series:
     """
-    Load bets data from Google Sheets.
+    Group odds into the ranges of `ODDS_GROUP_LABELS` using vectorized operations.
 
     Args:
-        sheet_url (str): The URL of the Google Sheets document.
+        odds (pd.Series): The odds of each bet.
 
     Returns:
-        pd.DataFrame: DataFrame containing the bets data.
+        pd.Series: The odds group of each bet.
     """
-    try:
-        scope = [
-            "https://spreadsheets.google.com/feeds",
-            "https://www.googleapis.com/auth/drive",
-        ]
+    codes = np.searchsorted(ODDS_GROUP_EDGES, odds.to_numpy(dtype=float), side="right")
+    return pd.Series(
+        np.asarray(ODDS_GROUP_LABELS)[codes], index=odds.index, name=ODDS_GROUP_STR
+    )
 
-        # Load credentials from Streamlit secrets
-        creds_dict = dict(st.secrets["gspread_credentials"])
 
-        # Fix private key formatting issue
-        if not creds_dict["private_key"].endswith("\n-----END PRIVATE KEY-----\n"):
-            creds_dict["private_key"] += "\n-----END PRIVATE KEY-----\n"
+def compute_expected_value(bets_df: pd.DataFrame) -> pd.Series:
+    """
+    Estimate the expected value of each bet from the closing line.
 
-        # Load credentials directly from the dictionary
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-        client = gspread.authorize(creds)
+    The closing odds are the sharpest estimate of the probability of a bet, so a bet
+    taken at odds above them is expected to win `Odds / Closing Odds - 1` per unit.
 
-        # Open the Google Sheet by URL
-        sheet = client.open_by_url(
-            sheet_url
-        ).sheet1  # Assumes data is in the first sheet
+    Args:
+        bets_df (pd.DataFrame): The DataFrame with numeric Odds and Wager columns.
 
-        # Extract data into a DataFrame
-        bets_data = sheet.get_all_records()
-        return pd.DataFrame(bets_data).replace("", pd.NA)
+    Returns:
+        pd.Series: The expected profit of each bet in units, NaN where the ledger has
+                   no valid closing odds.
+    """
+    if CLOSING_ODDS_STR not in bets_df.columns:
+        return pd.Series(np.nan, index=bets_df.index, name=EV_STR)
+
+    closing_odds = pd.to_numeric(bets_df[CLOSING_ODDS_STR], errors="coerce")
+    closing_odds = closing_odds.where(closing_odds > 1)
+    return (bets_df["Wager"] * (bets_df["Odds"] / closing_odds - 1)).rename(EV_STR)
+
+
+def compute_data_version(bets_df: pd.DataFrame) -> str:
+    """
+    Compute a content hash identifying a version of the bets ledger.
+
+    Args:
+        bets_df (pd.DataFrame): The DataFrame containing the loaded bet data.
+
+    Returns:
+        str: A short hexadecimal digest that changes whenever the ledger changes.
+    """
+    row_hashes = pd.util.hash_pandas_object(bets_df, index=True).values
+    digest = hashlib.sha256(row_hashes.tobytes())
+    digest.update(",".join(map(str, bets_df.columns)).encode())
+    return digest.hexdigest()[:16]
+
+
+def combine_data_versions(*versions: str) -> str:
+    """
+    Combine the data versions of the parts of a ledger into the version of the whole.
+
+    Args:
+        *versions (str): The data versions of the parts, in order.
+
+    Returns:
+        str: The data version of the combined ledger.
+    """
+    return hashlib.sha256(":".join(versions).encode()).hexdigest()[:16]
+
+
+def get_data_version(bets_df: pd.DataFrame) -> str:
+    """
+    Get the data version of a ledger, computing it if the frame does not carry one.
+
+    The version is attached once when the ledger is fetched and follows every frame
+    derived from it, so downstream caches can key on it without re-hashing the data.
+
+    Args:
+        bets_df (pd.DataFrame): The DataFrame containing the bets ledger.
+
+    Returns:
+        str: The data version of the ledger.
+    """
+    if DATA_VERSION_ATTR not in bets_df.attrs:
+        bets_df.attrs[DATA_VERSION_ATTR] = compute_data_version(bets_df)
+    return bets_df.attrs[DATA_VERSION_ATTR]
+
+
+def ledger_cache_entries(per_ledger: int) -> int:
+    """
+    Size a cache of the app, so it can hold the same number of entries per ledger.
+
+    The entries of every ledger share the cache and its least recently used
+    eviction, so a burst of versions of one ledger can still evict the entries of
+    the others.
+
+    Args:
+        per_ledger (int): The number of entries of a single ledger.
 
+    Returns:
+        int: The total number of entries of the cache.
+    """
+    return per_ledger * len(LEDGERS)
+
+
+@st.cache_resource
+def get_last_good_reads() -> dict:
+    """
+    Get the last successful result of every ledger read of the process.
+
+    Returns:
+        dict: The arguments, result and time of the last good read, by loader and
+              source.
+    """
+    return {}
+
+
+def read_with_fallback(load: Callable[..., pd.DataFrame], *args) -> pd.DataFrame:
+    """
+    Run a cached ledger read, serving its last good result if it fails.
+
+    Failed reads raise inside the cached loaders, so failures are never cached: the
+    next run tries again, while the page keeps showing the last good snapshot. Failures
+    are logged, and also shown on the page when the read runs in a session rather than
+    in the refresh pool.
+
+    Args:
+        load (Callable[..., pd.DataFrame]): The cached loader, whose first argument
+                                            is the source read.
+        *args: The arguments of the loader.
+
+    Returns:
+        pd.DataFrame: The rows read, the last good rows read with the same arguments
+                      on failure, or an empty DataFrame without columns.
+    """
+    key = (load.__name__, args[0])
+    last_good = get_last_good_reads()
+    try:
+        with track_cache(load.__name__):
+            rows = load(*args)
     except gspread.exceptions.SpreadsheetNotFound:
-        st.error("The Google Sheet was not found. Please check the URL.")
+        error = "The Google Sheet was not found. Please check the URL."
+    except (CircuitOpenError, QuotaExhaustedError) as e:
+        error = str(e)
     except gspread.exceptions.APIError as e:
-        st.error(f"API Error: {e}")
+        error = f"API Error: {e}"
     except Exception as e:
-        st.error(f"An unexpected error occurred: {e}")
-
+        error = f"An unexpected error occurred: {e}"
+    else:
+        last_good[key] = (args, rows, pd.Timestamp.now(tz="UTC"))
+        return rows
+
+    in_session = get_script_run_ctx() is not None
+    if key in last_good and last_good[key][0] == args:
+        _, rows, read_at = last_good[key]
+        error = f"{error} Showing the ledger as of {read_at:%Y-%m-%d %H:%M} UTC."
+        logger.warning("Failed to read %s: %s", args[0], error)
+        if in_session:
+            st.warning(error)
+        return rows
+
+    logger.error("Failed to read %s: %s", args[0], error)
+    if in_session:
+        st.error(error)
     return pd.DataFrame()
 
 
+@st.cache_data(ttl=SETTLED_TTL, max_entries=ledger_cache_entries(LOADER_ENTRIES))
+def load_bets_from_google_sheet(sheet_url: str) -> pd.DataFrame:
+    """
+    Load bets data from Google Sheets.
+
+    This is the slow refresh tier: the whole sheet is read, but settled history is
+    near-immutable, so the snapshot is kept for hours. Recent rows are refreshed by
+    `load_open_bets_from_google_sheet`.
+
+    Args:
+        sheet_url (str): The URL of the Google Sheets document.
+
+    Returns:
+        pd.DataFrame: DataFrame containing the bets data, indexed by sheet row.
+    """
+    record_cache_miss("load_bets_from_google_sheet", sheet_url, ttl=SETTLED_TTL)
+    bets_df = fetch_all_rows(open_worksheet(sheet_url))
+    bets_df.attrs[DATA_VERSION_ATTR] = compute_data_version(bets_df)
+    return bets_df
+
+
+@st.cache_data(ttl=PENDING_TTL, max_entries=ledger_cache_entries(LOADER_ENTRIES))
+def load_open_bets_from_google_sheet(
+    sheet_url: str, columns: tuple, first_row: int
+) -> pd.DataFrame:
+    """
+    Load the rows of the bets ledger that may still change from Google Sheets.
+
+    This is the fast refresh tier: a single range read from the first open bet to the
+    end of the sheet, which covers open bets, bets settled since then and new bets.
+
+    Args:
+        sheet_url (str): The URL of the Google Sheets document.
+        columns (tuple): The column names of the ledger.
+        first_row (int): The sheet row of the first open bet.
+
+    Returns:
+        pd.DataFrame: DataFrame containing the rows from `first_row` on.
+    """
+    record_cache_miss(
+        "load_open_bets_from_google_sheet", sheet_url, first_row, ttl=PENDING_TTL
+    )
+    open_df = fetch_rows_from(open_worksheet(sheet_url), list(columns), first_row)
+    open_df.attrs[DATA_VERSION_ATTR] = compute_data_version(open_df)
+    return open_df
+
+
+def first_open_row(bets_df: pd.DataFrame) -> int:
+    """
+    Find the sheet row of the first bet that is not settled yet.
+
+    Args:
+        bets_df (pd.DataFrame): The DataFrame containing the loaded bet data.
+
+    Returns:
+        int: The row of the first open bet, or the row after the last bet if all
+             bets are settled.
+    """
+    open_rows = bets_df.index[bets_df["Result"].isna()]
+    if len(open_rows):
+        return int(open_rows.min())
+    return int(bets_df.index.max()) + 1 if len(bets_df) else HEADER_ROW + 1
+
+
+def load_ledger(sheet_url: str, pending: bool = False) -> pd.DataFrame:
+    """
+    Load the bets ledger, combining the settled snapshot with the fresh open rows.
+
+    Args:
+        sheet_url (str): The URL of the Google Sheets document.
+        pending (bool): If True, only the fresh open rows are returned.
+
+    Returns:
+        pd.DataFrame: DataFrame containing the bets data, indexed by sheet row.
+    """
+    settled_df = read_with_fallback(load_bets_from_google_sheet, sheet_url)
+    if settled_df.empty:
+        return settled_df
+
+    first_row = first_open_row(settled_df)
+    open_df = read_with_fallback(
+        load_open_bets_from_google_sheet,
+        sheet_url,
+        tuple(settled_df.columns),
+        first_row,
+    )
+
+    # The open rows could not be fetched, serve the snapshot
+    if open_df.columns.empty:
+        return settled_df[settled_df.index >= first_row] if pending else settled_df
+
+    if pending:
+        return open_df
+
+    ledger_df = pd.concat([settled_df[settled_df.index < first_row], open_df])
+    ledger_df.attrs[DATA_VERSION_ATTR] = combine_data_versions(
+        get_data_version(settled_df), get_data_version(open_df)
+    )
+    return ledger_df
+
+
+@st.cache_data(ttl=PENDING_TTL, max_entries=ledger_cache_entries(LOADER_ENTRIES))
+def load_local_ledger(
+    source: str, modified_time: Optional[float] = None
+) -> pd.DataFrame:
+    """
+    Load the bets ledger from a local file or a synthetic generator.
+
+    Args:
+        source (str): The ledger file path or synthetic source.
+        modified_time (Optional[float]): The modification time of the ledger file, so a
+                                         changed file is read again.
+
+    Returns:
+        pd.DataFrame: DataFrame containing the bets data, indexed by sheet row.
+    """
+    record_cache_miss("load_local_ledger", source, modified_time, ttl=PENDING_TTL)
+    kind, target = parse_source(source)
+    if kind == SYNTHETIC_SOURCE:
+        bets_df = make_synthetic_ledger(*target)
+    else:
+        bets_df = read_ledger_file(target)
+    bets_df.attrs[DATA_VERSION_ATTR] = compute_data_version(bets_df)
+    return bets_df
+
+
+@st.cache_data(ttl=PARTITIONS_TTL, max_entries=ledger_cache_entries(LOADER_ENTRIES))
+def load_partitions(sheet_url: str) -> pd.DataFrame:
+    """
+    Load the worksheets of a spreadsheet split into one worksheet per season.
+
+    Args:
+        sheet_url (str): The URL of the Google Sheets document.
+
+    Returns:
+        pd.DataFrame: The title and the URL of each worksheet, in tab order.
+    """
+    record_cache_miss("load_partitions", sheet_url, ttl=PARTITIONS_TTL)
+    return list_worksheets(sheet_url)
+
+
+@st.cache_resource
+def get_partition_pool() -> ThreadPoolExecutor:
+    """
+    Get the thread pool that fetches the worksheets of partitioned ledgers.
+
+    It is separate from the refresh pool, since a partitioned ledger may itself be
+    loaded from the refresh pool and waits for its worksheets.
+
+    Returns:
+        ThreadPoolExecutor: The thread pool.
+    """
+    return ThreadPoolExecutor(
+        max_workers=PARTITION_WORKERS, thread_name_prefix="partition-fetch"
+    )
+
+
+@st.cache_resource
+def get_closed_partitions() -> dict:
+    """
+    Get the closed partitions of every ledger.
+
+    A partition is closed once all of its bets are settled and a later partition
+    exists. Closed partitions are kept for the lifetime of the server and never
+    fetched again.
+
+    Returns:
+        dict: The raw rows, first and last date of each closed partition, by URL.
+    """
+    return {}
+
+
+def get_partition_dates(partition: pd.DataFrame) -> tuple:
+    """
+    Get the date range of the bets of a partition.
+
+    Args:
+        partition (pd.DataFrame): The raw rows of the partition.
+
+    Returns:
+        tuple: The first and the last date of the partition.
+    """
+    dates = pd.to_datetime(partition["Date"], errors="coerce")
+    return dates.min(), dates.max()
+
+
+def load_partitioned_ledger(
+    sheet_url: str,
+    pending: bool = False,
+    start_date: Optional[pd.Timestamp] = None,
+    end_date: Optional[pd.Timestamp] = None,
+) -> pd.DataFrame:
+    """
+    Load a ledger split into one worksheet per season.
+
+    The open worksheets are fetched concurrently, each through the tiered loaders
+    with its own cache entries, and closed worksheets are served from memory. Closed
+    worksheets outside of the date range are pruned, and are skipped for pending bets.
+
+    Args:
+        sheet_url (str): The URL of the Google Sheets document.
+        pending (bool): If True, only the partitions that may have open bets are
+                        returned.
+        start_date (Optional[pd.Timestamp]): The first date of the bets needed.
+        end_date (Optional[pd.Timestamp]): The last date of the bets needed.
+
+    Returns:
+        pd.DataFrame: DataFrame containing the bets data, indexed by worksheet title
+                      and sheet row.
+    """
+    worksheets = read_with_fallback(load_partitions, sheet_url)
+    if worksheets.empty:
+        return worksheets
+
+    urls = dict(zip(worksheets["Title"], worksheets["URL"]))
+    closed = get_closed_partitions()
+    futures = {
+        title: get_partition_pool().submit(load_ledger, url)
+        for title, url in urls.items()
+        if url not in closed
+    }
+
+    partitions = {}
+    for title, url in urls.items():
+        if url in closed:
+            partitions[title] = closed[url]
+        elif not (partition := futures[title].result()).empty:
+            partitions[title] = (partition, *get_partition_dates(partition))
+    if not partitions:
+        return pd.DataFrame()
+
+    last_date = pd.Series([dates[2] for dates in partitions.values()]).max()
+    for title, (partition, _, partition_end) in partitions.items():
+        if partition["Result"].notna().all() and partition_end < last_date:
+            closed.setdefault(urls[title], partitions[title])
+
+    selected = {
+        title: partition
+        for title, (partition, partition_start, partition_end) in partitions.items()
+        if urls[title] not in closed
+        or not (
+            pending
+            or (start_date is not None and partition_end < start_date)
+            or (end_date is not None and partition_start > end_date)
+        )
+    }
+    ledger_df = pd.concat(selected, names=[PARTITION_INDEX_NAME])
+    ledger_df.attrs[DATA_VERSION_ATTR] = combine_data_versions(
+        *selected, *map(get_data_version, selected.values())
+    )
+    return ledger_df
+
+
+def load_source(
+    source: str = LEDGER_SOURCE,
+    pending: bool = False,
+    start_date: Optional[pd.Timestamp] = None,
+    end_date: Optional[pd.Timestamp] = None,
+) -> pd.DataFrame:
+    """
+    Load the raw bets ledger from a configured source.
+
+    Args:
+        source (str): A Google Sheets URL, a partitioned spreadsheet, a ledger file
+                      path or a synthetic source.
+        pending (bool): If True, a Google Sheets source only reads its open rows.
+        start_date (Optional[pd.Timestamp]): The first date of the bets needed, to
+                                             prune the partitions of a spreadsheet.
+        end_date (Optional[pd.Timestamp]): The last date of the bets needed.
+
+    Returns:
+        pd.DataFrame: DataFrame containing the bets data, indexed by sheet row.
+    """
+    kind, target = parse_source(source)
+    if kind == PARTITIONED_SOURCE:
+        return load_partitioned_ledger(target, pending, start_date, end_date)
+    if kind == FILE_SOURCE:
+        modified_time = target.stat().st_mtime if target.exists() else None
+        return read_with_fallback(load_local_ledger, source, modified_time)
+    if kind == SYNTHETIC_SOURCE:
+        return read_with_fallback(load_local_ledger, source)
+    return load_ledger(source, pending)
+
+
+@st.cache_resource
+def get_refresh_pool() -> ThreadPoolExecutor:
+    """
+    Get the thread pool that refreshes the ledgers, shared by every session.
+
+    Returns:
+        ThreadPoolExecutor: The thread pool.
+    """
+    return ThreadPoolExecutor(
+        max_workers=REFRESH_WORKERS, thread_name_prefix="ledger-refresh"
+    )
+
+
+@st.cache_resource
+def get_refreshes() -> dict:
+    """
+    Get the refreshes started by every session.
+
+    Returns:
+        dict: The future and the start time of the latest refresh of each source,
+              pending flag and start date.
+    """
+    return {}
+
+
+def refresh_source(
+    source: str,
+    pending: bool = False,
+    start_date: Optional[pd.Timestamp] = None,
+    min_interval: float = 0,
+) -> Future:
+    """
+    Load a ledger source in the refresh pool, unless it is already being loaded.
+
+    Args:
+        source (str): A Google Sheets URL, a partitioned spreadsheet, a ledger file
+                      path or a synthetic source.
+        pending (bool): If True, a Google Sheets source only reads its open rows.
+        start_date (Optional[pd.Timestamp]): The first date of the bets needed.
+        min_interval (float): The seconds since the start of the latest refresh of
+                              the source before another one is started.
+
+    Returns:
+        Future: The future of the latest refresh, of the raw bets ledger as returned
+                by `load_source`.
+    """
+    refreshes = get_refreshes()
+    key = (source, pending, start_date)
+    with refresh_lock:
+        future, started_at = refreshes.get(key, (None, 0.0))
+        if future is None or (
+            future.done() and time.monotonic() - started_at >= min_interval
+        ):
+            future = get_refresh_pool().submit(load_source, source, pending, start_date)
+            refreshes[key] = (future, time.monotonic())
+    return future
+
+
+def load_ledgers(
+    ledgers: Optional[dict] = None,
+    pending: bool = False,
+    start_date: Optional[pd.Timestamp] = None,
+) -> dict:
+    """
+    Load several ledgers concurrently.
+
+    Args:
+        ledgers (Optional[dict]): The source of each ledger by name, all by default.
+        pending (bool): If True, Google Sheets sources only read their open rows.
+        start_date (Optional[pd.Timestamp]): The first date of the bets needed.
+
+    Returns:
+        dict: The raw bets ledger of each ledger, by name.
+    """
+    ledgers = ledgers or LEDGERS
+    futures = {
+        name: refresh_source(source, pending, start_date)
+        for name, source in ledgers.items()
+    }
+    loaded = {}
+    for name, future in futures.items():
+        loaded[name] = future.result()
+        loaded[name].attrs[LEDGER_ATTR] = name
+    return loaded
+
+
+def render_ledger_selector() -> str:
+    """
+    Display a ledger selector in the sidebar, when the app serves several ledgers.
+
+    Returns:
+        str: The name of the selected ledger.
+    """
+    names = list(LEDGERS)
+    if len(names) == 1:
+        return names[0]
+
+    selected = st.session_state.get(LEDGER_STATE_KEY, names[0])
+    ledger = st.sidebar.selectbox(
+        "**Ledger**", names, index=names.index(selected) if selected in names else 0
+    )
+    st.session_state[LEDGER_STATE_KEY] = ledger
+    return ledger
+
+
+def render_version_selector(ledger: str) -> Optional[int]:
+    """
+    Display a selector of the recorded versions of a ledger in the sidebar.
+
+    Args:
+        ledger (str): The name of the ledger.
+
+    Returns:
+        Optional[int]: The version to render the ledger as of, None for the latest.
+    """
+    versions = get_history(ledger).versions
+    if len(versions) < 2:
+        return None
+
+    entries = {entry["version"]: entry for entry in versions}
+    options = [None] + sorted(entries, reverse=True)
+    selected_ledger, selected = st.session_state.get(AS_OF_STATE_KEY, (ledger, None))
+    if selected_ledger != ledger or selected not in options:
+        selected = None
+
+    def format_version(version: Optional[int]) -> str:
+        if version is None:
+            return "Latest"
+        entry = entries[version]
+        recorded_at = pd.Timestamp(entry["recorded_at"])
+        return (
+            f"v{version} · {recorded_at:%Y-%m-%d %H:%M} UTC · "
+            f"+{entry['insert']} ~{entry['update']} -{entry['delete']}"
+        )
+
+    version = st.sidebar.selectbox(
+        "**As of**",
+        options,
+        index=options.index(selected),
+        format_func=format_version,
+        help="Render the ledger as it was at a past refresh.",
+    )
+    st.session_state[AS_OF_STATE_KEY] = (ledger, version)
+    return version
+
+
+@st.cache_resource(max_entries=ledger_cache_entries(4))
+def load_ledger_version(ledger: str, version: int) -> pd.DataFrame:
+    """
+    Rebuild a recorded version of a ledger, once for every session.
+
+    Args:
+        ledger (str): The name of the ledger.
+        version (int): The number of the version.
+
+    Returns:
+        pd.DataFrame: The raw bets ledger as of the version, shared by every session.
+    """
+    history = get_history(ledger)
+    bets_df = history.as_of(version)
+    bets_df.attrs[DATA_VERSION_ATTR] = history.versions[version - 1]["data_version"]
+    return bets_df
+
+
+def get_date_range() -> tuple:
+    """
+    Get the date range selected in the sidebar, before the sidebar is rendered.
+
+    The date inputs of the sidebar are keyed, so their value is in the session state
+    from the start of the run that follows a change.
+
+    Returns:
+        tuple: The start and end dates, None when not set.
+    """
+    start_date = st.session_state.get(START_DATE_KEY, START_DATE)
+    end_date = st.session_state.get(END_DATE_KEY)
+    return (
+        pd.Timestamp(start_date) if start_date else None,
+        pd.Timestamp(end_date) if end_date else None,
+    )
+
+
 def process_bets_data(bets_df: pd.DataFrame, pending: bool = False) -> pd.DataFrame:
     """
     Process the loaded bets data by computing additional columns.
 
+    Rows failing validation are left out, and kept in the quarantine report of the
+    ledger version, see `validation.get_quarantine_report`.
+
     Args:
         bets_df (pd.DataFrame): The DataFrame containing the loaded bet data.
         pending (bool): If True, filter to only pending bets.
@@ -175,15 +905,20 @@ def process_bets_data(bets_df: pd.DataFrame, pending: bool = False) -> pd.DataFr
     if bets_df.empty:
         return bets_df
 
-    bets_df = (
-        bets_df[bets_df["Result"].isna()].copy() if pending else bets_df.dropna().copy()
-    )
-    bets_df["Date"] = pd.to_datetime(bets_df["Date"], errors="coerce")
+    data_version = get_data_version(bets_df)
+    bets_df, quarantine = validate_ledger(bets_df)
+    store_quarantine_report(data_version, pending, quarantine)
+
+    settled = bets_df["Result"].notna()
+    bets_df = bets_df[~settled if pending else settled].copy()
     bets_df["To_Win"] = bets_df["Wager"] * (bets_df["Odds"] - 1)
     bets_df["Profit"] = compute_profit(bets_df)
     bets_df["ROI"] = ((bets_df["Profit"] / bets_df["Wager"]) * 100).round(2).astype(
         str
     ) + "%"
+    bets_df[ODDS_GROUP_STR] = compute_odds_group(bets_df["Odds"])
+    bets_df[IMPLIED_PROBABILITY_STR] = 1 / bets_df["Odds"]
+    bets_df[EV_STR] = compute_expected_value(bets_df)
 
     # Ensure 'Premium' column is the last column in the DataFrame if it exists
     if PREMIUM_STRING in bets_df.columns:
@@ -194,9 +929,42 @@ def process_bets_data(bets_df: pd.DataFrame, pending: bool = False) -> pd.DataFr
     return bets_df
 
 
+@st.cache_resource(max_entries=ledger_cache_entries(4))
+def get_processed_ledger(
+    _bets_df: pd.DataFrame, ledger: str, data_version: str, pending: bool = False
+) -> pd.DataFrame:
+    """
+    Process a version of a ledger once for every session.
+
+    The processed ledger is shared, so it must never be modified: pages work on
+    views of it, see `load_bets`.
+
+    Args:
+        _bets_df (pd.DataFrame): The raw bets ledger, not hashed.
+        ledger (str): The name of the ledger.
+        data_version (str): The data version of the raw ledger, to key the cache.
+        pending (bool): If True, filter to only pending bets.
+
+    Returns:
+        pd.DataFrame: The processed DataFrame, shared by every session.
+    """
+    record_cache_miss("get_processed_ledger", ledger, data_version, pending)
+    start = time.perf_counter()
+    ledger_df = process_bets_data(_bets_df, pending)
+    PROCESS_SECONDS.observe(time.perf_counter() - start, ledger=ledger, pending=pending)
+
+    ledger_df.attrs[MEMORY_ATTR] = frame_bytes(ledger_df)
+    LEDGER_ROWS.set(len(ledger_df), ledger=ledger, pending=pending)
+    LEDGER_BYTES.set(ledger_df.attrs[MEMORY_ATTR], ledger=ledger, pending=pending)
+    quarantine = get_quarantine_report(data_version, pending)
+    if quarantine is not None:
+        QUARANTINED_ROWS.set(len(quarantine), ledger=ledger, pending=pending)
+    return ledger_df
+
+
 def load_bets(pending: bool = False) -> pd.DataFrame:
     """
-    Load and process the bets ledger data from Google Sheets.
+    Load and process the bets ledger selected in the sidebar.
 
     Args:
         pending (bool): If True, only pending bets will be returned.
@@ -204,8 +972,36 @@ def load_bets(pending: bool = False) -> pd.DataFrame:
     Returns:
         pd.DataFrame: The processed bets ledger DataFrame.
     """
-    bets_df = load_bets_from_google_sheet(SHEET_URL)
-    return process_bets_data(bets_df, pending)
+    ledger = render_ledger_selector()
+
+    # Refresh the other ledgers in the background, so switching to them is instant,
+    # as often as their open rows expire rather than on every run of every session
+    for name, source in LEDGERS.items():
+        if name != ledger:
+            refresh_source(source, pending, min_interval=BACKGROUND_REFRESH_INTERVAL)
+
+    source, date_range = LEDGERS[ledger], get_date_range()
+    bets_df = load_source(source, pending, *date_range)
+
+    # Record complete ledgers only, not partitions pruned to a custom date range, in
+    # the background since the diff takes a while on large ledgers
+    default_range = date_range == (START_DATE, None)
+    pruned = parse_source(source)[0] == PARTITIONED_SOURCE and not default_range
+    data_version = get_data_version(bets_df)
+    if not (pending or pruned or bets_df.empty or is_recorded(ledger, data_version)):
+        get_refresh_pool().submit(record_version, ledger, bets_df, data_version)
+
+    version = render_version_selector(ledger)
+    if version is not None:
+        bets_df = load_ledger_version(ledger, version).copy(deep=False)
+    bets_df.attrs[LEDGER_ATTR] = ledger
+    with track_cache("get_processed_ledger", durations=None):
+        ledger_df = get_processed_ledger(
+            bets_df, ledger, get_data_version(bets_df), pending
+        )
+    # A shallow copy per run: with copy-on-write, it shares the ledger's buffers, and
+    # columns added or overwritten by a page stay in that page's copy
+    return ledger_df.copy(deep=False)
 
 
 def setup_and_load_bets(page_title: str, pending: bool = False) -> pd.DataFrame:
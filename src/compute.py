@@ -0,0 +1,493 @@
+"""
+Compute Module
+
+This module computes the aggregates behind the pages without rendering anything, and
+materializes them for the default filter state to a versioned artifacts directory.
+Run it from the repository root ahead of traffic, e.g. from a scheduled job:
+
+    python src/compute.py [--ledger <ledger name>]
+
+Pages read the artifacts of the ledger version they loaded first, and only compute
+what is missing or what the sidebar filters change.
+"""
+
+import argparse
+import json
+import multiprocessing
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+import pandas as pd
+
+from analytics import calculate_group_intervals
+from caches import LFU, MB, budgeted_cache
+from commons import (
+    EV_STR,
+    IMPLIED_PROBABILITY_STR,
+    LEDGERS,
+    ODDS_GROUP_STR,
+    get_data_version,
+    load_ledgers,
+    process_bets_data,
+)
+from drilldown import build_drilldown_cube, build_drilldown_timeline
+from paths import ARTIFACTS_DIR
+from pivots import build_pivot
+from rollups import (
+    GRANULARITIES,
+    aggregate_rollup,
+    build_daily_rollup,
+    summarize_periods,
+)
+from sidebar import START_DATE, get_default_filters, is_default_view
+from simulation import get_worker_count
+from sources import DEFAULT_LEDGER
+
+WIN_SYMBOL = "W"
+MANIFEST_NAME = "manifest.json"
+LATEST_NAME = "latest.json"
+ARTIFACTS_BUDGET = 128 * MB  # The default view artifacts, read by most runs
+
+worker_ledger = None  # The ledger of a worker process, set by its initializer
+
+
+def calculate_metrics(data: pd.DataFrame) -> dict:
+    """
+    Calculate metrics such as total bets, winrate, profit, and ROI.
+
+    Args:
+        data (pd.DataFrame): The data frame containing the bets ledger.
+
+    Returns:
+        dict: A dictionary containing calculated metrics.
+    """
+    total_bets = len(data)
+    total_wins = data["Result"].eq(WIN_SYMBOL).sum()
+    total_winrate = (total_wins / total_bets) * 100 if total_bets > 0 else 0
+    total_profit = data["Profit"].sum()
+    total_wager = data["Wager"].sum()
+    total_roi = (total_profit / total_wager) * 100 if total_wager > 0 else 0
+
+    return {
+        "total_bets": total_bets,
+        "total_wager": round(total_wager, 2),
+        "total_winrate": round(total_winrate, 2),
+        "total_profit": round(total_profit, 2),
+        "total_roi": round(total_roi, 2),
+    }
+
+
+def calculate_roi_by_wager_type(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calculate ROI by wager type and count the number of bets per type.
+
+    Args:
+        data (pd.DataFrame): The data frame containing the bets ledger.
+
+    Returns:
+        pd.DataFrame: DataFrame containing ROI and count of bets per wager type.
+    """
+    roi_by_wager = data.groupby("Type").agg(
+        {"Profit": "sum", "Wager": "sum", "Result": "count"}
+    )
+    roi_by_wager["ROI"] = round(
+        (roi_by_wager["Profit"] / roi_by_wager["Wager"]) * 100, 2
+    )
+    return roi_by_wager.reset_index().rename(columns={"Result": "Bets Count"})
+
+
+def aggregate_by(data: pd.DataFrame, column: str) -> pd.DataFrame:
+    """
+    Aggregate the bets count, profit, wager, winrate and ROI of each group in one pass.
+
+    Args:
+        data (pd.DataFrame): The data frame containing the bets ledger.
+        column (str): The column to group by.
+
+    Returns:
+        pd.DataFrame: One row per group, sorted by group.
+    """
+    stats = (
+        data.assign(Win=data["Result"].eq(WIN_SYMBOL).astype(int))
+        .groupby(column, observed=True)
+        .agg(
+            Bets_Count=("Profit", "size"),
+            Profit=("Profit", "sum"),
+            Wager=("Wager", "sum"),
+            Win=("Win", "mean"),
+        )
+        .reset_index()
+    )
+    return stats.assign(
+        Winrate=(stats["Win"] * 100).round(2),
+        ROI=(stats["Profit"] / stats["Wager"] * 100).round(2),
+    ).sort_values(column)
+
+
+def aggregate_by_odds_group(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate the bets of each odds group, as returned by `aggregate_by`.
+
+    Args:
+        data (pd.DataFrame): The data frame containing the bets ledger.
+
+    Returns:
+        pd.DataFrame: One row per odds group, sorted by group.
+    """
+    return aggregate_by(data, ODDS_GROUP_STR)
+
+
+def calculate_calibration(data: pd.DataFrame, column: str) -> pd.DataFrame:
+    """
+    Compare the win rate implied by the odds with the actual one, for each group.
+
+    The Brier score is the mean squared difference between the implied probability
+    of each bet and its outcome: the lower, the better the odds predicted the results.
+
+    Args:
+        data (pd.DataFrame): The data frame containing the bets ledger.
+        column (str): The column to group by.
+
+    Returns:
+        pd.DataFrame: One row per group, sorted by group, with the bets count, the
+                      implied and actual winrates, their difference, the Brier score
+                      and the total expected value at the closing line.
+    """
+    win = data["Result"].eq(WIN_SYMBOL).astype(float)
+    stats = (
+        data.assign(Win=win, Error=(data[IMPLIED_PROBABILITY_STR] - win) ** 2)
+        .groupby(column, observed=True)
+        .agg(
+            Bets=("Win", "size"),
+            Implied=(IMPLIED_PROBABILITY_STR, "mean"),
+            Actual=("Win", "mean"),
+            Brier=("Error", "mean"),
+            EV=(EV_STR, "sum"),
+            EV_Bets=(EV_STR, "count"),
+        )
+        .reset_index()
+    )
+    return pd.DataFrame(
+        {
+            column: stats[column],
+            "Bets": stats["Bets"],
+            "Implied Winrate %": (stats["Implied"] * 100).round(2),
+            "Actual Winrate %": (stats["Actual"] * 100).round(2),
+            "Edge %": ((stats["Actual"] - stats["Implied"]) * 100).round(2),
+            "Brier Score": stats["Brier"].round(4),
+            # No expected value without closing odds, rather than 0
+            "EV (Units)": stats["EV"].where(stats["EV_Bets"] > 0).round(2),
+        }
+    ).sort_values(column)
+
+
+def calculate_calibration_totals(data: pd.DataFrame) -> dict:
+    """
+    Compare the win rate implied by the odds with the actual one, over all the bets.
+
+    The totals are computed from the bets themselves rather than from the rounded
+    rates of the groups of `calculate_calibration`.
+
+    Args:
+        data (pd.DataFrame): The data frame containing the bets ledger.
+
+    Returns:
+        dict: The implied and actual winrates, the Brier score and the total expected
+              value at the closing line, None without closing odds.
+    """
+    total_bets = len(data)
+    win = data["Result"].eq(WIN_SYMBOL).astype(float)
+    implied = data[IMPLIED_PROBABILITY_STR]
+    if total_bets > 0:
+        implied_winrate = implied.mean() * 100
+        actual_winrate = win.mean() * 100
+        brier_score = ((implied - win) ** 2).mean()
+    else:
+        implied_winrate = actual_winrate = brier_score = 0
+    expected_value = data[EV_STR]
+
+    return {
+        "implied_winrate": round(implied_winrate, 2),
+        "actual_winrate": round(actual_winrate, 2),
+        "brier_score": round(brier_score, 4),
+        # No expected value without closing odds, rather than 0
+        "expected_value": (
+            round(expected_value.sum(), 2) if expected_value.notna().any() else None
+        ),
+    }
+
+
+def calculate_timeline(data: pd.DataFrame, granularity: str) -> pd.DataFrame:
+    """
+    Calculate the per-period totals of the bets ledger.
+
+    Args:
+        data (pd.DataFrame): The data frame containing the bets ledger.
+        granularity (str): 'D' for day, 'W' for ISO week, 'M' for month, 'S' for season.
+
+    Returns:
+        pd.DataFrame: One row per period, as returned by `summarize_periods`.
+    """
+    rollup = build_daily_rollup(data)
+    if granularity != "D":
+        rollup = aggregate_rollup(rollup, granularity)
+    return summarize_periods(rollup, granularity)
+
+
+def apply_default_filters(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Filter the bets ledger as the sidebar does before any selection.
+
+    Args:
+        data (pd.DataFrame): The processed DataFrame containing the bets ledger.
+
+    Returns:
+        pd.DataFrame: The bets shown in the default view.
+    """
+    return data[data["Date"] >= START_DATE]
+
+
+# Artifact name: function computing it from the default view of the ledger
+ARTIFACT_TASKS = {
+    "overview": calculate_metrics,
+    **{
+        f"timeline_{granularity}": partial(calculate_timeline, granularity=granularity)
+        for granularity in GRANULARITIES
+    },
+    "league": partial(aggregate_by, column="League"),
+    "league_intervals": partial(calculate_group_intervals, group_column="League"),
+    "odds": aggregate_by_odds_group,
+    "type": calculate_roi_by_wager_type,
+    "type_intervals": partial(calculate_group_intervals, group_column="Type"),
+    "pivot": build_pivot,
+    "calibration_odds": partial(calculate_calibration, column=ODDS_GROUP_STR),
+    "calibration_league": partial(calculate_calibration, column="League"),
+    "calibration_type": partial(calculate_calibration, column="Type"),
+    "calibration_totals": calculate_calibration_totals,
+    "drilldown": build_drilldown_cube,
+    "drilldown_timeline": build_drilldown_timeline,
+}
+
+
+def init_worker(data: pd.DataFrame) -> None:
+    """
+    Receive the ledger once per worker process, rather than once per task.
+
+    Args:
+        data (pd.DataFrame): The default view of the bets ledger.
+    """
+    global worker_ledger
+    worker_ledger = data
+
+
+def run_task(name: str) -> tuple:
+    """
+    Compute one artifact from the ledger of the worker process.
+
+    Args:
+        name (str): One of `ARTIFACT_TASKS`.
+
+    Returns:
+        tuple: The name of the artifact and the artifact.
+    """
+    return name, ARTIFACT_TASKS[name](worker_ledger)
+
+
+def compute_artifacts(data: pd.DataFrame, workers: int = 1) -> dict:
+    """
+    Compute every artifact of the default view, spread over a process pool.
+
+    Args:
+        data (pd.DataFrame): The default view of the bets ledger.
+        workers (int): The number of worker processes, 1 to compute in-process.
+
+    Returns:
+        dict: The artifacts by name.
+    """
+    if workers <= 1:
+        return {name: task(data) for name, task in ARTIFACT_TASKS.items()}
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(data,),
+    ) as pool:
+        return dict(pool.map(run_task, ARTIFACT_TASKS))
+
+
+def write_artifacts(
+    artifacts: dict,
+    data_version: str,
+    ledger: str = DEFAULT_LEDGER,
+    artifacts_dir: Path = ARTIFACTS_DIR,
+) -> Path:
+    """
+    Write the artifacts of a ledger version to their own directory.
+
+    DataFrames are written to Parquet and everything else to JSON. The directory is
+    staged and renamed into place, so readers never see a partial version.
+
+    Args:
+        artifacts (dict): The artifacts by name.
+        data_version (str): The version of the ledger the artifacts were computed from.
+        ledger (str): The name of the ledger.
+        artifacts_dir (Path): The root directory of the artifacts.
+
+    Returns:
+        Path: The directory of the version.
+    """
+    version_dir = artifacts_dir / data_version
+    staging_dir = artifacts_dir / f".{data_version}.tmp"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    staging_dir.mkdir(parents=True)
+
+    files = {}
+    for name, artifact in artifacts.items():
+        if isinstance(artifact, pd.DataFrame):
+            files[name] = f"{name}.parquet"
+            artifact.to_parquet(staging_dir / files[name])
+        else:
+            files[name] = f"{name}.json"
+            (staging_dir / files[name]).write_text(json.dumps(artifact, default=float))
+
+    manifest = {
+        "ledger": ledger,
+        "data_version": data_version,
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "filters": get_default_filters(),
+        "artifacts": files,
+    }
+    (staging_dir / MANIFEST_NAME).write_text(
+        json.dumps(manifest, default=str, indent=2)
+    )
+
+    shutil.rmtree(version_dir, ignore_errors=True)
+    staging_dir.rename(version_dir)
+
+    latest_path = artifacts_dir / LATEST_NAME
+    latest = json.loads(latest_path.read_text()) if latest_path.exists() else {}
+    latest[ledger] = data_version
+    latest_path.write_text(json.dumps(latest, indent=2))
+    return version_dir
+
+
+@budgeted_cache("artifacts", ARTIFACTS_BUDGET, policy=LFU)
+def read_artifact(
+    data_version: str, name: str, manifest_mtime: int
+) -> Optional[Union[pd.DataFrame, dict]]:
+    """
+    Read a precomputed artifact of a ledger version, once per write of its manifest.
+
+    Args:
+        data_version (str): The version of the ledger.
+        name (str): One of `ARTIFACT_TASKS`.
+        manifest_mtime (int): The modification time of the manifest of the version,
+                              in nanoseconds, so rewritten artifacts are read again.
+
+    Returns:
+        Optional[Union[pd.DataFrame, dict]]: The artifact, or None if it was not
+                                             precomputed.
+    """
+    version_dir = ARTIFACTS_DIR / data_version
+    manifest = json.loads((version_dir / MANIFEST_NAME).read_text())
+    file_name = manifest["artifacts"].get(name)
+    if file_name is None:
+        return None
+    if file_name.endswith(".parquet"):
+        return pd.read_parquet(version_dir / file_name)
+    return json.loads((version_dir / file_name).read_text())
+
+
+def load_artifact(data_version: str, name: str) -> Optional[Union[pd.DataFrame, dict]]:
+    """
+    Read a precomputed artifact of a ledger version.
+
+    A version is usually loaded before its artifacts are computed, so a missing
+    manifest is not cached: the artifacts are read as soon as they are written.
+
+    Args:
+        data_version (str): The version of the ledger.
+        name (str): One of `ARTIFACT_TASKS`.
+
+    Returns:
+        Optional[Union[pd.DataFrame, dict]]: The artifact, or None if the version or the
+                                             artifact was not precomputed.
+    """
+    try:
+        manifest_mtime = (
+            (ARTIFACTS_DIR / data_version / MANIFEST_NAME).stat().st_mtime_ns
+        )
+    except FileNotFoundError:
+        return None
+    return read_artifact(data_version, name, manifest_mtime)
+
+
+def load_or_compute(
+    data: pd.DataFrame, name: str, compute: Callable, *args, **kwargs
+) -> Union[pd.DataFrame, dict]:
+    """
+    Read an artifact when the sidebar is in its default state, compute it otherwise.
+
+    Must be called after the sidebar was rendered.
+
+    Args:
+        data (pd.DataFrame): The bets ledger the page loaded, before the filters.
+        name (str): One of `ARTIFACT_TASKS`.
+        compute (Callable): The function computing the artifact on a miss.
+        *args: The positional arguments of `compute`.
+        **kwargs: The keyword arguments of `compute`.
+
+    Returns:
+        Union[pd.DataFrame, dict]: The artifact.
+    """
+    if is_default_view():
+        artifact = load_artifact(get_data_version(data), name)
+        if artifact is not None:
+            return artifact
+    return compute(*args, **kwargs)
+
+
+def main() -> None:
+    """Compute the artifacts of the registered ledgers and write them to disk."""
+    parser = argparse.ArgumentParser(
+        description="Precompute the aggregates of the default dashboard view."
+    )
+    parser.add_argument(
+        "--ledger", choices=list(LEDGERS), help="Only precompute this ledger"
+    )
+    parser.add_argument(
+        "--source", help="Precompute this Google Sheets URL, file or synthetic source"
+    )
+    parser.add_argument("--out", default=str(ARTIFACTS_DIR), help="Artifacts root")
+    parser.add_argument("--workers", type=int, default=get_worker_count())
+    args = parser.parse_args()
+
+    if args.source:
+        ledgers = {args.ledger or DEFAULT_LEDGER: args.source}
+    elif args.ledger:
+        ledgers = {args.ledger: LEDGERS[args.ledger]}
+    else:
+        ledgers = LEDGERS
+
+    for ledger, data in load_ledgers(ledgers, start_date=START_DATE).items():
+        if data.empty:
+            print(f"No bets were loaded for the {ledger} ledger.")
+            continue
+
+        default_view = apply_default_filters(process_bets_data(data))
+        artifacts = compute_artifacts(default_view, args.workers)
+        version_dir = write_artifacts(
+            artifacts, get_data_version(data), ledger, Path(args.out)
+        )
+        print(
+            f"Wrote {len(artifacts)} artifacts of the {ledger} ledger to {version_dir}"
+        )
+
+
+if __name__ == "__main__":
+    main()
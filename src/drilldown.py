@@ -0,0 +1,154 @@
+"""
+Drill-down Module
+
+This module serves the League, Team and Bet Type drill-down of the ledger. The bets are
+aggregated once into sparse multi-key tables, holding only the combinations that were
+bet on: the totals of every League, Team and Type, and their weekly timelines. Both are
+sorted by their keys, so each drill step (the teams of a league, then the bet types
+and timeline of a team) is a binary search into them rather than a regrouping of the
+raw bets, whatever the number of teams.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from rollups import ROLLUP_MEASURES, period_start, summarize_periods
+
+WIN_SYMBOL = "W"
+DRILL_KEYS = ["League", "Team", "Type"]
+DRILL_MEASURES = [*ROLLUP_MEASURES, "Odds"]  # Odds are summed, to average them
+TIMELINE_GRANULARITY = "W"
+
+
+def build_drilldown_cube(bets_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate the bets of every League, Team and Type combination bet on.
+
+    Args:
+        bets_df (pd.DataFrame): The processed DataFrame containing the settled bets.
+
+    Returns:
+        pd.DataFrame: The Bets, Wager, Profit, Wins and summed Odds of each
+                      combination, indexed and sorted by League, Team and Type.
+    """
+    return (
+        bets_df.assign(Bets=1, Wins=bets_df["Result"].eq(WIN_SYMBOL).astype(int))
+        .groupby(DRILL_KEYS, observed=True, sort=True)[DRILL_MEASURES]
+        .sum()
+    )
+
+
+def build_drilldown_timeline(bets_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate the bets of every League, Team and Type combination per week.
+
+    Args:
+        bets_df (pd.DataFrame): The processed DataFrame containing the settled bets.
+
+    Returns:
+        pd.DataFrame: The rollup measures of each combination and week bet on,
+                      indexed and sorted by League, Team, Type and week start 'Date'.
+    """
+    return (
+        bets_df.assign(
+            Date=period_start(bets_df["Date"], TIMELINE_GRANULARITY),
+            Bets=1,
+            Wins=bets_df["Result"].eq(WIN_SYMBOL).astype(int),
+        )
+        .groupby([*DRILL_KEYS, "Date"], observed=True, sort=True)[ROLLUP_MEASURES]
+        .sum()
+    )
+
+
+def summarize_drill_level(totals: pd.DataFrame, column: str) -> pd.DataFrame:
+    """
+    Derive the statistics of the rows of a drill step, the most bet on first.
+
+    Args:
+        totals (pd.DataFrame): The summed measures, indexed by the values of `column`.
+        column (str): The dimension of the drill step.
+
+    Returns:
+        pd.DataFrame: The bets count, wager, profit, winrate, ROI and average odds of
+                      every value of the dimension.
+    """
+    stats = pd.DataFrame(
+        {
+            column: totals.index.to_numpy(),
+            "Bets": totals["Bets"].to_numpy(),
+            "Wager": totals["Wager"].to_numpy(),
+            "Profit": totals["Profit"].to_numpy(),
+            "Winrate %": (totals["Wins"] / totals["Bets"] * 100).to_numpy(),
+            "ROI %": (totals["Profit"] / totals["Wager"] * 100).to_numpy(),
+            "Avg Odds": (totals["Odds"] / totals["Bets"]).to_numpy(),
+        }
+    )
+    order = np.argsort(-stats["Bets"].to_numpy(), kind="stable")
+    return stats.iloc[order].round(2).reset_index(drop=True)
+
+
+class DrillDown:
+    """The sparse League, Team and Type aggregates of a ledger, sorted for lookups."""
+
+    def __init__(self, cube: pd.DataFrame, timeline: pd.DataFrame) -> None:
+        self.cube = cube.sort_index()
+        self.teams = self.cube.groupby(level=["League", "Team"], sort=True).sum()
+        self.leagues = self.teams.groupby(level="League", sort=True).sum()
+        self.timeline = timeline.sort_index()
+
+    def league_stats(self) -> pd.DataFrame:
+        """
+        Get the statistics of every league.
+
+        Returns:
+            pd.DataFrame: One row per league, see `summarize_drill_level`.
+        """
+        return summarize_drill_level(self.leagues, "League")
+
+    def team_stats(self, league: str) -> pd.DataFrame:
+        """
+        Get the statistics of the teams bet on in a league.
+
+        Args:
+            league (str): The league.
+
+        Returns:
+            pd.DataFrame: One row per team, see `summarize_drill_level`.
+        """
+        return summarize_drill_level(self.teams.loc[league], "Team")
+
+    def type_stats(self, league: str, team: str) -> pd.DataFrame:
+        """
+        Get the statistics of the bet types of a team in a league.
+
+        Args:
+            league (str): The league.
+            team (str): The team.
+
+        Returns:
+            pd.DataFrame: One row per bet type, see `summarize_drill_level`.
+        """
+        return summarize_drill_level(self.cube.loc[(league, team)], "Type")
+
+    def team_timeline(
+        self, league: str, team: str, bet_type: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Get the weekly totals of a team in a league, for all or one of its bet types.
+
+        Args:
+            league (str): The league.
+            team (str): The team.
+            bet_type (Optional[str]): The bet type, all of them if None.
+
+        Returns:
+            pd.DataFrame: One row per week, as returned by `summarize_periods`.
+        """
+        weeks = self.timeline.loc[(league, team)]
+        if bet_type is None:
+            weeks = weeks.groupby(level="Date").sum()
+        else:
+            weeks = weeks.loc[bet_type]
+        return summarize_periods(weeks.reset_index(), TIMELINE_GRANULARITY)
@@ -0,0 +1,147 @@
+"""
+Exposure Module
+
+This module tracks the open exposure of the pending bets. Totals per League, Team and
+date are kept in an exposure book and updated with the rows that appeared, settled or
+changed since the previous refresh, keyed by their sheet row.
+"""
+
+import pandas as pd
+import streamlit as st
+
+from commons import LEDGER_ATTR
+
+EXPOSURE_DIMENSIONS = ["League", "Team", "Date"]
+EXPOSURE_MEASURES = ["Bets", "Wager", "To_Win"]
+EXPOSURE_LABELS = {"Wager": "Units at Risk", "To_Win": "Potential Profit"}
+EXPOSURE_STATE_KEY = "exposure_book"
+
+
+def exposure_rows(pending_bets_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Extract the columns the exposure depends on from the pending bets.
+
+    Args:
+        pending_bets_df (pd.DataFrame): The processed DataFrame of pending bets.
+
+    Returns:
+        pd.DataFrame: The exposure dimensions and measures of each pending bet.
+    """
+    return pending_bets_df.assign(Bets=1, Date=pending_bets_df["Date"].dt.normalize())[
+        EXPOSURE_DIMENSIONS + EXPOSURE_MEASURES
+    ]
+
+
+def add_outcomes(totals: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the worst and best-case bankroll outcomes to exposure totals.
+
+    Args:
+        totals (pd.DataFrame): Exposure totals with Wager and To_Win columns.
+
+    Returns:
+        pd.DataFrame: The totals with 'Worst Case' (every bet lost) and 'Best Case'
+                      (every bet won) columns, in units.
+    """
+    return totals.assign(
+        **{"Worst Case": -totals["Wager"], "Best Case": totals["To_Win"]}
+    )
+
+
+class ExposureBook:
+    """Running exposure totals of the pending bets, updated incrementally."""
+
+    def __init__(self) -> None:
+        self.rows = pd.DataFrame(columns=EXPOSURE_DIMENSIONS + EXPOSURE_MEASURES)
+        self.totals = {
+            dimension: pd.DataFrame(columns=EXPOSURE_MEASURES, dtype=float)
+            for dimension in EXPOSURE_DIMENSIONS
+        }
+
+    def update(self, pending_bets_df: pd.DataFrame) -> None:
+        """
+        Bring the book up to date with the current pending bets.
+
+        Only the rows that were added, removed or changed since the previous update
+        are aggregated, and their contributions are added to or subtracted from the
+        totals.
+
+        Args:
+            pending_bets_df (pd.DataFrame): The processed DataFrame of pending bets.
+        """
+        current = exposure_rows(pending_bets_df)
+        previous = self.rows
+
+        common = current.index.intersection(previous.index)
+        changed = common[
+            (current.loc[common].to_numpy() != previous.loc[common].to_numpy()).any(
+                axis=1
+            )
+        ]
+        removed = previous.index.difference(current.index).union(changed)
+        added = current.index.difference(previous.index).union(changed)
+
+        if removed.empty and added.empty:
+            return
+
+        removed_rows = previous.loc[removed].copy()
+        removed_rows[EXPOSURE_MEASURES] = -removed_rows[EXPOSURE_MEASURES]
+        deltas = pd.concat(
+            [rows for rows in (current.loc[added], removed_rows) if not rows.empty]
+        )
+        for dimension in EXPOSURE_DIMENSIONS:
+            totals = self.totals[dimension].add(
+                deltas.groupby(dimension)[EXPOSURE_MEASURES].sum(), fill_value=0
+            )
+            self.totals[dimension] = totals[totals["Bets"] > 0]
+        self.rows = current
+
+    def summary(self) -> dict:
+        """
+        Summarize the open exposure.
+
+        Returns:
+            dict: The number of open bets, the units at risk and the worst and
+                  best-case bankroll outcomes, the best case being the potential
+                  profit.
+        """
+        wager, to_win = self.rows["Wager"].sum(), self.rows["To_Win"].sum()
+        return {
+            "open_bets": len(self.rows),
+            "total_wager": round(wager, 2),
+            "worst_case": round(-wager, 2),
+            "best_case": round(to_win, 2),
+        }
+
+    def by(self, dimension: str) -> pd.DataFrame:
+        """
+        Get the exposure totals for one dimension.
+
+        Args:
+            dimension (str): One of `EXPOSURE_DIMENSIONS`.
+
+        Returns:
+            pd.DataFrame: The exposure totals and outcomes per value of the dimension.
+        """
+        totals = self.totals[dimension].astype({"Bets": int})
+        return add_outcomes(totals).round(2).reset_index(names=dimension)
+
+
+def get_exposure_book(pending_bets_df: pd.DataFrame) -> ExposureBook:
+    """
+    Get the exposure book of the session, updated with the current pending bets.
+
+    Args:
+        pending_bets_df (pd.DataFrame): The processed DataFrame of pending bets.
+
+    Returns:
+        ExposureBook: The up-to-date exposure book.
+    """
+    # One book per ledger, as sheet rows only identify a bet within its ledger
+    state_key = f"{EXPOSURE_STATE_KEY}:{pending_bets_df.attrs.get(LEDGER_ATTR)}"
+    if state_key not in st.session_state:
+        st.session_state[state_key] = ExposureBook()
+
+    book = st.session_state[state_key]
+    book.update(pending_bets_df)
+    return book
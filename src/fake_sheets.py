@@ -0,0 +1,327 @@
+"""
+Fake Sheets Module
+
+This module serves a ledger through a local fake of the Google Sheets API, with
+injectable latency and errors, to exercise the quota guard, the retries and the
+last-good fallback without touching the real API or its quota:
+
+    python src/fake_sheets.py --source synthetic:5000 --latency 0.2 --error-rate 0.1
+
+Point the app at it with `SHEETS_API_URL` and the printed spreadsheet URL. The faults
+can be changed while it runs, e.g. to take the API down and bring it back:
+
+    curl -X POST localhost:8503/faults -d '{"error_rate": 1, "status": 503}'
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+from gspread.utils import a1_to_rowcol
+
+from sources import (
+    SYNTHETIC_SOURCE,
+    make_synthetic_ledger,
+    parse_source,
+    read_ledger_file,
+)
+
+FAKE_HOST = "127.0.0.1"
+FAKE_PORT = 8503
+SPREADSHEET_ID = "fake-ledger"
+SPREADSHEET_PATH = re.compile(r"^/v4/spreadsheets/([^/]+)(?:/values/(.+))?$")
+A1_RANGE = re.compile(r"^([A-Z]*)(\d*)$")
+ERROR_STATUSES = {
+    HTTPStatus.TOO_MANY_REQUESTS: "RESOURCE_EXHAUSTED",
+    HTTPStatus.INTERNAL_SERVER_ERROR: "INTERNAL",
+    HTTPStatus.SERVICE_UNAVAILABLE: "UNAVAILABLE",
+}
+
+
+class Faults:
+    """The latency and errors injected into the responses of the fake API."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        status: int = HTTPStatus.TOO_MANY_REQUESTS,
+    ) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.status = status
+        self.requests = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def update(self, changes: dict) -> dict:
+        """
+        Change the injected faults.
+
+        Args:
+            changes (dict): The new 'latency', 'error_rate' or 'status'.
+
+        Returns:
+            dict: The faults and the request counts after the change.
+        """
+        with self.lock:
+            self.latency = float(changes.get("latency", self.latency))
+            self.error_rate = float(changes.get("error_rate", self.error_rate))
+            self.status = int(changes.get("status", self.status))
+            return self.describe()
+
+    def describe(self) -> dict:
+        """
+        Describe the injected faults.
+
+        Returns:
+            dict: The faults and the number of requests and injected errors.
+        """
+        return {
+            "latency": self.latency,
+            "error_rate": self.error_rate,
+            "status": self.status,
+            "requests": self.requests,
+            "errors": self.errors,
+        }
+
+    def inject(self) -> int:
+        """
+        Delay a request and draw whether it fails.
+
+        Returns:
+            int: The status of the injected error, 0 if the request goes through.
+        """
+        with self.lock:
+            self.requests += 1
+            latency, failed = self.latency, random.random() < self.error_rate
+            self.errors += failed
+        time.sleep(latency)
+        return self.status if failed else 0
+
+
+def split_worksheets(ledger: pd.DataFrame, partitions: int = 1) -> dict:
+    """
+    Split a ledger into the worksheets of the fake spreadsheet, as rows of strings.
+
+    Args:
+        ledger (pd.DataFrame): The raw ledger, in date order.
+        partitions (int): The number of worksheets, one per season.
+
+    Returns:
+        dict: The header and rows of each worksheet, by title.
+    """
+    cells = ledger.astype(object).where(ledger.notna(), "").astype(str)
+    header = [str(column) for column in ledger.columns]
+    return {
+        f"Season {number}": [header]
+        + [list(row) for row in cells.iloc[rows].itertuples(index=False)]
+        for number, rows in enumerate(
+            np.array_split(np.arange(len(cells)), partitions), start=1
+        )
+    }
+
+
+def read_range(rows: list, a1_range: str) -> list:
+    """
+    Read a range of a worksheet, trimming empty trailing cells like the API does.
+
+    Args:
+        rows (list): The header and rows of the worksheet.
+        a1_range (str): The range, e.g. 'A5:G' or 'A1:1', without the worksheet
+                        title, or empty for the whole worksheet.
+
+    Returns:
+        list: The values of the range, one list per row.
+    """
+    start, _, end = a1_range.partition(":")
+    start_column, start_row = A1_RANGE.match(start).groups()
+    end_column, end_row = A1_RANGE.match(end or start).groups()
+    first_row = int(start_row or 1)
+    last_row = int(end_row) if end_row else len(rows)
+    first_column = a1_to_rowcol(f"{start_column}1")[1] if start_column else 1
+    last_column = a1_to_rowcol(f"{end_column}1")[1] if end_column else None
+
+    values = []
+    for row in rows[first_row - 1 : last_row]:
+        cells = row[first_column - 1 : last_column]
+        while cells and cells[-1] == "":
+            cells = cells[:-1]
+        values.append(cells)
+    while values and not values[-1]:
+        values.pop()
+    return values
+
+
+class FakeSheetsHandler(BaseHTTPRequestHandler):
+    """Serve the spreadsheet metadata and values endpoints read by gspread."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    worksheets: dict = None
+    faults: Faults = None
+
+    def do_GET(self) -> None:  # noqa: N802
+        """Serve the metadata or the values of a range of the spreadsheet."""
+        match = SPREADSHEET_PATH.match(urlsplit(self.path).path)
+        if not match or match.group(1) != SPREADSHEET_ID:
+            self.send_error_json(HTTPStatus.NOT_FOUND, "NOT_FOUND")
+            return
+
+        if status := self.faults.inject():
+            self.send_error_json(status, ERROR_STATUSES.get(status, "UNKNOWN"))
+            return
+
+        if match.group(2) is None:
+            self.send_json(HTTPStatus.OK, self.metadata())
+            return
+
+        name = unquote(match.group(2))
+        title, _, a1_range = name.rpartition("!") if "!" in name else (name, "", "")
+        rows = self.worksheets.get(title.strip("'"))
+        if rows is None:
+            self.send_error_json(HTTPStatus.BAD_REQUEST, "INVALID_ARGUMENT")
+            return
+
+        values = read_range(rows, a1_range)
+        self.send_json(
+            HTTPStatus.OK, {"range": name, "majorDimension": "ROWS", "values": values}
+        )
+
+    def do_POST(self) -> None:  # noqa: N802
+        """Change the injected faults."""
+        if urlsplit(self.path).path != "/faults":
+            self.send_error_json(HTTPStatus.NOT_FOUND, "NOT_FOUND")
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_json(HTTPStatus.OK, self.faults.update(json.loads(body or b"{}")))
+
+    def metadata(self) -> dict:
+        """
+        Describe the spreadsheet and its worksheets.
+
+        Returns:
+            dict: The spreadsheet resource, without its cells.
+        """
+        return {
+            "spreadsheetId": SPREADSHEET_ID,
+            "properties": {"title": "Fake Ledger", "locale": "en_US"},
+            "sheets": [
+                {
+                    "properties": {
+                        "sheetId": number,
+                        "title": title,
+                        "index": number,
+                        "sheetType": "GRID",
+                        "gridProperties": {
+                            "rowCount": len(rows),
+                            "columnCount": len(rows[0]),
+                        },
+                    }
+                }
+                for number, (title, rows) in enumerate(self.worksheets.items())
+            ],
+        }
+
+    def send_json(self, status: HTTPStatus, payload: dict) -> None:
+        """
+        Send a JSON response.
+
+        Args:
+            status (HTTPStatus): The status of the response.
+            payload (dict): The body of the response.
+        """
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status: int, reason: str) -> None:
+        """
+        Send an error shaped like the errors of the Google APIs.
+
+        Args:
+            status (int): The status of the error.
+            reason (str): The status name of the error, e.g. 'RESOURCE_EXHAUSTED'.
+        """
+        error = {"code": status, "message": f"Injected {reason}", "status": reason}
+        self.send_json(HTTPStatus(status), {"error": error})
+
+    def log_message(self, *args) -> None:
+        """Skip the per-request access log."""
+
+
+def create_fake_server(
+    ledger: pd.DataFrame,
+    partitions: int = 1,
+    faults: Faults = None,
+    host: str = FAKE_HOST,
+    port: int = FAKE_PORT,
+) -> ThreadingHTTPServer:
+    """
+    Create a fake Sheets API server serving a ledger.
+
+    Args:
+        ledger (pd.DataFrame): The raw ledger.
+        partitions (int): The number of worksheets the ledger is split into.
+        faults (Faults): The injected faults, none by default.
+        host (str): The interface to listen on.
+        port (int): The port to listen on, 0 for any free port.
+
+    Returns:
+        ThreadingHTTPServer: The server, not yet serving.
+    """
+    attributes = {
+        "worksheets": split_worksheets(ledger, partitions),
+        "faults": faults or Faults(),
+    }
+    handler = type("Handler", (FakeSheetsHandler,), attributes)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main() -> None:
+    """Serve a ledger through the fake Sheets API until interrupted."""
+    parser = argparse.ArgumentParser(description="Serve a fake Google Sheets API.")
+    parser.add_argument("--source", default=SYNTHETIC_SOURCE, help="Ledger to serve")
+    parser.add_argument("--partitions", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--status", type=int, default=HTTPStatus.TOO_MANY_REQUESTS)
+    parser.add_argument("--host", default=FAKE_HOST)
+    parser.add_argument("--port", type=int, default=FAKE_PORT)
+    args = parser.parse_args()
+
+    kind, target = parse_source(args.source)
+    if kind == SYNTHETIC_SOURCE:
+        ledger = make_synthetic_ledger(*target)
+    else:
+        ledger = read_ledger_file(target)
+
+    faults = Faults(args.latency, args.error_rate, args.status)
+    server = create_fake_server(ledger, args.partitions, faults, args.host, args.port)
+    api_url = f"http://{args.host}:{server.server_port}"
+    sheet_url = f"{api_url}/spreadsheets/d/{SPREADSHEET_ID}/edit"
+    prefix = "partitioned:" if args.partitions > 1 else ""
+    print(f"SHEETS_API_URL={api_url} LEDGER_SOURCE={prefix}{sheet_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
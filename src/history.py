@@ -0,0 +1,482 @@
+"""
+History Module
+
+This module keeps an append-only history of the versions of each ledger, so edits made
+to the sheet after the fact (corrected results, fixed odds) can be audited. Each new
+version is stored as its delta against the previous one: the rows inserted, updated and
+deleted, by sheet row key. Every `CHECKPOINT_INTERVAL` versions, the whole ledger is
+stored instead, and a past version is rebuilt by replaying the deltas recorded since
+the nearest checkpoint before it. The history of a ledger is kept in its directory:
+
+    history/<ledger>/versions.jsonl      one line per version, appended on refresh
+    history/<ledger>/00000042.parquet    the delta or the checkpoint of version 42
+
+It is recorded by the app as it refreshes, and can be listed or exported to audit it:
+
+    python src/history.py --ledger "Oracle Bets" [--as-of 42 --out ledger.csv]
+"""
+
+import argparse
+import json
+import logging
+import re
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from paths import HISTORY_DIR
+
+CHECKPOINT_INTERVAL = 50  # Versions between two full copies of the ledger
+VERSIONS_NAME = "versions.jsonl"
+OP_COLUMN = "_op"
+TEXT_PREFIX = "_text:"  # Prefix of the stored text cells of a column holding numbers
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+CHECKPOINT = "checkpoint"
+DELTA = "delta"
+
+logger = logging.getLogger(__name__)
+
+
+def split_cells(column: pd.Series) -> tuple:
+    """
+    Tell apart the numbers of a column from its text and missing cells.
+
+    Cells typed by hand can leave text in a column of numbers (e.g. odds of '2,1'),
+    so the cells of object columns are told apart one by one.
+
+    Args:
+        column (pd.Series): A column of the raw ledger.
+
+    Returns:
+        tuple: The numbers as floats, NaN for the other cells, and the mask of the
+               numbers.
+    """
+    if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+        numbers = column.to_numpy(dtype="float64", na_value=np.nan)
+        return numbers, ~np.isnan(numbers)
+
+    values = column.to_numpy(dtype=object)
+    if pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty"):
+        return np.full(len(values), np.nan), np.zeros(len(values), dtype=bool)
+
+    is_number = np.fromiter(
+        (
+            isinstance(value, (int, float, np.number))
+            and not isinstance(value, bool)
+            and value == value  # Not NaN
+            for value in values
+        ),
+        dtype=bool,
+        count=len(values),
+    )
+    numbers = np.full(len(values), np.nan)
+    numbers[is_number] = values[is_number].astype("float64")
+    return numbers, is_number
+
+
+def hash_rows(ledger_df: pd.DataFrame) -> pd.Series:
+    """
+    Hash the values of every row of a ledger, ignoring its index.
+
+    Each cell is hashed by its value rather than by the type of its column: numbers as
+    floats, and text and missing cells as objects, so a column switching between
+    integers, floats and text when a blank or a hand-typed cell appears only changes
+    the hash of the rows whose cells changed.
+
+    Args:
+        ledger_df (pd.DataFrame): The raw ledger.
+
+    Returns:
+        pd.Series: The hash of each row, indexed by row key.
+    """
+    cell_hashes = {}
+    for position, (_, column) in enumerate(ledger_df.items()):
+        numbers, is_number = split_cells(column)
+        if is_number.all():
+            hashes = pd.util.hash_array(numbers)
+        else:
+            values = column.to_numpy(dtype=object)
+            if not is_number.any():
+                hashes = pd.util.hash_array(values)
+            else:
+                hashes = np.empty(len(values), dtype=np.uint64)
+                hashes[is_number] = pd.util.hash_array(numbers[is_number])
+                hashes[~is_number] = pd.util.hash_array(values[~is_number])
+        cell_hashes[position] = hashes
+    return pd.util.hash_pandas_object(
+        pd.DataFrame(cell_hashes, index=ledger_df.index), index=False
+    )
+
+
+def diff_ledgers(previous: pd.DataFrame, current: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute the rows inserted, updated and deleted between two versions of a ledger.
+
+    Args:
+        previous (pd.DataFrame): The previous version, indexed by row key.
+        current (pd.DataFrame): The new version, indexed by row key.
+
+    Returns:
+        pd.DataFrame: The new values of the inserted and updated rows, and the keys of
+                      the deleted rows, with the change in `OP_COLUMN`.
+    """
+    inserted = ~current.index.isin(previous.index)
+    deleted = ~previous.index.isin(current.index)
+
+    common = current.index[~inserted]
+    if list(previous.columns) == list(current.columns):
+        changed = hash_rows(current.loc[common]).to_numpy() != (
+            hash_rows(previous.loc[common]).to_numpy()
+        )
+    else:
+        # The columns changed, so every row did
+        changed = np.ones(len(common), dtype=bool)
+    updated = current.index.isin(common[changed])
+
+    delta = pd.concat(
+        [
+            current[inserted].assign(**{OP_COLUMN: INSERT}),
+            current[updated].assign(**{OP_COLUMN: UPDATE}),
+            pd.DataFrame({OP_COLUMN: DELETE}, index=previous.index[deleted]),
+        ]
+    )
+    return delta.sort_index()
+
+
+def apply_delta(ledger_df: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+    """
+    Apply the delta of a version to the ledger of the previous version.
+
+    Args:
+        ledger_df (pd.DataFrame): The previous version of the ledger.
+        delta (pd.DataFrame): The delta, see `diff_ledgers`.
+
+    Returns:
+        pd.DataFrame: The new version of the ledger, sorted by row key.
+    """
+    upserts = delta[delta[OP_COLUMN] != DELETE].drop(columns=OP_COLUMN)
+    kept = ledger_df[~ledger_df.index.isin(delta.index)]
+    return pd.concat([kept, upserts]).sort_index()
+
+
+def to_storable(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Make a ledger or a delta writable to Parquet.
+
+    Parquet cannot store numbers and text in one column, so the object columns holding
+    numbers are stored as a column of their numbers and a `TEXT_PREFIX` column of
+    their text cells, see `from_storable`.
+
+    Args:
+        frame (pd.DataFrame): The ledger or delta.
+
+    Returns:
+        pd.DataFrame: The frame, with its object columns holding numbers split.
+    """
+    split = {}
+    for column in frame.columns:
+        if frame[column].dtype != object or pd.api.types.infer_dtype(
+            frame[column], skipna=True
+        ) in ("string", "empty"):
+            continue
+        numbers, is_number = split_cells(frame[column])
+        split[column] = numbers
+        split[f"{TEXT_PREFIX}{column}"] = pd.Series(
+            frame[column].to_numpy(dtype=object), index=frame.index, dtype="string"
+        ).where(~is_number)
+    if not split:
+        return frame
+    return frame.assign(**split)
+
+
+def from_storable(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rebuild a ledger or a delta read from Parquet, see `to_storable`.
+
+    Missing cells of the object columns are read as NA, like the ledger loaders do.
+
+    Args:
+        frame (pd.DataFrame): The frame read from Parquet.
+
+    Returns:
+        pd.DataFrame: The frame, with its split columns joined again.
+    """
+    joined = {}
+    for column in frame.columns:
+        if str(column).startswith(TEXT_PREFIX):
+            name = column[len(TEXT_PREFIX) :]
+            text = frame[column].astype(object)
+            joined[name] = text.where(text.notna(), frame[name].astype(object))
+    frame = frame.drop(columns=[f"{TEXT_PREFIX}{name}" for name in joined]).assign(
+        **joined
+    )
+    objects = frame.columns[frame.dtypes == object]
+    return frame.assign(
+        **{
+            column: frame[column].where(frame[column].notna(), pd.NA)
+            for column in objects
+        }
+    )
+
+
+def ledger_directory_name(ledger: str) -> str:
+    """
+    Get the name of the history directory of a ledger.
+
+    Args:
+        ledger (str): The name of the ledger.
+
+    Returns:
+        str: The name, with anything but letters, digits, '-' and '_' replaced.
+    """
+    return re.sub(r"[^\w-]+", "_", ledger).strip("_") or "ledger"
+
+
+class LedgerHistory:
+    """The append-only version history of a ledger, stored in a directory."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = Path(directory)
+        self.versions_path = self.directory / VERSIONS_NAME
+        self.lock = threading.Lock()
+        self.versions = []
+        if self.versions_path.exists():
+            with open(self.versions_path) as lines:
+                self.versions = [json.loads(line) for line in lines if line.strip()]
+        self.latest = None  # The ledger of the last version, once rebuilt or recorded
+
+    def version_path(self, version: int) -> Path:
+        """
+        Get the path of the delta or checkpoint of a version.
+
+        Args:
+            version (int): The number of the version, from 1.
+
+        Returns:
+            Path: The Parquet file of the version.
+        """
+        return self.directory / f"{version:08d}.parquet"
+
+    def is_latest(self, data_version: str) -> bool:
+        """
+        Check whether a data version is the last one recorded.
+
+        Args:
+            data_version (str): The data version of the ledger.
+
+        Returns:
+            bool: True if the version was the last one recorded.
+        """
+        return bool(self.versions) and self.versions[-1]["data_version"] == data_version
+
+    def record(self, ledger_df: pd.DataFrame, data_version: str) -> Optional[dict]:
+        """
+        Record a version of the ledger, unless it is the last one recorded.
+
+        Args:
+            ledger_df (pd.DataFrame): The raw ledger, indexed by row key.
+            data_version (str): The data version of the ledger.
+
+        Returns:
+            Optional[dict]: The entry of the new version, None if it was recorded
+                            already.
+        """
+        with self.lock:
+            if self.is_latest(data_version):
+                return None
+
+            previous = self.rebuild(len(self.versions)) if self.versions else None
+            if previous is None:
+                delta = ledger_df.assign(**{OP_COLUMN: INSERT})
+            else:
+                delta = diff_ledgers(previous, ledger_df)
+
+            version = len(self.versions) + 1
+            kind = CHECKPOINT if (version - 1) % CHECKPOINT_INTERVAL == 0 else DELTA
+            stored = ledger_df if kind == CHECKPOINT else delta
+            self.directory.mkdir(parents=True, exist_ok=True)
+            to_storable(stored).to_parquet(self.version_path(version))
+
+            counts = delta[OP_COLUMN].value_counts()
+            entry = {
+                "version": version,
+                "data_version": data_version,
+                "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "kind": kind,
+                "rows": len(ledger_df),
+                "columns": [str(column) for column in ledger_df.columns],
+                "dtypes": {
+                    str(column): str(dtype)
+                    for column, dtype in ledger_df.dtypes.items()
+                },
+                **{op: int(counts.get(op, 0)) for op in (INSERT, UPDATE, DELETE)},
+            }
+            with open(self.versions_path, "a") as lines:
+                lines.write(json.dumps(entry) + "\n")
+            self.versions.append(entry)
+            self.latest = ledger_df
+            return entry
+
+    def rebuild(self, version: int) -> pd.DataFrame:
+        """
+        Rebuild a version by replaying the deltas since the checkpoint before it.
+
+        Args:
+            version (int): The number of the version, from 1.
+
+        Returns:
+            pd.DataFrame: The raw ledger as of the version.
+        """
+        if version == len(self.versions) and self.latest is not None:
+            return self.latest
+
+        checkpoint = max(
+            entry["version"]
+            for entry in self.versions[:version]
+            if entry["kind"] == CHECKPOINT
+        )
+        ledger_df = from_storable(pd.read_parquet(self.version_path(checkpoint)))
+        for number in range(checkpoint + 1, version + 1):
+            ledger_df = apply_delta(
+                ledger_df, from_storable(pd.read_parquet(self.version_path(number)))
+            )
+
+        # The replayed columns take the types of the rows they gathered, so they are
+        # given back the types they had when the version was recorded
+        entry = self.versions[version - 1]
+        ledger_df = ledger_df.reindex(columns=entry["columns"])
+        ledger_df = ledger_df.astype(
+            {
+                column: dtype
+                for column, dtype in entry.get("dtypes", {}).items()
+                if str(ledger_df[column].dtype) != dtype
+            }
+        )
+
+        if version == len(self.versions):
+            self.latest = ledger_df
+        return ledger_df
+
+    def as_of(self, version: int) -> pd.DataFrame:
+        """
+        Get the ledger as of a recorded version.
+
+        Args:
+            version (int): The number of the version, from 1.
+
+        Returns:
+            pd.DataFrame: The raw ledger as of the version.
+
+        Raises:
+            ValueError: If the version was not recorded.
+        """
+        if not 1 <= version <= len(self.versions):
+            raise ValueError(f"Version {version} of the ledger was not recorded")
+        with self.lock:
+            return self.rebuild(version)
+
+    def list_versions(self) -> pd.DataFrame:
+        """
+        List the recorded versions, with the number of rows each one changed.
+
+        Returns:
+            pd.DataFrame: One row per version, in recording order.
+        """
+        return pd.DataFrame(
+            self.versions,
+            columns=[
+                "version",
+                "data_version",
+                "recorded_at",
+                "kind",
+                "rows",
+                INSERT,
+                UPDATE,
+                DELETE,
+            ],
+        )
+
+
+@st.cache_resource
+def get_history(ledger: str, history_dir: Path = HISTORY_DIR) -> LedgerHistory:
+    """
+    Get the history of a ledger, once per process.
+
+    Args:
+        ledger (str): The name of the ledger.
+        history_dir (Path): The root directory of the histories.
+
+    Returns:
+        LedgerHistory: The history of the ledger.
+    """
+    return LedgerHistory(Path(history_dir) / ledger_directory_name(ledger))
+
+
+def is_recorded(ledger: str, data_version: str) -> bool:
+    """
+    Check whether a data version of a ledger is the last one recorded.
+
+    Args:
+        ledger (str): The name of the ledger.
+        data_version (str): The data version of the ledger.
+
+    Returns:
+        bool: True if the version was recorded last.
+    """
+    return get_history(ledger).is_latest(data_version)
+
+
+def record_version(
+    ledger: str, ledger_df: pd.DataFrame, data_version: str
+) -> Optional[dict]:
+    """
+    Record a new version of a ledger, logging instead of failing if it cannot be.
+
+    Args:
+        ledger (str): The name of the ledger.
+        ledger_df (pd.DataFrame): The raw ledger.
+        data_version (str): The data version of the ledger.
+
+    Returns:
+        Optional[dict]: The entry of the new version, None if it was not recorded.
+    """
+    try:
+        entry = get_history(ledger).record(ledger_df, data_version)
+    except (OSError, ValueError, ImportError) as e:
+        logger.warning("The version of %s was not recorded: %s", ledger, e)
+        return None
+    if entry is not None:
+        logger.info("Recorded version %s of %s", entry["version"], ledger)
+    return entry
+
+
+def main() -> None:
+    """List the versions of a ledger, or export the ledger as of one of them."""
+    parser = argparse.ArgumentParser(description="Audit the history of a ledger.")
+    parser.add_argument("--ledger", required=True, help="The name of the ledger")
+    parser.add_argument("--as-of", type=int, help="Export the ledger as of a version")
+    parser.add_argument("--out", help="The CSV file of the export, stdout by default")
+    parser.add_argument("--history-dir", default=str(HISTORY_DIR))
+    args = parser.parse_args()
+
+    history = LedgerHistory(Path(args.history_dir) / ledger_directory_name(args.ledger))
+    if args.as_of is None:
+        print(history.list_versions().to_string(index=False))
+        return
+
+    ledger_df = history.as_of(args.as_of)
+    if args.out:
+        ledger_df.to_csv(args.out)
+    else:
+        print(ledger_df.to_csv())
+
+
+if __name__ == "__main__":
+    main()
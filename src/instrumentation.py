@@ -0,0 +1,145 @@
+"""
+Instrumentation Module
+
+This module measures the memory of the app. The processed ledgers are shared by every
+session, so what grows with the number of viewers is the overhead each session adds on
+top of them: the buffers its filtered views do not share with the ledger, and the
+objects it keeps in its session state.
+"""
+
+import logging
+import sys
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from metrics import SESSION_BYTES
+
+MEMORY_STATE_KEY = "memory_report"
+MEASURED_STATE_KEY = "memory_measured"  # The key and size of the last state measured
+MEMORY_ATTR = "memory_bytes"
+
+logger = logging.getLogger(__name__)
+
+
+def frame_bytes(frame: pd.DataFrame) -> int:
+    """
+    Measure the memory of a DataFrame, including the strings of its object columns.
+
+    Args:
+        frame (pd.DataFrame): The DataFrame.
+
+    Returns:
+        int: The size of the DataFrame, in bytes.
+    """
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def owned_bytes(view: pd.DataFrame, shared: pd.DataFrame) -> int:
+    """
+    Measure the buffers of a view that are not shared with the ledger it comes from.
+
+    Object columns only own their array of pointers, since the strings they point to
+    are the ledger's.
+
+    Args:
+        view (pd.DataFrame): A view of the ledger, e.g. the rows kept by the filters.
+        shared (pd.DataFrame): The shared ledger.
+
+    Returns:
+        int: The memory held by the view alone, in bytes.
+    """
+    if view is shared:
+        return 0
+
+    total = view.index.memory_usage()
+    for column in view.columns:
+        values = view[column].to_numpy()
+        if column in shared.columns and np.may_share_memory(
+            values, shared[column].to_numpy()
+        ):
+            continue
+        total += values.nbytes
+    return int(total)
+
+
+def object_bytes(value, seen: set = None) -> int:
+    """
+    Estimate the memory of an object kept in the session state or in a cache.
+
+    Args:
+        value: The object.
+        seen (set): The ids of the objects already measured.
+
+    Returns:
+        int: The approximate size of the object and of what it references, in bytes.
+    """
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    if isinstance(value, pd.DataFrame):
+        return frame_bytes(value)
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if hasattr(value, "to_plotly_json"):
+        return object_bytes(value.to_plotly_json(), seen)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            object_bytes(key, seen) + object_bytes(item, seen)
+            for key, item in value.items()
+        )
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(object_bytes(item, seen) for item in value)
+    if hasattr(value, "__dict__"):
+        return sys.getsizeof(value) + object_bytes(vars(value), seen)
+    return sys.getsizeof(value)
+
+
+def record_session_memory(
+    shared: pd.DataFrame, view: pd.DataFrame, state_key: tuple = None
+) -> dict:
+    """
+    Report the memory of the ledger shared by the sessions and of the current session.
+
+    The session state holds figures and tables that are costly to measure, so it is
+    only measured again when `state_key` or the keys of the state change.
+
+    The report is kept in the session state, logged at debug level and added to the
+    session memory metric.
+
+    Args:
+        shared (pd.DataFrame): The shared ledger of the current run.
+        view (pd.DataFrame): The view of the ledger the session works on.
+        state_key (tuple): What the session state depends on, e.g. the data version,
+                           the filters and the memoized results. None to measure the
+                           state on every run.
+
+    Returns:
+        dict: The shared, view and session state sizes, in bytes.
+    """
+    state = {
+        key: value
+        for key, value in st.session_state.items()
+        if key not in (MEMORY_STATE_KEY, MEASURED_STATE_KEY)
+    }
+    signature = (state_key, tuple(sorted(map(str, state))))
+    measured = st.session_state.get(MEASURED_STATE_KEY)
+    if state_key is None or measured is None or measured[0] != signature:
+        measured = (signature, object_bytes(state))
+        st.session_state[MEASURED_STATE_KEY] = measured
+
+    report = {
+        "shared_bytes": shared.attrs.get(MEMORY_ATTR, 0),
+        "view_bytes": owned_bytes(view, shared),
+        "state_bytes": measured[1],
+    }
+    report["session_bytes"] = report["view_bytes"] + report["state_bytes"]
+    st.session_state[MEMORY_STATE_KEY] = report
+    SESSION_BYTES.observe(report["session_bytes"])
+    logger.debug("Session memory: %s", report)
+    return report
@@ -0,0 +1,198 @@
+"""
+Load Test Module
+
+This module measures how many concurrent viewers one instance of the app can serve.
+It drives simulated sessions through the pages with Streamlit's headless app tester:
+each session lands on the Dashboard, changes the start date, picks a league, and
+switches to the Leagues and Odds pages. The sessions share the process, and so its
+caches, like the sessions of a server. Run it from the directory the app is served
+from, so the pages find their assets:
+
+    python src/loadtest.py --sessions 1 5 10 20 --source synthetic:50000
+
+For each number of sessions, it reports the rerun latency percentiles, the throughput
+and the growth of the resident memory of the process.
+"""
+
+import argparse
+import os
+import random
+import resource
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+from typing import Iterator
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = Path(__file__).resolve().parent
+APP_PATH = APP_DIR / "Dashboard.py"
+FLOW_PAGES = ["pages/1_🏆_Leagues.py", "pages/2_🎲_Odds.py"]
+SESSION_COUNTS = [1, 5, 10]
+FLOWS_PER_SESSION = 2
+LOAD_TEST_SOURCE = "synthetic:50000"
+RERUN_TIMEOUT = 120  # Seconds, generous since reruns queue up under load
+PERCENTILES = [50, 95, 99]
+
+
+def rss_bytes() -> int:
+    """
+    Measure the resident memory of the process.
+
+    Returns:
+        int: The current resident set size on Linux, the peak one elsewhere, in bytes.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@contextmanager
+def shared_runtime() -> Iterator[None]:
+    """
+    Share one mock Streamlit runtime between the concurrent sessions.
+
+    The app tester installs a mock runtime for each run and removes it when the run
+    ends, which breaks the runs of the other sessions still going on.
+
+    Yields:
+        None: While the sessions can run concurrently.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import (
+        MemoryCacheStorageManager,
+    )
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    with patch.object(Runtime, "instance", return_value=runtime):
+        yield
+
+
+def timed_run(app, latencies: list) -> None:
+    """
+    Rerun the script of a session, recording the latency and raising its exceptions.
+
+    Args:
+        app (AppTest): The session.
+        latencies (list): The latencies of the session, in seconds.
+    """
+    start = time.perf_counter()
+    app.run(timeout=RERUN_TIMEOUT)
+    latencies.append(time.perf_counter() - start)
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+
+
+def run_session(seed: int, flows: int = FLOWS_PER_SESSION) -> dict:
+    """
+    Drive a simulated session through the pages.
+
+    Args:
+        seed (int): The seed of the random choices of the session.
+        flows (int): The number of times the session goes through the pages.
+
+    Returns:
+        dict: The rerun latencies, the number of errors and the memory report of the
+              session.
+    """
+    # Imported here, so the ledger source is configured before the app modules load
+    from streamlit.testing.v1 import AppTest
+
+    from commons import START_DATE_KEY
+    from instrumentation import MEMORY_STATE_KEY
+
+    rng = random.Random(seed)
+    latencies, errors, memory = [], 0, {}
+    for _ in range(flows):
+        try:
+            app = AppTest.from_file(str(APP_PATH), default_timeout=RERUN_TIMEOUT)
+            timed_run(app, latencies)
+
+            start_date = app.date_input(key=START_DATE_KEY)
+            start_date.set_value(start_date.value - timedelta(weeks=rng.randint(4, 26)))
+            timed_run(app, latencies)
+
+            leagues = next(
+                widget for widget in app.multiselect if widget.label == "**League**"
+            )
+            leagues.select(rng.choice(leagues.options))
+            timed_run(app, latencies)
+
+            for page in FLOW_PAGES:
+                app.switch_page(page)
+                timed_run(app, latencies)
+            memory = app.session_state[MEMORY_STATE_KEY]
+        except Exception:
+            errors += 1
+    return {"latencies": latencies, "errors": errors, "memory": memory}
+
+
+def run_load(sessions: int, flows: int = FLOWS_PER_SESSION) -> dict:
+    """
+    Run concurrent sessions and summarize their latencies and memory.
+
+    Args:
+        sessions (int): The number of concurrent sessions.
+        flows (int): The number of times each session goes through the pages.
+
+    Returns:
+        dict: The statistics of the run.
+    """
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    with shared_runtime(), ThreadPoolExecutor(max_workers=sessions) as pool:
+        results = list(pool.map(run_session, range(sessions), [flows] * sessions))
+    elapsed = time.perf_counter() - start
+    rss_growth = rss_bytes() - rss_before
+
+    latencies = np.concatenate([result["latencies"] for result in results]) * 1000
+    session_bytes = [result["memory"].get("session_bytes", 0) for result in results]
+    stats = {
+        "Sessions": sessions,
+        "Reruns": len(latencies),
+        "Errors": sum(result["errors"] for result in results),
+    }
+    for percentile in PERCENTILES:
+        stats[f"p{percentile} (ms)"] = (
+            np.percentile(latencies, percentile) if len(latencies) else np.nan
+        )
+    stats["Reruns/s"] = len(latencies) / elapsed
+    stats["RSS Growth (MB)"] = rss_growth / 2**20
+    stats["RSS/Session (MB)"] = rss_growth / sessions / 2**20
+    stats["Session Overhead (MB)"] = np.mean(session_bytes) / 2**20
+    return stats
+
+
+def main() -> None:
+    """Load test the app with increasing numbers of sessions, and print the report."""
+    parser = argparse.ArgumentParser(description="Load test the Streamlit pages.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=SESSION_COUNTS)
+    parser.add_argument("--flows", type=int, default=FLOWS_PER_SESSION)
+    parser.add_argument("--source", default=LOAD_TEST_SOURCE, help="Ledger source")
+    args = parser.parse_args()
+
+    os.environ["LEDGER_SOURCE"] = args.source
+    os.environ.pop("LEDGERS", None)
+
+    # A first session loads the ledger and fills the caches
+    warmup = run_session(seed=-1, flows=1)
+    print(f"Warm-up: {sum(warmup['latencies']):.2f}s, {warmup['errors']} errors")
+
+    report = pd.DataFrame(
+        [run_load(sessions, args.flows) for sessions in args.sessions]
+    )
+    print(report.to_string(index=False, float_format="{:.1f}".format))
+
+
+if __name__ == "__main__":
+    main()
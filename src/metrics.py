@@ -0,0 +1,525 @@
+"""
+Metrics Module
+
+This module keeps the operational metrics of the app process in an in-process registry
+of counters, gauges and histograms: how long the ledger reads and the processing take,
+how often the caches hit, miss, evict and expire, how many sessions are active and how
+long each page takes to render. The registry is served in the Prometheus text format on
+a local endpoint, started with the first page run:
+
+    curl localhost:9464/metrics
+
+Set `METRICS_PORT` to serve it on another port.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator, Optional
+from urllib.parse import urlsplit
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 9464))
+METRICS_PATH = "/metrics"
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = tuple(2**power for power in range(16, 31, 2))  # 64KB to 1GB
+ACTIVE_SESSION_WINDOW = 5 * 60  # Seconds since its last run a session counts as active
+RENDER_STATE_KEY = "render_started"
+TRACKED_KEYS = 4096  # Recently missed cache keys remembered, to spot recomputations
+
+logger = logging.getLogger(__name__)
+
+
+def escape_label(value) -> str:
+    """
+    Escape a label value for the Prometheus text format.
+
+    Args:
+        value: The label value.
+
+    Returns:
+        str: The value, with backslashes, quotes and newlines escaped.
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value: float) -> str:
+    """
+    Format a number for the Prometheus text format.
+
+    Args:
+        value (float): The number.
+
+    Returns:
+        str: The number, with infinities written '+Inf' and '-Inf'.
+    """
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def format_sample(name: str, labels: dict, value: float) -> str:
+    """
+    Format a sample line of the Prometheus text format.
+
+    Args:
+        name (str): The name of the sample.
+        labels (dict): The labels of the sample.
+        value (float): The value of the sample.
+
+    Returns:
+        str: The sample line, e.g. 'ledger_rows{ledger="Main"} 1200'.
+    """
+    if labels:
+        pairs = ",".join(
+            f'{key}="{escape_label(item)}"' for key, item in labels.items()
+        )
+        name = f"{name}{{{pairs}}}"
+    return f"{name} {format_value(value)}"
+
+
+class Metric:
+    """A named family of samples, one per combination of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def key(self, labels: dict) -> tuple:
+        """
+        Get the label values of a sample, in the order of the label names.
+
+        Args:
+            labels (dict): The label values, by name.
+
+        Returns:
+            tuple: The label values.
+
+        Raises:
+            ValueError: If the labels don't match the label names of the metric.
+        """
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects the labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[tuple]:
+        """
+        List the samples of the metric.
+
+        Yields:
+            tuple: The name, labels and value of each sample.
+        """
+        with self.lock:
+            values = dict(self.values)
+        for key, value in sorted(values.items()):
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+    def render(self) -> str:
+        """
+        Render the metric in the Prometheus text format.
+
+        Returns:
+            str: The help and type lines, followed by the sample lines.
+        """
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines += [format_sample(*sample) for sample in self.samples()]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """A count that only goes up, e.g. of cache misses."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """
+        Increase the count.
+
+        Args:
+            amount (float): The increase, not negative.
+            **labels: The label values of the sample.
+        """
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that goes up and down, set directly or read from a function."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple = (),
+        function: Optional[Callable[[], dict]] = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def set(self, value: float, **labels) -> None:
+        """
+        Set the value.
+
+        Args:
+            value (float): The new value.
+            **labels: The label values of the sample.
+        """
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def samples(self) -> Iterator[tuple]:
+        """
+        List the samples of the gauge, reading them from its function if it has one.
+
+        Yields:
+            tuple: The name, labels and value of each sample.
+        """
+        if self.function is None:
+            yield from super().samples()
+            return
+        for key, value in sorted(self.function().items()):
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Histogram(Metric):
+    """A distribution of observations, counted in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple = (),
+        buckets: tuple = DURATION_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        Record an observation.
+
+        Args:
+            value (float): The observed value, e.g. a duration in seconds.
+            **labels: The label values of the sample.
+        """
+        key = self.key(labels)
+        with self.lock:
+            counts, total = self.values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self.values[key] = (counts, total + value)
+
+    def samples(self) -> Iterator[tuple]:
+        """
+        List the cumulative bucket counts, the sum and the count of the histogram.
+
+        Yields:
+            tuple: The name, labels and value of each sample.
+        """
+        with self.lock:
+            values = {
+                key: (list(counts), total)
+                for key, (counts, total) in self.values.items()
+            }
+        for key, (counts, total) in sorted(values.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bucket = {**labels, "le": format_value(float(bound))}
+                yield f"{self.name}_bucket", bucket, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Registry:
+    """The metrics of the process, by name."""
+
+    def __init__(self) -> None:
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Add a metric to the registry.
+
+        Args:
+            metric (Metric): The metric.
+
+        Returns:
+            Metric: The metric, so it can be registered where it is defined.
+
+        Raises:
+            ValueError: If a metric with the same name is already registered.
+        """
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"The metric {metric.name} is already registered")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text format.
+
+        Returns:
+            str: The exposition of the registry.
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+# The time of the last miss of the recently missed cache keys, oldest first, and of
+# the last run of the sessions, to derive evictions, expiries and active sessions
+cached_keys = OrderedDict()
+session_runs = {}
+tracking_lock = threading.Lock()
+local = threading.local()
+
+
+def count_active_sessions() -> dict:
+    """
+    Count the sessions that ran a page within the activity window.
+
+    Returns:
+        dict: The number of active sessions, under no labels.
+    """
+    cutoff = time.monotonic() - ACTIVE_SESSION_WINDOW
+    with tracking_lock:
+        for session_id in [key for key, at in session_runs.items() if at < cutoff]:
+            del session_runs[session_id]
+        return {(): len(session_runs)}
+
+
+FETCH_SECONDS = REGISTRY.register(
+    Histogram(
+        "ledger_fetch_seconds",
+        "Duration of the ledger reads that missed the cache.",
+        ("loader",),
+    )
+)
+PROCESS_SECONDS = REGISTRY.register(
+    Histogram(
+        "ledger_process_seconds",
+        "Duration of the processing of a ledger version.",
+        ("ledger", "pending"),
+    )
+)
+CACHE_HITS = REGISTRY.register(
+    Counter("cache_hits_total", "Cached calls served from the cache.", ("cache",))
+)
+CACHE_MISSES = REGISTRY.register(
+    Counter("cache_misses_total", "Cached calls that had to compute.", ("cache",))
+)
+CACHE_EVICTIONS = REGISTRY.register(
+    Counter(
+        "cache_evictions_total",
+        "Misses on arguments cached before, which were evicted.",
+        ("cache",),
+    )
+)
+CACHE_EXPIRIES = REGISTRY.register(
+    Counter(
+        "cache_expiries_total",
+        "Misses on arguments cached before, which outlived their TTL.",
+        ("cache",),
+    )
+)
+LEDGER_ROWS = REGISTRY.register(
+    Gauge("ledger_rows", "Rows of the processed ledger.", ("ledger", "pending"))
+)
+QUARANTINED_ROWS = REGISTRY.register(
+    Gauge(
+        "ledger_quarantined_rows",
+        "Rows of the ledger that failed validation and are left out.",
+        ("ledger", "pending"),
+    )
+)
+LEDGER_BYTES = REGISTRY.register(
+    Gauge(
+        "ledger_memory_bytes",
+        "Memory of the processed ledger shared by the sessions.",
+        ("ledger", "pending"),
+    )
+)
+SHEETS_REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "sheets_request_seconds",
+        "Duration of the Google Sheets requests, including their retries.",
+        ("outcome",),
+    )
+)
+CIRCUIT_OPEN = REGISTRY.register(
+    Gauge("sheets_circuit_open", "1 while the Google Sheets circuit is not closed.")
+)
+ACTIVE_SESSIONS = REGISTRY.register(
+    Gauge(
+        "active_sessions",
+        f"Sessions that ran a page in the last {ACTIVE_SESSION_WINDOW} seconds.",
+        function=count_active_sessions,
+    )
+)
+SESSION_BYTES = REGISTRY.register(
+    Histogram(
+        "session_memory_bytes",
+        "Memory a session adds on top of the shared ledger, per run.",
+        buckets=BYTES_BUCKETS,
+    )
+)
+PAGE_RENDER_SECONDS = REGISTRY.register(
+    Histogram("page_render_seconds", "Duration of the page runs.", ("page",))
+)
+
+
+def record_cache_miss(cache: str, *args, ttl: Optional[float] = None) -> None:
+    """
+    Record a cache miss, from the body of a cached function, which only runs on one.
+
+    A miss on arguments missed before was either evicted or, when the cache has a TTL
+    and it has passed since their previous miss, expired. Only the `TRACKED_KEYS` most
+    recently missed arguments are remembered.
+
+    Args:
+        cache (str): The name of the cache, usually of the cached function.
+        *args: The hashable arguments keying the call.
+        ttl (Optional[float]): The seconds the cache keeps a result, None if forever.
+    """
+    local.missed = True
+    key, now = (cache, args), time.monotonic()
+    with tracking_lock:
+        missed_at = cached_keys.pop(key, None)
+        cached_keys[key] = now
+        while len(cached_keys) > TRACKED_KEYS:
+            cached_keys.popitem(last=False)
+    CACHE_MISSES.inc(cache=cache)
+    if missed_at is None:
+        return
+    if ttl is not None and now - missed_at >= ttl:
+        CACHE_EXPIRIES.inc(cache=cache)
+    else:
+        CACHE_EVICTIONS.inc(cache=cache)
+
+
+@contextmanager
+def track_cache(
+    cache: str, durations: Optional[Histogram] = FETCH_SECONDS
+) -> Iterator[None]:
+    """
+    Record whether a cached call hit the cache, and the duration of a miss.
+
+    The cached function must call `record_cache_miss` in its body.
+
+    Args:
+        cache (str): The name of the cache.
+        durations (Optional[Histogram]): The histogram of the durations of the misses,
+                                         by loader, or None to skip them.
+
+    Yields:
+        None: While the cached function is called.
+    """
+    local.missed = False
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if not local.missed:
+            CACHE_HITS.inc(cache=cache)
+        elif durations is not None:
+            durations.observe(time.perf_counter() - start, loader=cache)
+
+
+def start_page_render(page: str) -> None:
+    """
+    Record the start of a page run, and the session running it as active.
+
+    Args:
+        page (str): The title of the page.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        with tracking_lock:
+            session_runs[ctx.session_id] = time.monotonic()
+    st.session_state[RENDER_STATE_KEY] = (page, time.perf_counter())
+
+
+def record_page_render() -> None:
+    """Record the duration of the current page run, from `start_page_render` on."""
+    if RENDER_STATE_KEY in st.session_state:
+        page, start = st.session_state[RENDER_STATE_KEY]
+        PAGE_RENDER_SECONDS.observe(time.perf_counter() - start, page=page)
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serve the metrics registry in the Prometheus text format."""
+
+    registry: Registry = REGISTRY
+
+    def do_GET(self) -> None:  # noqa: N802
+        """Serve the exposition of the registry."""
+        if urlsplit(self.path).path.rstrip("/") != METRICS_PATH:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        body = self.registry.render().encode()
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", METRICS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        """Skip the per-scrape access log."""
+
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_server(
+    host: str = METRICS_HOST, port: int = METRICS_PORT
+) -> Optional[ThreadingHTTPServer]:
+    """
+    Serve the metrics endpoint in a background thread, once per process.
+
+    Args:
+        host (str): The interface to listen on.
+        port (int): The port to listen on.
+
+    Returns:
+        Optional[ThreadingHTTPServer]: The server, None if the port is taken, e.g. by
+                                       another app process.
+    """
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    except OSError as e:
+        logger.warning("The metrics endpoint is not served: %s", e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info("Serving metrics on http://%s:%d%s", host, port, METRICS_PATH)
+    return server
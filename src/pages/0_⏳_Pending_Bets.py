@@ -1,8 +1,23 @@
 import pandas as pd
 import streamlit as st
 
-from commons import DOUBLE_VERTICAL_SPACE, render_horizontal_line, setup_and_load_bets
+from commons import (
+    DOUBLE_VERTICAL_SPACE,
+    LEDGER_COLUMN_CONFIG,
+    SINGLE_VERTICAL_SPACE,
+    get_data_version,
+    render_horizontal_line,
+    setup_and_load_bets,
+)
+from exposure import (
+    EXPOSURE_DIMENSIONS,
+    EXPOSURE_LABELS,
+    ExposureBook,
+    get_exposure_book,
+)
+from metrics import record_page_render
 from sidebar import render_sidebar
+from validation import get_quarantine_report, render_quarantine_report
 
 PAGE_NAME = "Pending Bets"
 MISSING_DATA_MESSAGE = (
@@ -10,6 +25,58 @@ MISSING_DATA_MESSAGE = (
 )
 
 
+def render_exposure_metrics(book: ExposureBook) -> None:
+    """
+    Display the open exposure of the pending bets.
+
+    Args:
+        book (ExposureBook): The exposure book of the pending bets.
+    """
+    st.write("### Open Exposure")
+    st.markdown(SINGLE_VERTICAL_SPACE, unsafe_allow_html=True)
+
+    summary = book.summary()
+    cols = st.columns(4)
+    metrics_labels = [
+        "Open Bets",
+        "Units at Risk",
+        "Worst Case (Units)",
+        "Best Case (Units)",
+    ]
+    metrics_values = [
+        summary["open_bets"],
+        summary["total_wager"],
+        summary["worst_case"],
+        summary["best_case"],
+    ]
+
+    for col, label, value in zip(cols, metrics_labels, metrics_values):
+        col.metric(label, value)
+
+    st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
+
+
+def render_exposure_tables(book: ExposureBook) -> None:
+    """
+    Display the open exposure by League, Team and date.
+
+    Args:
+        book (ExposureBook): The exposure book of the pending bets.
+    """
+    st.write("### Exposure Breakdown")
+    tabs = st.tabs([f"By {dimension}" for dimension in EXPOSURE_DIMENSIONS])
+
+    for tab, dimension in zip(tabs, EXPOSURE_DIMENSIONS):
+        tab.dataframe(
+            book.by(dimension).rename(columns=EXPOSURE_LABELS),
+            hide_index=True,
+            use_container_width=True,
+            column_config=LEDGER_COLUMN_CONFIG,
+        )
+
+    st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
+
+
 def render_pending_bets_df(pending_bets_df: pd.DataFrame) -> None:
     """
     Display the pending bets in a DataFrame.
@@ -21,9 +88,12 @@ def render_pending_bets_df(pending_bets_df: pd.DataFrame) -> None:
         st.write("No pending bets to display.")
     else:
         st.write("### Pending Bets")
-        pending_bets_df["Date"] = pending_bets_df["Date"].dt.date
-        pending_bets_df = pending_bets_df.sort_values(by="Date", ascending=False)
-        st.dataframe(pending_bets_df, hide_index=True, use_container_width=True)
+        st.dataframe(
+            pending_bets_df.sort_values(by="Date", ascending=False),
+            hide_index=True,
+            use_container_width=True,
+            column_config=LEDGER_COLUMN_CONFIG,
+        )
         st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
 
 
@@ -38,9 +108,17 @@ def main() -> None:
         st.error(MISSING_DATA_MESSAGE)
     else:
         filtered_bets_df = render_sidebar(all_bets_df, pending=True)
+        exposure_book = get_exposure_book(filtered_bets_df)
+        render_exposure_metrics(exposure_book)
+        render_exposure_tables(exposure_book)
         render_pending_bets_df(filtered_bets_df)
+        render_quarantine_report(
+            get_quarantine_report(get_data_version(all_bets_df), pending=True)
+        )
         render_horizontal_line()
 
+    record_page_render()
+
 
 if __name__ == "__main__":
     main()
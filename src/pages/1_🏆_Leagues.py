@@ -1,176 +1,81 @@
 import pandas as pd
-import plotly.express as px
 import streamlit as st
-
+from plotly.graph_objects import Figure
+
+from analytics import add_error_bars, load_group_intervals
+from charts import (
+    create_profit_bar,
+    create_roi_bar,
+    create_share_pie,
+    create_winrate_bar,
+)
 from commons import (
-    BLUE_COLOR,
     DOUBLE_VERTICAL_SPACE,
-    GREEN_COLOR,
-    RED_COLOR,
+    get_data_version,
+    memoize_in_session,
     render_horizontal_line,
+    render_section_selector,
     setup_and_load_bets,
 )
-from sidebar import render_sidebar
+from compute import aggregate_by, load_or_compute
+from metrics import record_page_render
+from sidebar import get_filters_key, render_sidebar
 
 PAGE_NAME = "Stats by League"
+SECTIONS = ["Bets Percentage", "Profit", "Winrate", "ROI"]
+SECTION_KEY = "league_section"
 
 
-def plot_bet_number_percentage(data: pd.DataFrame) -> None:
-    """
-    Plot a pie chart of bet number percentage by league.
-
-    Args:
-        data (pd.DataFrame): The data frame containing the bets ledger.
+def build_section_figure(
+    section: str, data: pd.DataFrame, filtered_data: pd.DataFrame
+) -> Figure:
     """
-    st.write("### Bets Percentage by League")
-    bet_counts = data["League"].value_counts().reset_index()
-    bet_counts.columns = ["League", "Bets Count"]
-    bet_counts = bet_counts.sort_values("League")  # Sort alphabetically
-
-    fig = px.pie(
-        bet_counts,
-        values="Bets Count",
-        names="League",
-    )
-    fig.update_layout(
-        yaxis=dict(autorange="reversed"),
-        showlegend=True,
-        autosize=True,
-        legend=dict(orientation="v", x=1.1, y=0.5),
-    )
-
-    st.plotly_chart(fig, use_container_width=True)
-    st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
+    Aggregate the bets by league and build the chart of a section of the page.
 
-
-def plot_profit_by_league(data: pd.DataFrame) -> None:
-    """
-    Plot profit by league.
+    The bootstrap confidence intervals are only computed for the sections showing
+    them as error bars.
 
     Args:
-        data (pd.DataFrame): The data frame containing the bets ledger.
-    """
-    st.write("### Profit by League")
-    profit_by_league = (
-        data.groupby("League")
-        .agg({"Profit": "sum"})
-        .reset_index()
-        .assign(
-            Bets_Count=lambda df: data["League"]
-            .value_counts()
-            .reindex(df["League"])
-            .values,
-            Profit=lambda df: df["Profit"].round(2),
-        )
-        .sort_values("League")
-    )
+        section (str): One of `SECTIONS`.
+        data (pd.DataFrame): The bets ledger the page loaded, before the filters.
+        filtered_data (pd.DataFrame): The bets kept by the sidebar filters.
 
-    fig = px.bar(
-        profit_by_league,
-        x="Profit",
-        y="League",
-        orientation="h",
-        labels={"League": "", "Profit": "Profit (Units)"},
-        color=profit_by_league["Profit"].apply(
-            lambda x: GREEN_COLOR if x > 0 else RED_COLOR
-        ),
-        color_discrete_map={GREEN_COLOR: GREEN_COLOR, RED_COLOR: RED_COLOR},
-        text="Profit",
-        hover_data={"Profit": False, "Bets_Count": True, "League": False},
-    )
-    fig.update_traces(
-        texttemplate="%{text}",
-        textposition="outside",
-        marker={"line": {"width": 1, "color": "DarkSlateGrey"}},
-    )
-    fig.update_layout(showlegend=False, yaxis=dict(autorange="reversed"))
-    st.plotly_chart(fig, use_container_width=True)
-    st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
-
-
-def plot_winrate_by_league(data: pd.DataFrame) -> None:
-    """
-    Plot winrate by league.
-
-    Args:
-        data (pd.DataFrame): The data frame containing the bets ledger.
+    Returns:
+        Figure: The chart of the section.
     """
-    st.write("### Winrate by League")
-    winrate_by_league = (
-        data.assign(Win=lambda df: df["Result"].apply(lambda x: 1 if x == "W" else 0))
-        .groupby("League")
-        .agg({"Win": "mean"})
-        .reset_index()
-        .assign(
-            Bets_Count=lambda df: data["League"]
-            .value_counts()
-            .reindex(df["League"])
-            .values,
-            Winrate=lambda df: (df["Win"] * 100).round(2),
-        )
-        .sort_values("League")
-    )
-
-    fig = px.bar(
-        winrate_by_league,
-        x="Winrate",
-        y="League",
-        orientation="h",
-        labels={"League": "", "Winrate": "Winrate %"},
-        color_discrete_sequence=[BLUE_COLOR],  # Darker blue for winrate
-        text="Winrate",
-        hover_data={"Winrate": False, "Bets_Count": True, "League": False},
+    league_stats = load_or_compute(
+        data, "league", aggregate_by, filtered_data, "League"
     )
-    fig.update_traces(
-        texttemplate="%{text}%",
-        textposition="outside",
-        marker={"line": {"width": 1, "color": "DarkSlateGrey"}},
+    if section == "Bets Percentage":
+        return create_share_pie(league_stats, "League")
+    if section == "Profit":
+        return create_profit_bar(league_stats, "League")
+
+    league_intervals = load_or_compute(
+        data,
+        "league_intervals",
+        load_group_intervals,
+        filtered_data,
+        get_data_version(filtered_data),
+        get_filters_key(),
+        "League",
     )
-    fig.update_layout(showlegend=False, yaxis=dict(autorange="reversed"))
-    st.plotly_chart(fig, use_container_width=True)
-    st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
+    stats = add_error_bars(league_stats, league_intervals, "League", section)
+    if section == "Winrate":
+        return create_winrate_bar(stats, "League")
+    return create_roi_bar(stats, "League")
 
 
-def plot_roi_by_league(data: pd.DataFrame) -> None:
+def plot_section(section: str, figure: Figure) -> None:
     """
-    Plot ROI by league.
+    Plot the chart of a section of the page.
 
     Args:
-        data (pd.DataFrame): The data frame containing the bets ledger.
+        section (str): One of `SECTIONS`.
+        figure (Figure): The chart of the section.
     """
-    st.write("### ROI by League")
-    roi_by_league = (
-        data.groupby("League")
-        .agg({"Profit": "sum", "Wager": "sum"})
-        .reset_index()
-        .assign(
-            Bets_Count=lambda df: data["League"]
-            .value_counts()
-            .reindex(df["League"])
-            .values,
-            ROI=lambda df: (df["Profit"] / df["Wager"] * 100).round(2),
-        )
-        .sort_values("League")
-    )
-
-    fig = px.bar(
-        roi_by_league,
-        x="ROI",
-        y="League",
-        orientation="h",
-        labels={"League": "", "ROI": "ROI %"},
-        color=roi_by_league["ROI"].apply(lambda x: GREEN_COLOR if x > 0 else RED_COLOR),
-        color_discrete_map={GREEN_COLOR: GREEN_COLOR, RED_COLOR: RED_COLOR},
-        text="ROI",
-        hover_data={"Bets_Count": True},
-    )
-    fig.update_traces(
-        texttemplate="%{text}%",
-        textposition="outside",
-        marker={"line": {"width": 1, "color": "DarkSlateGrey"}},
-    )
-    fig.update_layout(showlegend=False, yaxis=dict(autorange="reversed"))
-    st.plotly_chart(fig, use_container_width=True)
+    st.write(f"### {section} by League")
+    st.plotly_chart(figure, use_container_width=True)
     st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
 
 
@@ -180,11 +85,19 @@ if __name__ == "__main__":
     if not data.empty:
         filtered_data = render_sidebar(data)
 
-        plot_bet_number_percentage(filtered_data)
-        plot_profit_by_league(filtered_data)
-        plot_winrate_by_league(filtered_data)
-        plot_roi_by_league(filtered_data)
+        section = render_section_selector(SECTIONS, SECTION_KEY)
+        figure = memoize_in_session(
+            f"{PAGE_NAME}/{section}",
+            (get_data_version(filtered_data), get_filters_key()),
+            build_section_figure,
+            section,
+            data,
+            filtered_data,
+        )
+        plot_section(section, figure)
 
         render_horizontal_line()
     else:
         st.error("Failed to load data. Please check the data source.")
+
+    record_page_render()
@@ -1,216 +1,184 @@
 import pandas as pd
-import plotly.express as px
 import streamlit as st
-
+from plotly.graph_objects import Figure
+
+from charts import (
+    create_calibration_chart,
+    create_profit_bar,
+    create_roi_bar,
+    create_share_pie,
+    create_winrate_bar,
+)
 from commons import (
-    BLUE_COLOR,
     DOUBLE_VERTICAL_SPACE,
-    GREEN_COLOR,
-    RED_COLOR,
+    ODDS_GROUP_STR,
+    SINGLE_VERTICAL_SPACE,
+    get_data_version,
+    memoize_in_session,
     render_horizontal_line,
+    render_section_selector,
     setup_and_load_bets,
 )
-from sidebar import render_sidebar
+from compute import (
+    aggregate_by_odds_group,
+    calculate_calibration,
+    calculate_calibration_totals,
+    load_or_compute,
+)
+from metrics import record_page_render
+from sidebar import get_filters_key, render_sidebar
 
-ODDS_GROUP_STR = "Odds Group"
 PAGE_NAME = "Stats by Odds"
-
-
-def group_odds(odds: float) -> str:
+SECTION_CHARTS = {
+    "Bets Percentage": create_share_pie,
+    "Profit": create_profit_bar,
+    "Winrate": create_winrate_bar,
+    "ROI": create_roi_bar,
+}
+CALIBRATION_SECTION = "Calibration"
+SECTIONS = [*SECTION_CHARTS, CALIBRATION_SECTION]
+SECTION_KEY = "odds_section"
+# Dimension: name of its calibration artifact
+CALIBRATION_DIMENSIONS = {
+    ODDS_GROUP_STR: "calibration_odds",
+    "League": "calibration_league",
+    "Type": "calibration_type",
+}
+
+
+def build_section_figure(
+    section: str, data: pd.DataFrame, filtered_data: pd.DataFrame
+) -> Figure:
     """
-    Group odds into specified ranges.
+    Aggregate the bets by odds group and build the chart of a section of the page.
 
     Args:
-        odds (float): The odds value to be grouped.
+        section (str): One of `SECTIONS`.
+        data (pd.DataFrame): The bets ledger the page loaded, before the filters.
+        filtered_data (pd.DataFrame): The bets kept by the sidebar filters.
 
     Returns:
-        str: The odds group as a string.
+        Figure: The chart of the section.
     """
-    if odds < 1.5:
-        return "1.00 - 1.49"
-    elif odds < 2.0:
-        return "1.50 - 1.99"
-    elif odds < 2.5:
-        return "2.00 - 2.49"
-    elif odds < 3.0:
-        return "2.50 - 2.99"
-    else:
-        return ">= 3.00"
+    odds_stats = load_or_compute(data, "odds", aggregate_by_odds_group, filtered_data)
+    return SECTION_CHARTS[section](odds_stats, ODDS_GROUP_STR)
 
 
-def plot_bet_number_percentage(data: pd.DataFrame) -> None:
+def plot_section(section: str, figure: Figure) -> None:
     """
-    Plot a pie chart of bet number percentage by odds group.
+    Plot the chart of a section of the page.
 
     Args:
-        data (pd.DataFrame): The data frame containing the bets ledger.
+        section (str): One of `SECTIONS`.
+        figure (Figure): The chart of the section.
     """
-    st.write("### Bets Percentage by Odds Group")
-    bet_counts = data[ODDS_GROUP_STR].value_counts().reset_index()
-    bet_counts.columns = [ODDS_GROUP_STR, "Bets Count"]
-    bet_counts = bet_counts.sort_values(ODDS_GROUP_STR)
-
-    fig = px.pie(
-        bet_counts,
-        values="Bets Count",
-        names=ODDS_GROUP_STR,
-    )
-
-    fig.update_layout(
-        yaxis=dict(autorange="reversed"),
-        showlegend=True,
-        autosize=True,
-        legend=dict(orientation="v", x=1.1, y=0.5),
-    )
-
-    st.plotly_chart(fig, use_container_width=True)
+    st.write(f"### {section} by Odds Group")
+    st.plotly_chart(figure, use_container_width=True)
     st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
 
 
-def plot_profit_by_odds(data: pd.DataFrame) -> None:
+def render_calibration_metrics(totals: dict) -> None:
     """
-    Plot profit by odds group.
+    Display the overall implied and actual winrates, Brier score and expected value.
 
     Args:
-        data (pd.DataFrame): The data frame containing the bets ledger.
+        totals (dict): The calibration of all the filtered bets, as returned by
+                       `calculate_calibration_totals`.
     """
-    st.write("### Profit by Odds Group")
-    profit_by_odds = (
-        data.groupby(ODDS_GROUP_STR)
-        .agg({"Profit": "sum"})
-        .reset_index()
-        .assign(
-            Bets_Count=lambda df: data[ODDS_GROUP_STR]
-            .value_counts()
-            .reindex(df[ODDS_GROUP_STR])
-            .values,
-            Profit=lambda df: df["Profit"].round(2),
-        )
-        .sort_values(by=ODDS_GROUP_STR)
-    )
-
-    fig = px.bar(
-        profit_by_odds,
-        x="Profit",
-        y=ODDS_GROUP_STR,
-        orientation="h",
-        labels={ODDS_GROUP_STR: "", "Profit": "Profit (Units)"},
-        color=profit_by_odds["Profit"].apply(
-            lambda x: GREEN_COLOR if x > 0 else RED_COLOR
+    expected_value = totals["expected_value"]
+    metrics = {
+        "Implied Winrate %": f"{totals['implied_winrate']:.2f}%",
+        "Actual Winrate %": f"{totals['actual_winrate']:.2f}%",
+        "Brier Score": f"{totals['brier_score']:.4f}",
+        "EV at Closing (Units)": (
+            f"{expected_value:.2f}" if expected_value is not None else "n/a"
         ),
-        color_discrete_map={GREEN_COLOR: GREEN_COLOR, RED_COLOR: RED_COLOR},
-        text="Profit",
-        hover_data={"Profit": False, "Bets_Count": True, ODDS_GROUP_STR: False},
-    )
-    fig.update_traces(
-        texttemplate="%{text}",
-        textposition="outside",
-        marker={"line": {"width": 1, "color": "DarkSlateGrey"}},
-    )
-    fig.update_layout(showlegend=False, yaxis=dict(autorange="reversed"))
-    st.plotly_chart(fig, use_container_width=True)
-    st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
+    }
+    for col, (label, value) in zip(st.columns(len(metrics)), metrics.items()):
+        col.metric(label, value)
+    st.markdown(SINGLE_VERTICAL_SPACE, unsafe_allow_html=True)
 
 
-def plot_winrate_by_odds(data: pd.DataFrame) -> None:
+def build_calibration(
+    data: pd.DataFrame, filtered_data: pd.DataFrame, column: str
+) -> tuple:
     """
-    Plot winrate by odds group.
+    Calibrate the filtered bets, by group and over all of them.
 
     Args:
-        data (pd.DataFrame): The data frame containing the bets ledger.
-    """
-    st.write("### Winrate by Odds Group")
-    winrate_by_odds = (
-        data.assign(Win=lambda df: df["Result"].apply(lambda x: 1 if x == "W" else 0))
-        .groupby(ODDS_GROUP_STR)
-        .agg({"Win": "mean"})
-        .reset_index()
-        .assign(
-            Bets_Count=lambda df: data[ODDS_GROUP_STR]
-            .value_counts()
-            .reindex(df[ODDS_GROUP_STR])
-            .values,
-            Winrate=lambda df: (df["Win"] * 100).round(2),
-        )
-        .sort_values(by=ODDS_GROUP_STR)
-    )
+        data (pd.DataFrame): The bets ledger the page loaded, before the filters.
+        filtered_data (pd.DataFrame): The bets kept by the sidebar filters.
+        column (str): One of `CALIBRATION_DIMENSIONS`.
 
-    fig = px.bar(
-        winrate_by_odds,
-        x="Winrate",
-        y=ODDS_GROUP_STR,
-        orientation="h",
-        labels={ODDS_GROUP_STR: "", "Winrate": "Winrate %"},
-        color_discrete_sequence=[BLUE_COLOR],  # Darker blue for winrate
-        text="Winrate",
-        hover_data={"Winrate": False, "Bets_Count": True, ODDS_GROUP_STR: False},
+    Returns:
+        tuple: The calibration of each group and the calibration totals.
+    """
+    calibration = load_or_compute(
+        data,
+        CALIBRATION_DIMENSIONS[column],
+        calculate_calibration,
+        filtered_data,
+        column,
     )
-    fig.update_traces(
-        texttemplate="%{text}%",
-        textposition="outside",
-        marker={"line": {"width": 1, "color": "DarkSlateGrey"}},
+    totals = load_or_compute(
+        data, "calibration_totals", calculate_calibration_totals, filtered_data
     )
-    fig.update_layout(showlegend=False, yaxis=dict(autorange="reversed"))
-    st.plotly_chart(fig, use_container_width=True)
-    st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
+    return calibration, totals
 
 
-def plot_roi_by_odds(data: pd.DataFrame) -> None:
+def render_calibration(data: pd.DataFrame, filtered_data: pd.DataFrame) -> None:
     """
-    Plot ROI by odds group.
+    Display how well the odds predicted the results, by odds group, league or type.
 
     Args:
-        data (pd.DataFrame): The data frame containing the bets ledger.
+        data (pd.DataFrame): The bets ledger the page loaded, before the filters.
+        filtered_data (pd.DataFrame): The bets kept by the sidebar filters.
     """
-    st.write("### ROI by Odds Group")
-    roi_by_odds = (
-        data.groupby(ODDS_GROUP_STR)
-        .agg({"Profit": "sum", "Wager": "sum"})
-        .reset_index()
-        .assign(
-            Bets_Count=lambda df: data[ODDS_GROUP_STR]
-            .value_counts()
-            .reindex(df[ODDS_GROUP_STR])
-            .values,
-            ROI=lambda df: ((df["Profit"] / df["Wager"]) * 100).round(2),
-        )
-        .sort_values(by=ODDS_GROUP_STR)
+    if filtered_data.empty:
+        st.warning("No bets match the filters.")
+        return
+
+    column = st.selectbox("**Calibrate by**", list(CALIBRATION_DIMENSIONS))
+    calibration, totals = memoize_in_session(
+        f"{PAGE_NAME}/{CALIBRATION_SECTION}",
+        (get_data_version(filtered_data), get_filters_key(), column),
+        build_calibration,
+        data,
+        filtered_data,
+        column,
     )
 
-    fig = px.bar(
-        roi_by_odds,
-        x="ROI",
-        y=ODDS_GROUP_STR,
-        orientation="h",
-        labels={ODDS_GROUP_STR: "", "ROI": "ROI %"},
-        color=roi_by_odds["ROI"].apply(lambda x: GREEN_COLOR if x > 0 else RED_COLOR),
-        color_discrete_map={GREEN_COLOR: GREEN_COLOR, RED_COLOR: RED_COLOR},
-        text="ROI",
-        hover_data={"ROI": False, "Bets_Count": True, ODDS_GROUP_STR: False},
-    )
-    fig.update_traces(
-        texttemplate="%{text}%",
-        textposition="outside",
-        marker={"line": {"width": 1, "color": "DarkSlateGrey"}},
+    st.write(f"### Implied vs Actual Winrate by {column}")
+    render_calibration_metrics(totals)
+    st.plotly_chart(
+        create_calibration_chart(calibration, column), use_container_width=True
     )
-    fig.update_layout(showlegend=False, yaxis=dict(autorange="reversed"))
-    st.plotly_chart(fig, use_container_width=True)
+    st.dataframe(calibration, hide_index=True, use_container_width=True)
     st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
 
 
 if __name__ == "__main__":
-
     data = setup_and_load_bets(PAGE_NAME)
 
     if not data.empty:
         filtered_data = render_sidebar(data)
-        filtered_data[ODDS_GROUP_STR] = filtered_data["Odds"].apply(group_odds)
 
-        plot_bet_number_percentage(filtered_data)
-        plot_profit_by_odds(filtered_data)
-        plot_winrate_by_odds(filtered_data)
-        plot_roi_by_odds(filtered_data)
+        section = render_section_selector(SECTIONS, SECTION_KEY)
+        if section == CALIBRATION_SECTION:
+            render_calibration(data, filtered_data)
+        else:
+            figure = memoize_in_session(
+                f"{PAGE_NAME}/{section}",
+                (get_data_version(filtered_data), get_filters_key()),
+                build_section_figure,
+                section,
+                data,
+                filtered_data,
+            )
+            plot_section(section, figure)
 
         render_horizontal_line()
     else:
         st.error("Failed to load data. Please check the data source.")
+
+    record_page_render()
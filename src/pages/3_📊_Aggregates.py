@@ -1,126 +1,78 @@
 import pandas as pd
 import streamlit as st
 
-from commons import DOUBLE_VERTICAL_SPACE, render_horizontal_line, setup_and_load_bets
-from sidebar import render_sidebar
+from commons import (
+    DOUBLE_VERTICAL_SPACE,
+    get_data_version,
+    memoize_in_session,
+    render_horizontal_line,
+    render_section_selector,
+    setup_and_load_bets,
+)
+from compute import load_or_compute
+from metrics import record_page_render
+from pivots import PIVOT_TABLES, build_pivot, slice_pivot
+from sidebar import get_filters_key, render_sidebar
 
 PAGE_NAME = "Aggregates by League and Bet Type"
+NO_BREAKDOWN = "None"
+BREAKDOWN_OPTIONS = [NO_BREAKDOWN, "Team", "Month"]
+SECTION_KEY = "aggregates_section"
 
 
-def render_table(
-    data: pd.DataFrame,
-    values: str,
-    index: str,
-    columns: str,
-    aggfunc: str,
-    title: str,
-    round_digits: int = 2,
-) -> None:
+def render_breakdown_selector() -> list:
     """
-    General function to render a table using Streamlit, displaying aggregated data.
-
-    Args:
-        data (pd.DataFrame): The data frame containing the bets ledger.
-        values (str): The column to aggregate.
-        index (str): The column to group by for the rows.
-        columns (str): The column to group by for the columns.
-        aggfunc (str or function): The aggregation function (e.g., 'sum', 'mean', 'count').
-        title (str): The title of the table to display.
-        round_digits (int): The number of decimal places to round the results. Default is 2.
-    """
-    st.write(f"### {title}")
-    table = data.pivot_table(
-        values=values, index=index, columns=columns, aggfunc=aggfunc, fill_value=0
-    ).round(round_digits)
-    st.dataframe(table, use_container_width=True)
-    st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
-
+    Display a selector for an extra dimension to break the table rows down by.
 
-def render_profit_table(data: pd.DataFrame) -> None:
-    """
-    Render a table showing profit by bet type and league.
-
-    Args:
-        data (pd.DataFrame): The data frame containing the bets ledger.
+    Returns:
+        list: The selected extra dimensions, empty for none.
     """
-    render_table(
-        data,
-        values="Profit",
-        index="Type",
-        columns="League",
-        aggfunc="sum",
-        title="Profit (Units)",
-    )
+    breakdown = st.selectbox("**Break down by**", BREAKDOWN_OPTIONS)
+    return [] if breakdown == NO_BREAKDOWN else [breakdown]
 
 
-def render_bet_count_table(data: pd.DataFrame) -> None:
+def render_table(table: pd.DataFrame, title: str) -> None:
     """
-    Render a table showing the number of bets by bet type and league.
+    General function to render a table using Streamlit, displaying aggregated data.
 
     Args:
-        data (pd.DataFrame): The data frame containing the bets ledger.
+        table (pd.DataFrame): The aggregated table to display.
+        title (str): The title of the table to display.
     """
-    render_table(
-        data,
-        values="Date",
-        index="Type",
-        columns="League",
-        aggfunc="count",
-        title="Bets Count (#)",
-    )
+    st.write(f"### {title}")
+    st.dataframe(table, use_container_width=True)
+    st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
 
 
-def render_total_wager_table(data: pd.DataFrame) -> None:
+def load_pivot(
+    data: pd.DataFrame, filtered_data: pd.DataFrame, extra_dimensions: list
+) -> pd.DataFrame:
     """
-    Render a table showing the total wager by bet type and league.
+    Aggregate every measure of the tables in a single pass.
 
     Args:
-        data (pd.DataFrame): The data frame containing the bets ledger.
-    """
-    render_table(
-        data,
-        values="Wager",
-        index="Type",
-        columns="League",
-        aggfunc="sum",
-        title="Total Wager (Units)",
-    )
+        data (pd.DataFrame): The bets ledger the page loaded, before the filters.
+        filtered_data (pd.DataFrame): The bets kept by the sidebar filters.
+        extra_dimensions (list): The extra dimensions to break the rows down by.
 
-
-def render_average_odds_table(data: pd.DataFrame) -> None:
+    Returns:
+        pd.DataFrame: The multi-measure pivot, as returned by `build_pivot`.
     """
-    Render a table showing the average odds by bet type and league.
+    if extra_dimensions:
+        return build_pivot(filtered_data, extra_dimensions=extra_dimensions)
+    return load_or_compute(data, "pivot", build_pivot, filtered_data)
 
-    Args:
-        data (pd.DataFrame): The data frame containing the bets ledger.
-    """
-    render_table(
-        data,
-        values="Odds",
-        index="Type",
-        columns="League",
-        aggfunc="mean",
-        title="Average Bet Odds",
-    )
 
-
-def render_win_rate_table(data: pd.DataFrame) -> None:
+def render_pivot_table(pivot: pd.DataFrame, title: str) -> None:
     """
-    Render a table showing the win rate by bet type and league.
+    Render one of the profit, bets count, win rate, total wager and average odds tables.
 
     Args:
-        data (pd.DataFrame): The data frame containing the bets ledger.
+        pivot (pd.DataFrame): The multi-measure pivot, as returned by `build_pivot`.
+        title (str): One of the titles of `PIVOT_TABLES`.
     """
-    data = data.assign(Win=data["Result"].apply(lambda x: 1 if x == "W" else 0))
-    render_table(
-        data,
-        values="Win",
-        index="Type",
-        columns="League",
-        aggfunc="mean",
-        title="Win Rate (%)",
-        round_digits=2,
-    )
+    measures = {table_title: measure for measure, table_title in PIVOT_TABLES.items()}
+    render_table(slice_pivot(pivot, measures[title]), title)
 
 
 if __name__ == "__main__":
@@ -129,12 +81,20 @@ if __name__ == "__main__":
     if not data.empty:
         filtered_data = render_sidebar(data)
 
-        render_profit_table(filtered_data)
-        render_bet_count_table(filtered_data)
-        render_win_rate_table(filtered_data)
-        render_total_wager_table(filtered_data)
-        render_average_odds_table(filtered_data)
+        extra_dimensions = render_breakdown_selector()
+        section = render_section_selector(list(PIVOT_TABLES.values()), SECTION_KEY)
+        pivot = memoize_in_session(
+            PAGE_NAME,
+            (get_data_version(filtered_data), get_filters_key(), *extra_dimensions),
+            load_pivot,
+            data,
+            filtered_data,
+            extra_dimensions,
+        )
+        render_pivot_table(pivot, section)
 
         render_horizontal_line()
     else:
         st.error("Failed to load data. Please check the data source.")
+
+    record_page_render()
@@ -1,6 +1,7 @@
 import streamlit as st
 
 from commons import HORIZONTAL_LINE, SINGLE_VERTICAL_SPACE, setup
+from metrics import record_page_render
 
 # Constants for Referral Program
 REFERRAL_LINK = "https://thunderpick.io?r=ORACLE_BETS"
@@ -65,6 +66,7 @@ def main():
     """
     setup(TITLE_TEXT)
     render_expanded_referral_page()
+    record_page_render()
 
 
 if __name__ == "__main__":
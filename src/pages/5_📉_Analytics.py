@@ -0,0 +1,177 @@
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from analytics import calculate_risk_metrics, calculate_risk_series
+from commons import (
+    BLUE_COLOR,
+    DOUBLE_VERTICAL_SPACE,
+    RED_COLOR,
+    SINGLE_VERTICAL_SPACE,
+    render_horizontal_line,
+    setup_and_load_bets,
+)
+from metrics import record_page_render
+from sidebar import render_sidebar
+
+PAGE_NAME = "Risk Analytics"
+DEFAULT_WINDOW = 50
+MIN_WINDOW = 10
+MAX_WINDOW = 500
+
+
+def render_window_selector() -> int:
+    """
+    Display a slider for the number of bets in the rolling ROI window.
+
+    Returns:
+        int: The selected window size.
+    """
+    return st.slider(
+        "**Rolling window (bets)**",
+        min_value=MIN_WINDOW,
+        max_value=MAX_WINDOW,
+        value=DEFAULT_WINDOW,
+        step=10,
+    )
+
+
+def render_risk_metrics(metrics: pd.DataFrame, window: int) -> None:
+    """
+    Display the drawdown, streak and rolling ROI metrics of the filtered ledger.
+
+    Args:
+        metrics (pd.DataFrame): The risk metrics of the whole ledger, as a single row.
+        window (int): The number of bets in the rolling ROI window.
+    """
+    st.write("### Overview")
+    st.markdown(SINGLE_VERTICAL_SPACE, unsafe_allow_html=True)
+
+    overall = metrics.iloc[0]
+    rolling_roi = overall["Rolling ROI"]
+    cols = st.columns(6)
+    metrics_labels = [
+        "Max Drawdown (Units)",
+        "Current Drawdown (Units)",
+        "Longest Win Streak",
+        "Longest Loss Streak",
+        "Current Streak",
+        f"ROI Last {window} Bets %",
+    ]
+    metrics_values = [
+        overall["Max Drawdown"],
+        overall["Current Drawdown"],
+        overall["Longest Win Streak"],
+        overall["Longest Loss Streak"],
+        overall["Current Streak"],
+        "-" if pd.isna(rolling_roi) else f"{rolling_roi}%",
+    ]
+
+    for col, label, value in zip(cols, metrics_labels, metrics_values):
+        col.metric(label, value)
+
+    st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
+
+
+def downsample_daily(series: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduce the per-bet risk series to one point per day for plotting.
+
+    Args:
+        series (pd.DataFrame): The per-bet risk series.
+
+    Returns:
+        pd.DataFrame: The deepest drawdown and the end-of-day rolling ROI of each day.
+    """
+    return (
+        series.groupby("Date")
+        .agg({"Drawdown": "min", "Rolling ROI": "last"})
+        .reset_index()
+    )
+
+
+def plot_drawdown(daily_series: pd.DataFrame) -> None:
+    """
+    Plot the drawdown below the previous profit peak over time.
+
+    Args:
+        daily_series (pd.DataFrame): The daily risk series.
+    """
+    st.write("### Drawdown (Units)")
+    fig = px.area(
+        daily_series,
+        x="Date",
+        y="Drawdown",
+        color_discrete_sequence=[RED_COLOR],
+    )
+    fig.update_layout(xaxis_title=None, margin=dict(t=40, b=40), autosize=True)
+    st.plotly_chart(fig, use_container_width=True)
+    st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
+
+
+def plot_rolling_roi(daily_series: pd.DataFrame, window: int) -> None:
+    """
+    Plot the ROI over the last bets over time.
+
+    Args:
+        daily_series (pd.DataFrame): The daily risk series.
+        window (int): The number of bets in the rolling ROI window.
+    """
+    st.write(f"### ROI over the Last {window} Bets")
+    fig = px.line(
+        daily_series.dropna(subset=["Rolling ROI"]),
+        x="Date",
+        y="Rolling ROI",
+        labels={"Rolling ROI": "ROI %"},
+        color_discrete_sequence=[BLUE_COLOR],
+    )
+    fig.add_hline(y=0, line_dash="dot", line_color="DarkSlateGrey")
+    fig.update_layout(xaxis_title=None, margin=dict(t=40, b=40), autosize=True)
+    st.plotly_chart(fig, use_container_width=True)
+    st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
+
+
+def render_league_risk_table(metrics: pd.DataFrame, window: int) -> None:
+    """
+    Display the risk metrics of every league.
+
+    Args:
+        metrics (pd.DataFrame): The risk metrics per league.
+        window (int): The number of bets in the rolling ROI window.
+    """
+    st.write("### Risk by League")
+    st.markdown(SINGLE_VERTICAL_SPACE, unsafe_allow_html=True)
+    st.dataframe(
+        metrics.rename(columns={"Rolling ROI": f"ROI Last {window} Bets %"}),
+        hide_index=True,
+        use_container_width=True,
+    )
+    st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
+
+
+if __name__ == "__main__":
+    data = setup_and_load_bets(PAGE_NAME)
+
+    if not data.empty:
+        filtered_data = render_sidebar(data)
+
+        if filtered_data.empty:
+            st.warning("No bets match the selected filters.")
+        else:
+            window = render_window_selector()
+            daily_series = downsample_daily(
+                calculate_risk_series(filtered_data, window)
+            )
+
+            render_risk_metrics(calculate_risk_metrics(filtered_data, window), window)
+            plot_drawdown(daily_series)
+            plot_rolling_roi(daily_series, window)
+            render_league_risk_table(
+                calculate_risk_metrics(filtered_data, window, "League"), window
+            )
+
+        render_horizontal_line()
+    else:
+        st.error("Failed to load data. Please check the data source.")
+
+    record_page_render()
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from commons import (
+    BLUE_COLOR,
+    DOUBLE_VERTICAL_SPACE,
+    SINGLE_VERTICAL_SPACE,
+    render_horizontal_line,
+    setup_and_load_bets,
+)
+from metrics import record_page_render
+from sidebar import render_sidebar
+from simulation import get_worker_count, load_simulation, summarize_simulation
+
+PAGE_NAME = "Bankroll Simulation"
+PATHS_OPTIONS = [1_000, 5_000, 10_000, 50_000, 100_000]
+DEFAULT_PATHS = 10_000
+DEFAULT_HORIZON = 1_000
+MAX_HORIZON = 5_000
+DEFAULT_BANKROLL = 100.0
+SIMULATION_SEED = 42
+HISTOGRAM_BINS = 60
+
+
+def render_simulation_form() -> dict:
+    """
+    Display the simulation parameters in a form, so the simulation only runs on submit.
+
+    Returns:
+        dict: The number of paths, the horizon in bets and the starting bankroll.
+    """
+    with st.form("simulation_parameters"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            n_paths = st.select_slider(
+                "**Simulated paths**", options=PATHS_OPTIONS, value=DEFAULT_PATHS
+            )
+        with col2:
+            horizon = st.number_input(
+                "**Horizon (bets)**",
+                min_value=10,
+                max_value=MAX_HORIZON,
+                value=DEFAULT_HORIZON,
+                step=100,
+            )
+        with col3:
+            bankroll = st.number_input(
+                "**Starting bankroll (units)**",
+                min_value=1.0,
+                value=DEFAULT_BANKROLL,
+                step=10.0,
+            )
+        st.form_submit_button("Run Simulation", type="primary")
+
+    st.markdown(SINGLE_VERTICAL_SPACE, unsafe_allow_html=True)
+    return {"n_paths": n_paths, "horizon": int(horizon), "bankroll": bankroll}
+
+
+def render_simulation_metrics(summary: dict) -> None:
+    """
+    Display the headline statistics of the simulated paths.
+
+    Args:
+        summary (dict): The summary of the simulation.
+    """
+    st.write("### Outlook")
+    st.markdown(SINGLE_VERTICAL_SPACE, unsafe_allow_html=True)
+
+    cols = st.columns(4)
+    metrics_labels = [
+        "Median Final Profit (Units)",
+        "Probability of Profit %",
+        "Risk of Ruin %",
+        "Median Max Drawdown (Units)",
+    ]
+    metrics_values = [
+        summary["median_profit"],
+        f"{summary['profit_probability']}%",
+        f"{summary['ruin_probability']}%",
+        summary["median_drawdown"],
+    ]
+
+    for col, label, value in zip(cols, metrics_labels, metrics_values):
+        col.metric(label, value)
+
+    st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
+
+
+def plot_final_profit_distribution(final_profit: np.ndarray) -> None:
+    """
+    Plot the distribution of the final profit of the simulated paths.
+
+    The histogram is binned here, so only the bin counts are sent to the browser.
+
+    Args:
+        final_profit (np.ndarray): The final profit of each simulated path.
+    """
+    st.write("### Final Profit Distribution (Units)")
+    counts, edges = np.histogram(final_profit, bins=HISTOGRAM_BINS)
+    histogram = pd.DataFrame(
+        {
+            "Final Profit": ((edges[:-1] + edges[1:]) / 2).round(2),
+            "Paths %": (counts / counts.sum() * 100).round(2),
+        }
+    )
+
+    fig = px.bar(
+        histogram,
+        x="Final Profit",
+        y="Paths %",
+        color_discrete_sequence=[BLUE_COLOR],
+    )
+    fig.add_vline(x=0, line_dash="dot", line_color="DarkSlateGrey")
+    fig.update_layout(bargap=0, margin=dict(t=40, b=40), autosize=True)
+    st.plotly_chart(fig, use_container_width=True)
+    st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
+
+
+def render_percentiles_table(percentiles: pd.DataFrame) -> None:
+    """
+    Display the final profit and max drawdown percentiles.
+
+    Args:
+        percentiles (pd.DataFrame): The percentiles of the simulated paths.
+    """
+    st.write("### Percentiles")
+    st.markdown(SINGLE_VERTICAL_SPACE, unsafe_allow_html=True)
+    st.dataframe(percentiles, hide_index=True, use_container_width=True)
+    st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
+
+
+if __name__ == "__main__":
+    data = setup_and_load_bets(PAGE_NAME)
+
+    if not data.empty:
+        filtered_data = render_sidebar(data)
+
+        if filtered_data.empty:
+            st.warning("No bets match the selected filters.")
+        else:
+            parameters = render_simulation_form()
+            with st.spinner("Simulating bankroll paths..."):
+                results = load_simulation(
+                    filtered_data["Profit"].to_numpy(dtype=float),
+                    seed=SIMULATION_SEED,
+                    workers=get_worker_count(),
+                    **parameters,
+                )
+            summary = summarize_simulation(results)
+
+            render_simulation_metrics(summary)
+            plot_final_profit_distribution(results["final_profit"])
+            render_percentiles_table(summary["percentiles"])
+
+        render_horizontal_line()
+    else:
+        st.error("Failed to load data. Please check the data source.")
+
+    record_page_render()
@@ -0,0 +1,151 @@
+from typing import Optional
+
+import pandas as pd
+import streamlit as st
+
+from caches import MB, budgeted_cache
+from charts import create_profit_timeline
+from commons import (
+    DOUBLE_VERTICAL_SPACE,
+    get_data_version,
+    render_horizontal_line,
+    setup_and_load_bets,
+)
+from compute import load_or_compute
+from drilldown import (
+    TIMELINE_GRANULARITY,
+    DrillDown,
+    build_drilldown_cube,
+    build_drilldown_timeline,
+)
+from metrics import record_page_render
+from sidebar import get_filters_key, render_sidebar
+
+PAGE_NAME = "Drill-down by League, Team and Bet Type"
+LEAGUE_TABLE_KEY = "drill_league"
+TEAM_TABLE_KEY = "drill_team"
+TYPE_TABLE_KEY = "drill_type"
+DRILLDOWNS_BUDGET = 512 * MB
+DRILL_HINT = "Click a league to see its teams, then a team to see its bet types."
+
+
+@budgeted_cache("drilldowns", DRILLDOWNS_BUDGET)
+def load_drilldown(
+    _data: pd.DataFrame,
+    _filtered_data: pd.DataFrame,
+    data_version: str,
+    filters_key: str,
+) -> DrillDown:
+    """
+    Aggregate and index the drill-down once per data version and filter state.
+
+    Clicks only rerun lookups into the indexed aggregates, shared by every session.
+
+    Args:
+        _data (pd.DataFrame): The bets ledger the page loaded, before the filters.
+        _filtered_data (pd.DataFrame): The bets kept by the sidebar filters.
+        data_version (str): The version of the ledger the bets were filtered from.
+        filters_key (str): The key of the sidebar filters applied to the bets.
+
+    Returns:
+        DrillDown: The indexed aggregates of the filtered bets.
+    """
+    cube = load_or_compute(_data, "drilldown", build_drilldown_cube, _filtered_data)
+    timeline = load_or_compute(
+        _data, "drilldown_timeline", build_drilldown_timeline, _filtered_data
+    )
+    return DrillDown(cube, timeline)
+
+
+def render_drill_table(
+    stats: pd.DataFrame, column: str, title: str, key: str
+) -> Optional[str]:
+    """
+    Display the statistics of a drill step in a table where a row can be clicked.
+
+    Args:
+        stats (pd.DataFrame): The statistics, one row per value of `column`.
+        column (str): The dimension of the drill step.
+        title (str): The title of the table.
+        key (str): The widget key, which resets the selection when it changes.
+
+    Returns:
+        Optional[str]: The value of the clicked row, None if no row is selected.
+    """
+    st.write(f"### {title}")
+    event = st.dataframe(
+        stats,
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key=key,
+    )
+    # A row clicked before the filters changed can be past the end of the table
+    rows = [row for row in event.selection.rows if row < len(stats)]
+    return stats[column].iloc[rows[0]] if rows else None
+
+
+def render_team_timeline(
+    drilldown: DrillDown, league: str, team: str, bet_type: Optional[str]
+) -> None:
+    """
+    Display the cumulative profit of a team, for all or one of its bet types.
+
+    Args:
+        drilldown (DrillDown): The indexed aggregates.
+        league (str): The selected league.
+        team (str): The selected team.
+        bet_type (Optional[str]): The selected bet type, all of them if None.
+    """
+    title = f"{team} ({bet_type})" if bet_type else team
+    st.write(f"### {title} Profit Timeline (Units)")
+    st.plotly_chart(
+        create_profit_timeline(
+            drilldown.team_timeline(league, team, bet_type), TIMELINE_GRANULARITY
+        ),
+        use_container_width=True,
+    )
+    st.markdown(DOUBLE_VERTICAL_SPACE, unsafe_allow_html=True)
+
+
+if __name__ == "__main__":
+    data = setup_and_load_bets(PAGE_NAME)
+
+    if not data.empty:
+        filtered_data = render_sidebar(data)
+
+        if filtered_data.empty:
+            st.warning("No bets match the filters.")
+        else:
+            drilldown = load_drilldown(
+                data, filtered_data, get_data_version(filtered_data), get_filters_key()
+            )
+            st.caption(DRILL_HINT)
+
+            # The keys of the lower tables include the rows clicked above, so a new
+            # click starts the lower steps from an empty selection
+            league = render_drill_table(
+                drilldown.league_stats(), "League", "Leagues", LEAGUE_TABLE_KEY
+            )
+            if league is not None:
+                team = render_drill_table(
+                    drilldown.team_stats(league),
+                    "Team",
+                    f"Teams in {league}",
+                    f"{TEAM_TABLE_KEY}/{league}",
+                )
+                if team is not None:
+                    bet_type = render_drill_table(
+                        drilldown.type_stats(league, team),
+                        "Type",
+                        f"Bet Types of {team} in {league}",
+                        f"{TYPE_TABLE_KEY}/{league}/{team}",
+                    )
+                    render_team_timeline(drilldown, league, team, bet_type)
+
+        render_horizontal_line()
+    else:
+        st.error("Failed to load data. Please check the data source.")
+
+    record_page_render()
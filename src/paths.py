@@ -12,6 +12,12 @@ BASE_DIR = Path.cwd()
 
 # Directories for data storage
 IMGS_DIR = BASE_DIR / "imgs"
+# Precomputed aggregates, created by the compute module when it runs
+ARTIFACTS_DIR = BASE_DIR / "artifacts"
+# Append-only version history of the ledgers, recorded by the history module
+HISTORY_DIR = BASE_DIR / "history"
+# Static HTML export of the public pages, created by the snapshot module
+SNAPSHOT_DIR = BASE_DIR / "snapshot"
 
 # Ensure that the necessary directories exist
 for directory in [IMGS_DIR]:
@@ -0,0 +1,88 @@
+"""
+Pivots Module
+
+This module computes the multi-measure pivots of the bets ledger. Every measure of a
+pivot (profit, bets count, win rate, wager and odds) is aggregated in a single grouped
+pass, and the individual tables are sliced from the result.
+"""
+
+from typing import Optional
+
+import pandas as pd
+
+WIN_SYMBOL = "W"
+PIVOT_INDEX = "Type"
+PIVOT_COLUMNS = "League"
+# Measure name: (source column, aggregation)
+PIVOT_MEASURES = {
+    "Profit": ("Profit", "sum"),
+    "Bets": ("Profit", "size"),
+    "Win Rate": ("Win", "mean"),
+    "Wager": ("Wager", "sum"),
+    "Odds": ("Odds", "mean"),
+}
+# Measure: table title, in display order
+PIVOT_TABLES = {
+    "Profit": "Profit (Units)",
+    "Bets": "Bets Count (#)",
+    "Win Rate": "Win Rate (%)",
+    "Wager": "Total Wager (Units)",
+    "Odds": "Average Bet Odds",
+}
+# Extra dimensions that are derived from the ledger rather than read from a column
+DERIVED_DIMENSIONS = {
+    "Month": lambda data: data["Date"].dt.to_period("M").astype(str),
+}
+
+
+def build_pivot(
+    data: pd.DataFrame,
+    index: str = PIVOT_INDEX,
+    columns: str = PIVOT_COLUMNS,
+    extra_dimensions: Optional[list] = None,
+) -> pd.DataFrame:
+    """
+    Aggregate every pivot measure in a single grouped pass over the ledger.
+
+    Args:
+        data (pd.DataFrame): The processed DataFrame containing the bets ledger.
+        index (str): The column to group by for the rows.
+        columns (str): The column to group by for the columns.
+        extra_dimensions (Optional[list]): Columns, or keys of `DERIVED_DIMENSIONS`,
+                                           to break the rows down by.
+
+    Returns:
+        pd.DataFrame: One row per combination of the dimensions, one column per measure.
+    """
+    extra_dimensions = extra_dimensions or []
+    derived = {
+        dimension: DERIVED_DIMENSIONS[dimension](data)
+        for dimension in extra_dimensions
+        if dimension in DERIVED_DIMENSIONS
+    }
+    return (
+        data.assign(Win=data["Result"].eq(WIN_SYMBOL).astype(int), **derived)
+        .groupby([index, *extra_dimensions, columns], observed=True)
+        .agg(**PIVOT_MEASURES)
+    )
+
+
+def slice_pivot(
+    pivot: pd.DataFrame,
+    measure: str,
+    columns: str = PIVOT_COLUMNS,
+    round_digits: int = 2,
+) -> pd.DataFrame:
+    """
+    Slice the table of one measure out of a multi-measure pivot.
+
+    Args:
+        pivot (pd.DataFrame): The multi-measure pivot, as returned by `build_pivot`.
+        measure (str): One of `PIVOT_MEASURES`.
+        columns (str): The dimension to spread across the table columns.
+        round_digits (int): The number of decimal places to round the results.
+
+    Returns:
+        pd.DataFrame: The table of the measure, with 0 for empty cells.
+    """
+    return pivot[measure].unstack(columns, fill_value=0).round(round_digits)
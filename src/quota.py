@@ -0,0 +1,259 @@
+"""
+Quota Module
+
+This module keeps the Google Sheets requests of a process within the API quota, and
+keeps pages up while the API is unhealthy. Requests are rate limited by a token
+bucket, retried with exponential backoff and jitter when the failure is transient, and
+failed fast by a circuit breaker after repeated failures, so the pages can serve their
+last good snapshot instead of hammering a struggling upstream.
+"""
+
+import random
+import threading
+import time
+from http import HTTPStatus
+from typing import Callable, Optional, TypeVar
+
+import gspread
+import requests
+
+READS_PER_MINUTE = 60  # The per-user read quota of the Sheets API
+BURST = 10  # Requests allowed back to back after a quiet period
+MAX_TOKEN_WAIT = 10  # Seconds a request waits for the quota before giving up
+RETRIES = 4
+BACKOFF_BASE = 0.5  # Seconds before the first retry, doubled on each retry
+BACKOFF_CAP = 16  # Longest wait between two retries, in seconds
+FAILURE_THRESHOLD = 5  # Consecutive failures that open the circuit
+RESET_TIMEOUT = 60  # Seconds the circuit stays open before a probe request
+RETRYABLE_STATUSES = {
+    HTTPStatus.REQUEST_TIMEOUT,
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+}
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+T = TypeVar("T")
+
+
+class QuotaExhaustedError(Exception):
+    """Raised when a request cannot get a token of the quota in time."""
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit is open."""
+
+
+class TokenBucket:
+    """A thread-safe token bucket, refilled continuously at a fixed rate."""
+
+    def __init__(
+        self,
+        rate: float = READS_PER_MINUTE / 60,
+        capacity: float = BURST,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated_at = clock()
+        self.lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available.
+
+        Returns:
+            float: 0 if a token was taken, else the seconds until one is available.
+        """
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated_at) * self.rate
+            )
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self, timeout: float = MAX_TOKEN_WAIT) -> bool:
+        """
+        Take a token, waiting for one for up to `timeout` seconds.
+
+        Args:
+            timeout (float): The longest wait, in seconds.
+
+        Returns:
+            bool: True if a token was taken.
+        """
+        deadline = self.clock() + timeout
+        while wait := self.try_acquire():
+            remaining = deadline - self.clock()
+            if wait > remaining:
+                return False
+            time.sleep(wait)
+        return True
+
+
+class CircuitBreaker:
+    """
+    A thread-safe circuit breaker.
+
+    The circuit opens after `threshold` consecutive failures. Once `reset_timeout`
+    seconds have passed, a single probe request is let through: the circuit closes if
+    it succeeds, and opens again if it fails.
+    """
+
+    def __init__(
+        self,
+        threshold: int = FAILURE_THRESHOLD,
+        reset_timeout: float = RESET_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Check whether a request may be sent.
+
+        Returns:
+            bool: True if the circuit is closed, or if this request is the probe.
+        """
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            if (
+                self.state == OPEN
+                and self.clock() - self.opened_at >= self.reset_timeout
+            ):
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Record a request that got a response, closing the circuit."""
+        with self.lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        """Record a failed request, opening the circuit after too many."""
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                self.state = OPEN
+                self.opened_at = self.clock()
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Check whether a failed request may succeed if sent again.
+
+    Args:
+        error (Exception): The error raised by the request.
+
+    Returns:
+        bool: True for quota, timeout and server errors, and for connection failures.
+    """
+    if isinstance(error, gspread.exceptions.APIError):
+        return error.code in RETRYABLE_STATUSES
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """
+    Get the wait requested by the server in the 'Retry-After' header of an error.
+
+    Args:
+        error (Exception): The error raised by the request.
+
+    Returns:
+        Optional[float]: The seconds to wait, None if the server did not say.
+    """
+    response = getattr(error, "response", None)
+    value = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def backoff_delay(
+    attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP
+) -> float:
+    """
+    Compute the wait before a retry, with exponential backoff and full jitter.
+
+    Args:
+        attempt (int): The number of the failed attempt, from 0.
+        base (float): The longest wait after the first attempt, in seconds.
+        cap (float): The longest wait after any attempt, in seconds.
+
+    Returns:
+        float: A random wait, in seconds, so concurrent retries don't line up.
+    """
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class QuotaGuard:
+    """Rate limit, retry and circuit-break the requests to an API."""
+
+    def __init__(
+        self,
+        bucket: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        retries: int = RETRIES,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.bucket = bucket or TokenBucket()
+        self.breaker = breaker or CircuitBreaker()
+        self.retries = retries
+        self.sleep = sleep
+
+    def call(self, request: Callable[[], T]) -> T:
+        """
+        Send a request within the quota, retrying transient failures.
+
+        Args:
+            request (Callable[[], T]): The request to send.
+
+        Returns:
+            T: The response of the request.
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+            QuotaExhaustedError: If the quota has no token left in time.
+        """
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError("Google Sheets is failing, requests are paused.")
+            if not self.bucket.acquire():
+                raise QuotaExhaustedError("The Google Sheets quota is exhausted.")
+
+            try:
+                response = request()
+            except Exception as error:
+                if not is_retryable(error):
+                    # The API answered, so it is healthy even if the request is wrong
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt == self.retries:
+                    raise
+                wait = max(backoff_delay(attempt), retry_after(error) or 0)
+                self.sleep(min(wait, BACKOFF_CAP))
+            else:
+                self.breaker.record_success()
+                return response
@@ -0,0 +1,332 @@
+"""
+Rollups Module
+
+This module materializes the time rollups of the bets ledger. Bets are aggregated once
+per data version into daily League and Type totals, and the week, month and season
+tables are rolled up from the daily one, so timelines and per-period comparisons never
+go back to the raw bets.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from caches import MB, budgeted_cache
+from commons import get_data_version
+from sidebar import get_active_filters
+
+WIN_SYMBOL = "W"
+ROLLUP_KEYS = ["League", "Type"]
+ROLLUP_MEASURES = ["Bets", "Wager", "Profit", "Wins"]
+GRANULARITIES = {"D": "Day", "W": "Week", "M": "Month", "S": "Season"}
+PERIOD_FORMATS = {"D": "%Y-%m-%d", "W": "%G-W%V", "M": "%Y-%m"}
+# First month of each LoL split, in calendar order
+SEASON_SPLITS = {1: "Spring", 6: "Summer", 9: "Worlds"}
+ROLLUPS_BUDGET = 256 * MB
+
+
+def season_start(dates: pd.Series) -> pd.Series:
+    """
+    Map each date to the first day of the LoL split it belongs to.
+
+    Args:
+        dates (pd.Series): The dates to map.
+
+    Returns:
+        pd.Series: The start date of the split of each date.
+    """
+    months = dates.values.astype("datetime64[M]")
+    month_of_year = months.astype(np.int64) % 12 + 1
+    split_month = np.ones_like(month_of_year)
+    for first_month in SEASON_SPLITS:
+        split_month = np.where(month_of_year >= first_month, first_month, split_month)
+    offset = (month_of_year - split_month).astype("timedelta64[M]")
+    return pd.Series(
+        (months - offset).astype("datetime64[ns]"), index=dates.index, name=dates.name
+    )
+
+
+def period_start(dates: pd.Series, granularity: str) -> pd.Series:
+    """
+    Map each date to the start of the period it belongs to.
+
+    Args:
+        dates (pd.Series): The dates to map.
+        granularity (str): 'D' for day, 'W' for ISO week, 'M' for month, 'S' for season.
+
+    Returns:
+        pd.Series: The start date of the period of each date.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(
+            f"Invalid granularity. Choose one of {', '.join(GRANULARITIES)}."
+        )
+
+    days = dates.dt.normalize()
+    if granularity == "D":
+        return days
+    if granularity == "W":
+        return days - pd.to_timedelta(days.dt.weekday, unit="D")
+    if granularity == "M":
+        return pd.Series(
+            dates.values.astype("datetime64[M]").astype("datetime64[ns]"),
+            index=dates.index,
+            name=dates.name,
+        )
+    return season_start(dates)
+
+
+def period_labels(starts: pd.Series, granularity: str) -> pd.Series:
+    """
+    Build a readable label for each period start date.
+
+    Args:
+        starts (pd.Series): The start dates of the periods.
+        granularity (str): The granularity of the periods.
+
+    Returns:
+        pd.Series: The label of each period, e.g. '2024-W32' or '2024 Summer'.
+    """
+    if granularity != "S":
+        return starts.dt.strftime(PERIOD_FORMATS[granularity])
+    return starts.dt.year.astype(str) + " " + starts.dt.month.map(SEASON_SPLITS)
+
+
+def aggregate_rollup(rollup: pd.DataFrame, granularity: str) -> pd.DataFrame:
+    """
+    Roll a finer rollup table up to a coarser granularity.
+
+    Args:
+        rollup (pd.DataFrame): A rollup table with a 'Date' column and the rollup measures.
+        granularity (str): The target granularity.
+
+    Returns:
+        pd.DataFrame: The rollup table at the target granularity.
+    """
+    return (
+        rollup.assign(Date=period_start(rollup["Date"], granularity))
+        .groupby(["Date", *ROLLUP_KEYS], observed=True)[ROLLUP_MEASURES]
+        .sum()
+        .reset_index()
+    )
+
+
+def build_daily_rollup(bets_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate the bets ledger into daily League and Type totals.
+
+    Args:
+        bets_df (pd.DataFrame): The processed DataFrame containing the settled bets.
+
+    Returns:
+        pd.DataFrame: The daily rollup table, with 'Date' (the day), League, Type,
+                      Bets, Wager, Profit and Wins columns.
+    """
+    return (
+        bets_df.assign(
+            Date=period_start(bets_df["Date"], "D"),
+            Bets=1,
+            Wins=bets_df["Result"].eq(WIN_SYMBOL).astype(int),
+        )
+        .groupby(["Date", *ROLLUP_KEYS], observed=True)[ROLLUP_MEASURES]
+        .sum()
+        .reset_index()
+    )
+
+
+def build_rollups(bets_df: pd.DataFrame) -> dict:
+    """
+    Build the rollup tables of the bets ledger at every granularity.
+
+    The raw bets are scanned once to build the daily table; the coarser tables are
+    aggregated from it.
+
+    Args:
+        bets_df (pd.DataFrame): The processed DataFrame containing the settled bets.
+
+    Returns:
+        dict: A rollup table per granularity, keyed like `GRANULARITIES`.
+    """
+    daily = build_daily_rollup(bets_df)
+    rollups = {"D": daily}
+    for granularity in GRANULARITIES:
+        if granularity != "D":
+            rollups[granularity] = aggregate_rollup(daily, granularity)
+    return rollups
+
+
+@budgeted_cache("rollups", ROLLUPS_BUDGET)
+def load_rollups(_bets_df: pd.DataFrame, data_version: str) -> dict:
+    """
+    Build the rollup tables once per data version.
+
+    Args:
+        _bets_df (pd.DataFrame): The processed DataFrame containing the settled bets.
+                                 Not hashed, the data version identifies it.
+        data_version (str): The version of the ledger the rollups are built from.
+
+    Returns:
+        dict: A rollup table per granularity.
+    """
+    return build_rollups(_bets_df)
+
+
+def slice_rollup(
+    rollup: pd.DataFrame,
+    start_date: Optional[pd.Timestamp] = None,
+    end_date: Optional[pd.Timestamp] = None,
+    leagues: Optional[list] = None,
+    bet_types: Optional[list] = None,
+) -> pd.DataFrame:
+    """
+    Filter a rollup table by period start date, League and Type.
+
+    Args:
+        rollup (pd.DataFrame): The rollup table to filter.
+        start_date (Optional[pd.Timestamp]): The first date to keep.
+        end_date (Optional[pd.Timestamp]): The last date to keep.
+        leagues (Optional[list]): The leagues to keep, all if empty.
+        bet_types (Optional[list]): The bet types to keep, all if empty.
+
+    Returns:
+        pd.DataFrame: The filtered rollup table.
+    """
+    mask = np.ones(len(rollup), dtype=bool)
+    if start_date is not None:
+        mask &= rollup["Date"].values >= np.datetime64(start_date)
+    if end_date is not None:
+        mask &= rollup["Date"].values <= np.datetime64(end_date)
+    if leagues:
+        mask &= rollup["League"].isin(leagues).values
+    if bet_types:
+        mask &= rollup["Type"].isin(bet_types).values
+    return rollup[mask]
+
+
+def summarize_periods(rollup: pd.DataFrame, granularity: str) -> pd.DataFrame:
+    """
+    Total a rollup table per period and derive the period statistics.
+
+    Args:
+        rollup (pd.DataFrame): The rollup table to total.
+        granularity (str): The granularity of the rollup table.
+
+    Returns:
+        pd.DataFrame: One row per period with its label, the rollup measures, ROI,
+                      winrate and the cumulative profit.
+    """
+    periods = rollup.groupby("Date")[ROLLUP_MEASURES].sum().reset_index()
+    periods.insert(1, "Period", period_labels(periods["Date"], granularity))
+    periods["ROI"] = (periods["Profit"] / periods["Wager"] * 100).round(2)
+    periods["Winrate"] = (periods["Wins"] / periods["Bets"] * 100).round(2)
+    periods["Cumulative Profit"] = periods["Profit"].cumsum()
+    return periods
+
+
+def format_period_comparison(period_totals: pd.DataFrame) -> pd.DataFrame:
+    """
+    Format the per-period totals for display, most recent period first.
+
+    Args:
+        period_totals (pd.DataFrame): One row per period, as returned by
+                                      `summarize_periods`.
+
+    Returns:
+        pd.DataFrame: The bets count, wager, profit, ROI and winrate of every period.
+    """
+    return (
+        period_totals[["Period", "Bets", "Wager", "Profit", "ROI", "Winrate"]]
+        .iloc[::-1]
+        .round(2)
+        .rename(
+            columns={"Wager": "Units Wagered", "ROI": "ROI %", "Winrate": "Winrate %"}
+        )
+    )
+
+
+def filters_allow_rollups(filters: dict) -> bool:
+    """
+    Check whether the sidebar filters can be answered from the rollup tables.
+
+    Args:
+        filters (dict): The active sidebar filters.
+
+    Returns:
+        bool: True if only the date, League and Type filters are in use.
+    """
+    return not filters.get("Team") and not filters.get("Result")
+
+
+def dates_narrow_rollup(
+    daily: pd.DataFrame,
+    start_date: Optional[pd.Timestamp],
+    end_date: Optional[pd.Timestamp],
+) -> bool:
+    """
+    Check whether a date range leaves out any day of the daily rollup table.
+
+    The sidebar always starts at `START_DATE`, so a range covering every day bet on
+    is treated as no date filter, and the coarser rollups are read as they are.
+
+    Args:
+        daily (pd.DataFrame): The daily rollup table.
+        start_date (Optional[pd.Timestamp]): The first date to keep.
+        end_date (Optional[pd.Timestamp]): The last date to keep.
+
+    Returns:
+        bool: True if some days of the table fall outside the range.
+    """
+    if daily.empty:
+        return False
+    days = daily["Date"].to_numpy()
+    return (start_date is not None and np.datetime64(start_date) > days.min()) or (
+        end_date is not None and np.datetime64(end_date) < days.max()
+    )
+
+
+def calculate_period_totals(
+    data: pd.DataFrame, filtered_data: pd.DataFrame, granularity: str = "D"
+) -> pd.DataFrame:
+    """
+    Calculate the per-period totals of the filtered bets.
+
+    The totals are sliced from the materialized rollups of the full ledger whenever the
+    active filters allow it. Date filters leaving out some days are applied to the daily
+    table before rolling it up, so partial weeks, months and seasons are counted
+    exactly. Filters on other columns fall back to rolling up the filtered bets.
+
+    Args:
+        data (pd.DataFrame): The processed DataFrame containing every settled bet.
+        filtered_data (pd.DataFrame): The bets left after the sidebar filters.
+        granularity (str): 'D' for day, 'W' for ISO week, 'M' for month, 'S' for season.
+
+    Returns:
+        pd.DataFrame: One row per period, as returned by `summarize_periods`.
+    """
+    filters = get_active_filters()
+
+    if filtered_data.empty or not filters_allow_rollups(filters):
+        rollup = build_daily_rollup(filtered_data)
+        if granularity != "D":
+            rollup = aggregate_rollup(rollup, granularity)
+        return summarize_periods(rollup, granularity)
+
+    rollups = load_rollups(data, get_data_version(data))
+    start_date, end_date = filters["start_date"], filters["end_date"]
+    if not dates_narrow_rollup(rollups["D"], start_date, end_date):
+        rollup = slice_rollup(
+            rollups[granularity], leagues=filters["League"], bet_types=filters["Type"]
+        )
+        return summarize_periods(rollup, granularity)
+
+    rollup = slice_rollup(
+        rollups["D"],
+        start_date,
+        end_date,
+        leagues=filters["League"],
+        bet_types=filters["Type"],
+    )
+    if granularity != "D":
+        rollup = aggregate_rollup(rollup, granularity)
+    return summarize_periods(rollup, granularity)
@@ -0,0 +1,222 @@
+"""
+Search Module
+
+This module indexes the team names of a ledger for the type-ahead search of the Team
+filter. With hundreds of teams across leagues, shipping every name to the browser on
+each rerun makes the filter slow and its list hard to scan, so the sidebar only offers
+the teams matching what was typed, the most bet on first.
+
+A team is found by a prefix of its name, of any word of its name ('liquid' for 'Team
+Liquid'), of one of its aliases ('SKT' for 'T1'), or of its league ('LCK' for every
+LCK team), ignoring case and punctuation ('geng' for 'Gen.G'). Typos fall back to a
+fuzzy match of the whole query. The index is built once per data version of a ledger,
+and a prefix lookup is a binary search over its sorted keys.
+"""
+
+import difflib
+import re
+
+import numpy as np
+import pandas as pd
+
+from caches import MB, budgeted_cache
+
+TEAM_INDEX_BUDGET = 64 * MB
+MAX_TEAM_OPTIONS = 50  # Teams shipped to the browser on each rerun
+FUZZY_CUTOFF = 0.6  # Similarity of a query to the keys it fuzzily matches, from 0 to 1
+# Kinds of keys, in the order their matches are listed
+NAME_KEY = 0
+ALIAS_KEY = 1
+WORD_KEY = 2
+LEAGUE_KEY = 3
+TEAM_ALIASES = {
+    "T1": ["SKT", "SK Telecom T1", "SKT T1"],
+    "Gen.G": ["GEN", "Samsung Galaxy", "KSV"],
+    "Hanwha Life": ["HLE", "Hanwha Life Esports"],
+    "Dplus KIA": ["DK", "DWG", "DWG KIA", "Damwon"],
+    "KT Rolster": ["KT"],
+    "DRX": ["DragonX", "Kingzone"],
+    "BLG": ["Bilibili Gaming"],
+    "JDG": ["JD Gaming"],
+    "Top Esports": ["TES"],
+    "Weibo Gaming": ["WBG", "Suning", "SN"],
+    "LNG": ["LNG Esports"],
+    "EDG": ["EDward Gaming"],
+    "G2": ["G2 Esports"],
+    "Fnatic": ["FNC"],
+    "MAD Lions": ["MAD", "MAD Lions KOI"],
+    "Team BDS": ["BDS"],
+    "Team Vitality": ["VIT"],
+    "SK Gaming": ["SK"],
+    "Team Liquid": ["TL"],
+    "FlyQuest": ["FLY"],
+    "Cloud9": ["C9"],
+    "100 Thieves": ["100T"],
+    "Dignitas": ["DIG"],
+    "PSG Talon": ["PSG"],
+    "CTBC Flying Oyster": ["CFO"],
+    "GAM Esports": ["GAM"],
+}
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a name or query for matching, ignoring case and punctuation.
+
+    Args:
+        name (str): The name or query.
+
+    Returns:
+        str: The name in lowercase, with only its letters and digits.
+    """
+    return re.sub(r"[\W_]+", "", str(name).casefold())
+
+
+def name_words(name: str) -> list:
+    """
+    Split a name into its normalized words.
+
+    Args:
+        name (str): The name.
+
+    Returns:
+        list: The normalized words of the name, e.g. ['team', 'liquid'].
+    """
+    return [word for word in map(normalize_name, str(name).split()) if word]
+
+
+class TeamIndex:
+    """The sorted search keys of the teams of a ledger version."""
+
+    def __init__(self, teams: pd.Series, leagues: pd.Series) -> None:
+        self.codes, self.teams = pd.factorize(teams, sort=True)
+        self.codes = self.codes.astype(np.int32)
+        self.team_set = set(self.teams)
+
+        keys, targets, kinds = [], [], []
+
+        def add_key(key: str, team: int, kind: int) -> None:
+            if key:
+                keys.append(key)
+                targets.append(team)
+                kinds.append(kind)
+
+        for team, name in enumerate(self.teams):
+            add_key(normalize_name(name), team, NAME_KEY)
+            for alias in TEAM_ALIASES.get(name, []):
+                add_key(normalize_name(alias), team, ALIAS_KEY)
+            for word in name_words(name)[1:]:
+                add_key(word, team, WORD_KEY)
+
+        # Each team is found under the leagues it played in
+        league_codes, league_names = pd.factorize(leagues)
+        pairs = np.unique(
+            self.codes.astype(np.int64) * len(league_names) + league_codes
+        )
+        for team, league in zip(*np.divmod(pairs, len(league_names))):
+            add_key(normalize_name(league_names[league]), int(team), LEAGUE_KEY)
+
+        order = np.lexsort((kinds, keys))
+        self.keys = np.asarray(keys, dtype=str)[order]
+        self.targets = np.asarray(targets, dtype=np.int32)[order]
+        self.kinds = np.asarray(kinds, dtype=np.int8)[order]
+        self.unique_keys = list(dict.fromkeys(self.keys))
+
+    def count_bets(self, mask: np.ndarray) -> np.ndarray:
+        """
+        Count the bets on each team among the rows of the ledger left by the filters.
+
+        Args:
+            mask (np.ndarray): The boolean mask of the rows left, in ledger order.
+
+        Returns:
+            np.ndarray: The number of bets on each team, in index order.
+        """
+        return np.bincount(self.codes[mask], minlength=len(self.teams))
+
+    def find_prefix(self, query: str) -> tuple:
+        """
+        Find the keys starting with a normalized query, by binary search.
+
+        Args:
+            query (str): The normalized query.
+
+        Returns:
+            tuple: The matching keys, their teams and their kinds.
+        """
+        # Every key starting with the query sorts between the query itself and the
+        # query followed by the last code point
+        start = np.searchsorted(self.keys, query, side="left")
+        end = np.searchsorted(self.keys, query + "\U0010ffff", side="right")
+        return self.keys[start:end], self.targets[start:end], self.kinds[start:end]
+
+    def find_fuzzy(self, query: str, limit: int) -> np.ndarray:
+        """
+        Find the teams whose keys are close to a normalized query, to forgive typos.
+
+        Args:
+            query (str): The normalized query.
+            limit (int): The maximum number of keys matched.
+
+        Returns:
+            np.ndarray: The teams of the closest keys, closest first.
+        """
+        matches = difflib.get_close_matches(
+            query, self.unique_keys, n=limit, cutoff=FUZZY_CUTOFF
+        )
+        starts = np.searchsorted(self.keys, matches, side="left")
+        ends = np.searchsorted(self.keys, matches, side="right")
+        return np.concatenate(
+            [self.targets[start:end] for start, end in zip(starts, ends)]
+            or [np.empty(0, dtype=np.int32)]
+        )
+
+    def search(self, query: str, counts: np.ndarray, limit: int) -> list:
+        """
+        Search the teams matching a query, among the teams with bets.
+
+        Without a query, the most bet on teams are listed. Otherwise, exact matches
+        come first, then prefix matches on names, aliases, words and leagues, each by
+        decreasing number of bets. Fuzzy matches are only listed when no prefix
+        matches, e.g. for a typo.
+
+        Args:
+            query (str): The text typed in the search box.
+            counts (np.ndarray): The number of bets on each team, see `count_bets`.
+            limit (int): The maximum number of teams listed.
+
+        Returns:
+            list: The names of the matching teams.
+        """
+        query = normalize_name(query)
+        if not query:
+            ranked = np.argsort(-counts, kind="stable")
+            return list(self.teams[ranked[counts[ranked] > 0][:limit]])
+
+        keys, teams, kinds = self.find_prefix(query)
+        ranked = teams[np.lexsort((-counts[teams], kinds, keys != query))]
+        if not counts[ranked].any():
+            ranked = self.find_fuzzy(query, limit)
+
+        # Keep the first match of each team with bets
+        ranked = ranked[counts[ranked] > 0]
+        _, first = np.unique(ranked, return_index=True)
+        return list(self.teams[ranked[np.sort(first)][:limit]])
+
+
+@budgeted_cache("team_index", TEAM_INDEX_BUDGET)
+def get_team_index(
+    _bets_df: pd.DataFrame, data_version: str, pending: bool = False
+) -> TeamIndex:
+    """
+    Build the team index of a version of a ledger, once for every session.
+
+    Args:
+        _bets_df (pd.DataFrame): The processed ledger, not hashed.
+        data_version (str): The data version of the ledger, to key the cache.
+        pending (bool): Whether the ledger holds the pending bets.
+
+    Returns:
+        TeamIndex: The index of the teams of the ledger.
+    """
+    return TeamIndex(_bets_df["Team"], _bets_df["League"])
@@ -0,0 +1,198 @@
+"""
+Sheets Module
+
+This module wraps the Google Sheets reads behind the bets ledger. Rows are returned as
+DataFrames indexed by their row number in the sheet, which stays the key of a bet
+across full and partial reads. Every request goes through the quota guard of the
+process, and can be sent to a local fake of the API by setting `SHEETS_API_URL`.
+"""
+
+import os
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import gspread
+import pandas as pd
+import streamlit as st
+from google.auth.credentials import AnonymousCredentials
+from gspread.http_client import HTTPClient
+from gspread.utils import numericise_all, rowcol_to_a1
+from oauth2client.service_account import ServiceAccountCredentials
+from requests import Response
+
+from metrics import CIRCUIT_OPEN, SHEETS_REQUEST_SECONDS
+from quota import CLOSED, QuotaGuard
+
+SCOPE = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive",
+]
+HEADER_ROW = 1
+ROW_INDEX_NAME = "Row"
+GOOGLE_API_URL = "https://sheets.googleapis.com"
+SHEETS_API_URL = os.environ.get("SHEETS_API_URL")  # e.g. a fake from fake_sheets.py
+WORKSHEET_TTL = 60 * 60  # Reopen worksheets hourly, in case they were renamed
+
+
+@st.cache_resource
+def get_quota_guard() -> QuotaGuard:
+    """
+    Get the quota guard shared by every Google Sheets request of the process.
+
+    Returns:
+        QuotaGuard: The quota guard.
+    """
+    return QuotaGuard()
+
+
+class QuotaHTTPClient(HTTPClient):
+    """A gspread HTTP client sending every request through the quota guard."""
+
+    def request(self, method: str, endpoint: str, *args, **kwargs) -> Response:
+        """
+        Send a request to the Sheets API, or to its fake when one is configured.
+
+        Args:
+            method (str): The HTTP method.
+            endpoint (str): The URL of the endpoint.
+            *args: The other arguments of `HTTPClient.request`.
+            **kwargs: The other keyword arguments of `HTTPClient.request`.
+
+        Returns:
+            Response: The response of the API.
+        """
+        if SHEETS_API_URL:
+            endpoint = endpoint.replace(GOOGLE_API_URL, SHEETS_API_URL.rstrip("/"))
+        guard = get_quota_guard()
+        start, outcome = time.perf_counter(), "error"
+        try:
+            response = guard.call(
+                lambda: super(QuotaHTTPClient, self).request(
+                    method, endpoint, *args, **kwargs
+                )
+            )
+            outcome = "ok"
+            return response
+        finally:
+            SHEETS_REQUEST_SECONDS.observe(time.perf_counter() - start, outcome=outcome)
+            CIRCUIT_OPEN.set(int(guard.breaker.state != CLOSED))
+
+
+@st.cache_resource
+def get_client() -> gspread.Client:
+    """
+    Authorize a Google Sheets client from the Streamlit secrets, once per process.
+
+    Returns:
+        gspread.Client: The authorized client.
+    """
+    if SHEETS_API_URL:
+        # The fake API needs no credentials
+        return gspread.Client(AnonymousCredentials(), http_client=QuotaHTTPClient)
+
+    # Load credentials from Streamlit secrets
+    creds_dict = dict(st.secrets["gspread_credentials"])
+
+    # Fix private key formatting issue
+    if not creds_dict["private_key"].endswith("\n-----END PRIVATE KEY-----\n"):
+        creds_dict["private_key"] += "\n-----END PRIVATE KEY-----\n"
+
+    # Load credentials directly from the dictionary
+    creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SCOPE)
+    return gspread.authorize(creds, http_client=QuotaHTTPClient)
+
+
+@st.cache_resource(ttl=WORKSHEET_TTL)
+def open_worksheet(sheet_url: str) -> gspread.Worksheet:
+    """
+    Open the worksheet holding the bets ledger.
+
+    Opening a worksheet reads the spreadsheet metadata, so the handle is reused by
+    the following reads instead of spending quota on every refresh.
+
+    Args:
+        sheet_url (str): The URL of the Google Sheets document, optionally ending with
+                         the '#gid=<id>' of a worksheet.
+
+    Returns:
+        gspread.Worksheet: The worksheet of the URL, or the first worksheet.
+    """
+    spreadsheet = get_client().open_by_url(sheet_url)
+    worksheet_id = parse_qs(urlsplit(sheet_url).fragment).get("gid")
+    if worksheet_id:
+        return spreadsheet.get_worksheet_by_id(int(worksheet_id[0]))
+    return spreadsheet.sheet1
+
+
+def list_worksheets(sheet_url: str) -> pd.DataFrame:
+    """
+    List the worksheets of a spreadsheet, in tab order.
+
+    Args:
+        sheet_url (str): The URL of the Google Sheets document.
+
+    Returns:
+        pd.DataFrame: The title and the URL of each worksheet.
+    """
+    spreadsheet_url = urlsplit(sheet_url)._replace(fragment="").geturl()
+    worksheets = get_client().open_by_url(spreadsheet_url).worksheets()
+    return pd.DataFrame(
+        {
+            "Title": [worksheet.title for worksheet in worksheets],
+            "URL": [
+                f"{spreadsheet_url}#gid={worksheet.id}" for worksheet in worksheets
+            ],
+        }
+    )
+
+
+def records_to_frame(records: list, columns: list, first_row: int) -> pd.DataFrame:
+    """
+    Build a DataFrame of sheet rows, indexed by their row number in the sheet.
+
+    Args:
+        records (list): The rows, as dictionaries or lists of cell values.
+        columns (list): The column names, from the header row.
+        first_row (int): The sheet row number of the first record.
+
+    Returns:
+        pd.DataFrame: The non-blank rows, with empty cells replaced by NA.
+    """
+    index = pd.RangeIndex(first_row, first_row + len(records), name=ROW_INDEX_NAME)
+    rows_df = pd.DataFrame(records, columns=columns, index=index).replace("", pd.NA)
+    return rows_df.dropna(how="all")
+
+
+def fetch_all_rows(worksheet: gspread.Worksheet) -> pd.DataFrame:
+    """
+    Read every row of the worksheet.
+
+    Args:
+        worksheet (gspread.Worksheet): The worksheet to read.
+
+    Returns:
+        pd.DataFrame: The rows of the worksheet.
+    """
+    records = worksheet.get_all_records(head=HEADER_ROW)
+    columns = list(records[0]) if records else worksheet.row_values(HEADER_ROW)
+    return records_to_frame(records, columns, HEADER_ROW + 1)
+
+
+def fetch_rows_from(
+    worksheet: gspread.Worksheet, columns: list, first_row: int
+) -> pd.DataFrame:
+    """
+    Read the worksheet from a given row to its end with a single range request.
+
+    Args:
+        worksheet (gspread.Worksheet): The worksheet to read.
+        columns (list): The column names, from the header row.
+        first_row (int): The sheet row number to start reading from.
+
+    Returns:
+        pd.DataFrame: The rows from `first_row` onwards.
+    """
+    last_column = rowcol_to_a1(HEADER_ROW, len(columns)).rstrip("0123456789")
+    values = worksheet.get(f"A{first_row}:{last_column}", pad_values=True)
+    rows = [numericise_all(row + [""] * (len(columns) - len(row))) for row in values]
+    return records_to_frame(rows, columns, first_row)
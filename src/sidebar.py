@@ -1,9 +1,96 @@
+import json
+
+import numpy as np
 import pandas as pd
 import streamlit as st
 
-from commons import SINGLE_VERTICAL_SPACE
+from commons import (
+    END_DATE_KEY,
+    SINGLE_VERTICAL_SPACE,
+    START_DATE,
+    START_DATE_KEY,
+    get_data_version,
+    get_memo_keys,
+)
+from instrumentation import record_session_memory
+from search import MAX_TEAM_OPTIONS, get_team_index
+
+FILTERS_STATE_KEY = "sidebar_filters"
+TEAM_SEARCH_KEY = "team_search"
+TEAM_FILTER_KEY = "team_filter"
+FILTER_COLUMNS = ["Type", "League", "Team", "Result"]
+
+
+def get_default_filters() -> dict:
+    """
+    Get the filters of the sidebar before any selection.
+
+    Returns:
+        dict: The default start and end dates and no values for each filter column.
+    """
+    default_filters = {"start_date": START_DATE, "end_date": None}
+    default_filters.update({column: [] for column in FILTER_COLUMNS})
+    return default_filters
+
+
+def get_active_filters() -> dict:
+    """
+    Get the filters selected in the sidebar during the current run.
+
+    Returns:
+        dict: The start and end dates and the selected values for each filter column.
+    """
+    return st.session_state.get(FILTERS_STATE_KEY, get_default_filters())
+
+
+def is_default_view() -> bool:
+    """
+    Check whether the sidebar filters are left at their defaults in the current run.
+
+    Returns:
+        bool: True if no filter was changed.
+    """
+    return get_active_filters() == get_default_filters()
+
+
+def get_filters_key() -> str:
+    """
+    Serialize the filters selected in the sidebar, to key caches of filtered results.
+
+    Returns:
+        str: A stable string representation of the active filters.
+    """
+    return json.dumps(get_active_filters(), default=str, sort_keys=True)
+
+
+def render_team_filter(data: pd.DataFrame, mask: np.ndarray, pending: bool) -> list:
+    """
+    Render the Team filter, offering only the teams matching the search box.
+
+    Args:
+        data (pd.DataFrame): The DataFrame containing the bets ledger.
+        mask (np.ndarray): The rows left by the filters above, to offer their teams.
+        pending (bool): Whether the ledger holds the pending bets.
+
+    Returns:
+        list: The selected teams.
+    """
+    index = get_team_index(data, get_data_version(data), pending)
+    query = st.sidebar.text_input(
+        "**Search teams**",
+        key=TEAM_SEARCH_KEY,
+        placeholder="Team, alias or league, e.g. SKT",
+    )
+    matches = index.search(query, index.count_bets(mask), MAX_TEAM_OPTIONS)
 
-START_DATE = pd.Timestamp("2024-08-01")
+    # The options change with the search, which makes a new widget, so the selected
+    # teams are carried over as its default and stay offered
+    selected = st.session_state.get(TEAM_FILTER_KEY, [])
+    kept = [team for team in selected if team in index.team_set]
+    options = kept + [team for team in matches if team not in kept]
+    return st.sidebar.multiselect(
+        "**Team**", options, default=kept, key=TEAM_FILTER_KEY
+    )
 
 
 def render_sidebar(data: pd.DataFrame, pending: bool = False) -> pd.DataFrame:
@@ -17,6 +104,8 @@ def render_sidebar(data: pd.DataFrame, pending: bool = False) -> pd.DataFrame:
     Returns:
         pd.DataFrame: Filtered DataFrame based on sidebar inputs.
     """
+    filters = get_active_filters().copy()
+
     if data.empty:
         st.sidebar.warning("No data available to filter.")
         return data
@@ -28,33 +117,52 @@ def render_sidebar(data: pd.DataFrame, pending: bool = False) -> pd.DataFrame:
     # Date filters
     col1, col2 = st.sidebar.columns(2)
     with col1:
-        start_date = st.date_input("**Start date**", value=START_DATE)
+        start_date = st.date_input(
+            "**Start date**", value=START_DATE, key=START_DATE_KEY
+        )
     with col2:
-        end_date = st.date_input("**End date**", value=None)
+        end_date = st.date_input("**End date**", value=None, key=END_DATE_KEY)
+
+    filters["start_date"] = pd.Timestamp(start_date) if start_date else None
+    filters["end_date"] = pd.Timestamp(end_date) if end_date else None
 
-    # Apply date filters
+    # The filters narrow a mask of rows, and the ledger is only indexed once at the end
+    mask = np.ones(len(data), dtype=bool)
     if start_date:
-        data = data[data["Date"] >= pd.Timestamp(start_date)]
+        mask &= (data["Date"] >= pd.Timestamp(start_date)).to_numpy()
 
     if end_date:
-        data = data[data["Date"] <= pd.Timestamp(end_date)]
+        mask &= (data["Date"] <= pd.Timestamp(end_date)).to_numpy()
 
     if bet_types := st.sidebar.multiselect(
-        "**Bet Type**", sorted(data["Type"].unique())
+        "**Bet Type**", sorted(data["Type"][mask].unique())
     ):
-        data = data[data["Type"].isin(bet_types)]
+        mask &= data["Type"].isin(bet_types).to_numpy()
 
-    if leagues := st.sidebar.multiselect("**League**", sorted(data["League"].unique())):
-        data = data[data["League"].isin(leagues)]
+    if leagues := st.sidebar.multiselect(
+        "**League**", sorted(data["League"][mask].unique())
+    ):
+        mask &= data["League"].isin(leagues).to_numpy()
 
-    if teams := st.sidebar.multiselect("**Team**", sorted(data["Team"].unique())):
-        data = data[data["Team"].isin(teams)]
+    if teams := render_team_filter(data, mask, pending):
+        mask &= data["Team"].isin(teams).to_numpy()
+
+    bet_results = []
 
     # Bet result filter (only if not pending)
     if not pending:
         if bet_results := st.sidebar.multiselect(
-            "**Bet Result**", sorted(data["Result"].unique())
+            "**Bet Result**", sorted(data["Result"][mask].unique())
         ):
-            data = data[data["Result"].isin(bet_results)]
+            mask &= data["Result"].isin(bet_results).to_numpy()
+
+    filters.update(Type=bet_types, League=leagues, Team=teams, Result=bet_results)
+    st.session_state[FILTERS_STATE_KEY] = filters
 
-    return data
+    filtered_data = data if mask.all() else data[mask]
+    record_session_memory(
+        data,
+        filtered_data,
+        (get_data_version(data), get_filters_key(), get_memo_keys()),
+    )
+    return filtered_data
@@ -0,0 +1,185 @@
+"""
+Simulation Module
+
+This module runs Monte Carlo bankroll simulations by bootstrap-resampling the profit of
+historical bets into future paths. Paths are simulated as (paths x bets) arrays in
+chunks, which bounds memory, and the chunks can be spread over a process pool.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from caches import MB, budgeted_cache
+
+CHUNK_PATHS = 2_000  # Paths per chunk, a chunk holds CHUNK_PATHS x horizon floats
+MAX_WORKERS = 8
+PERCENTILES = [5, 25, 50, 75, 95]
+SIMULATIONS_BUDGET = 128 * MB
+
+
+def simulate_chunk(
+    profits: np.ndarray, n_paths: int, horizon: int, bankroll: float, seed
+) -> tuple:
+    """
+    Simulate a chunk of bankroll paths by resampling historical bet profits.
+
+    Args:
+        profits (np.ndarray): The profit of each historical bet.
+        n_paths (int): The number of paths to simulate.
+        horizon (int): The number of bets in each path.
+        bankroll (float): The starting bankroll, in units.
+        seed: The seed (or `np.random.SeedSequence`) of the chunk.
+
+    Returns:
+        tuple: The final profit, the max drawdown and whether the bankroll was ruined,
+               for each path.
+    """
+    rng = np.random.default_rng(seed)
+    indices = rng.integers(0, len(profits), size=(n_paths, horizon), dtype=np.int32)
+    paths = np.cumsum(profits[indices], axis=1)
+    del indices
+
+    final_profit = paths[:, -1].copy()
+    ruined = paths.min(axis=1) <= -bankroll
+
+    peaks = np.maximum.accumulate(paths, axis=1)
+    np.maximum(peaks, 0.0, out=peaks)
+    np.subtract(paths, peaks, out=peaks)
+    max_drawdown = peaks.min(axis=1)
+
+    return final_profit, max_drawdown, ruined
+
+
+def get_worker_count() -> int:
+    """
+    Get the number of processes to spread simulations over on this host.
+
+    Returns:
+        int: The number of worker processes, 1 to simulate in-process.
+    """
+    return max(1, min(os.cpu_count() or 1, MAX_WORKERS))
+
+
+@st.cache_resource
+def get_process_pool(workers: int) -> Executor:
+    """
+    Get the process pool shared by every session of the app.
+
+    Workers are spawned rather than forked, as the Streamlit server is multi-threaded.
+
+    Args:
+        workers (int): The number of worker processes.
+
+    Returns:
+        Executor: The process pool.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def run_simulation(
+    profits: np.ndarray,
+    n_paths: int,
+    horizon: int,
+    bankroll: float,
+    seed: Optional[int] = None,
+    workers: int = 1,
+) -> dict:
+    """
+    Simulate bankroll paths by bootstrap-resampling historical bet profits.
+
+    Args:
+        profits (np.ndarray): The profit of each historical bet.
+        n_paths (int): The number of paths to simulate.
+        horizon (int): The number of bets in each path.
+        bankroll (float): The starting bankroll, in units.
+        seed (Optional[int]): The seed of the simulation, random if None.
+        workers (int): The number of processes to spread the chunks over.
+
+    Returns:
+        dict: The 'final_profit', 'max_drawdown' and 'ruined' arrays of every path.
+    """
+    chunk_sizes = [CHUNK_PATHS] * (n_paths // CHUNK_PATHS)
+    if n_paths % CHUNK_PATHS:
+        chunk_sizes.append(n_paths % CHUNK_PATHS)
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    arguments = (
+        [profits] * len(chunk_sizes),
+        chunk_sizes,
+        [horizon] * len(chunk_sizes),
+        [bankroll] * len(chunk_sizes),
+        seeds,
+    )
+
+    if workers > 1 and len(chunk_sizes) > 1:
+        chunks = list(get_process_pool(workers).map(simulate_chunk, *arguments))
+    else:
+        chunks = list(map(simulate_chunk, *arguments))
+
+    final_profit, max_drawdown, ruined = (np.concatenate(part) for part in zip(*chunks))
+    return {
+        "final_profit": final_profit,
+        "max_drawdown": max_drawdown,
+        "ruined": ruined,
+    }
+
+
+@budgeted_cache("simulations", SIMULATIONS_BUDGET)
+def load_simulation(
+    profits: np.ndarray,
+    n_paths: int,
+    horizon: int,
+    bankroll: float,
+    seed: int,
+    workers: int,
+) -> dict:
+    """
+    Simulate bankroll paths once per set of historical profits and parameters.
+
+    Args:
+        profits (np.ndarray): The profit of each historical bet.
+        n_paths (int): The number of paths to simulate.
+        horizon (int): The number of bets in each path.
+        bankroll (float): The starting bankroll, in units.
+        seed (int): The seed of the simulation.
+        workers (int): The number of processes to spread the chunks over.
+
+    Returns:
+        dict: The simulated arrays, as returned by `run_simulation`.
+    """
+    return run_simulation(profits, n_paths, horizon, bankroll, seed, workers)
+
+
+def summarize_simulation(results: dict) -> dict:
+    """
+    Summarize the distribution of the simulated paths.
+
+    Args:
+        results (dict): The simulated arrays, as returned by `run_simulation`.
+
+    Returns:
+        dict: The probability of profit and risk of ruin in percent, and a DataFrame of
+              final profit and max drawdown percentiles.
+    """
+    final_profit, max_drawdown = results["final_profit"], results["max_drawdown"]
+    percentiles = pd.DataFrame(
+        {
+            "Percentile": [f"P{percentile}" for percentile in PERCENTILES],
+            "Final Profit (Units)": np.percentile(final_profit, PERCENTILES),
+            "Max Drawdown (Units)": np.percentile(max_drawdown, PERCENTILES),
+        }
+    ).round(2)
+    return {
+        "profit_probability": round(float((final_profit > 0).mean()) * 100, 2),
+        "ruin_probability": round(float(results["ruined"].mean()) * 100, 2),
+        "median_profit": round(float(np.median(final_profit)), 2),
+        "median_drawdown": round(float(np.median(max_drawdown)), 2),
+        "percentiles": percentiles,
+    }
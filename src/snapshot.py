@@ -0,0 +1,406 @@
+"""
+Snapshot Module
+
+This module exports the default view of the public pages to self-contained static HTML,
+with the Plotly figures embedded as JSON and the tables rendered to HTML, so anonymous
+traffic can be served from a static file server. Run it from the repository root, e.g.
+from a scheduled job; pages are only regenerated when the ledger changes:
+
+    python src/snapshot.py [--ledger <ledger name>]
+"""
+
+import argparse
+import html
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+import plotly.io as pio
+from plotly.graph_objects import Figure
+from plotly.offline import get_plotlyjs
+
+from analytics import add_error_bars
+from charts import (
+    create_profit_bar,
+    create_profit_timeline,
+    create_roi_bar,
+    create_roi_bar_chart,
+    create_share_pie,
+    create_winrate_bar,
+)
+from commons import (
+    ABOUT_TEXT,
+    DERIVED_COLUMNS,
+    LEDGER_SOURCE,
+    LEDGERS,
+    ODDS_GROUP_STR,
+    REFERRAL_CODE,
+    REFERRAL_LINK,
+    START_DATE,
+    combine_data_versions,
+    get_data_version,
+    load_source,
+    process_bets_data,
+)
+from compute import apply_default_filters, compute_artifacts
+from exposure import EXPOSURE_DIMENSIONS, EXPOSURE_LABELS, ExposureBook
+from paths import SNAPSHOT_DIR
+from pivots import PIVOT_TABLES, slice_pivot
+from rollups import format_period_comparison
+from simulation import get_worker_count
+
+PLOTLY_JS_NAME = "plotly.min.js"
+VERSION_NAME = "VERSION"
+SNAPSHOT_TIMESPAN = "D"
+# File name: page title, in navigation order
+SNAPSHOT_PAGES = {
+    "index.html": "Betting Dashboard",
+    "leagues.html": "Stats by League",
+    "odds.html": "Stats by Odds",
+    "aggregates.html": "Aggregates by League and Bet Type",
+    "pending.html": "Pending Bets",
+}
+# Metric key: label, in display order
+DASHBOARD_METRICS = {
+    "total_bets": "Total Bets",
+    "total_wager": "Units Wagered",
+    "total_winrate": "Winrate %",
+    "total_profit": "Profit (Units)",
+    "total_roi": "ROI %",
+}
+EXPOSURE_METRICS = {
+    "open_bets": "Open Bets",
+    "total_wager": "Units at Risk",
+    "worst_case": "Worst Case (Units)",
+    "best_case": "Best Case (Units)",
+}
+PAGE_STYLE = """
+body { font-family: sans-serif; margin: 0 auto; max-width: 1200px; padding: 1rem; }
+nav a { margin-right: 1.5rem; }
+.metrics { display: flex; gap: 2rem; flex-wrap: wrap; }
+.metric span { display: block; font-size: 0.9rem; color: #555; }
+.metric strong { font-size: 1.8rem; }
+.table { overflow-x: auto; max-height: 40rem; }
+table { border-collapse: collapse; font-size: 0.9rem; }
+th, td { padding: 0.25rem 0.75rem; border-bottom: 1px solid #ddd; text-align: right; }
+"""
+
+
+def render_figure(fig: Figure) -> str:
+    """
+    Render a Plotly figure to an HTML fragment, embedding its JSON.
+
+    Args:
+        fig (Figure): The figure.
+
+    Returns:
+        str: The HTML fragment. Plotly.js is loaded once per page instead.
+    """
+    return pio.to_html(
+        fig, full_html=False, include_plotlyjs=False, config={"responsive": True}
+    )
+
+
+def render_table(table: pd.DataFrame, index: bool = False) -> str:
+    """
+    Render a table to an HTML fragment.
+
+    Args:
+        table (pd.DataFrame): The table.
+        index (bool): Whether to render the index of the table.
+
+    Returns:
+        str: The HTML fragment.
+    """
+    return f'<div class="table">{table.to_html(index=index, border=0, na_rep="")}</div>'
+
+
+def render_metrics(metrics: dict, labels: dict) -> str:
+    """
+    Render headline metrics to an HTML fragment.
+
+    Args:
+        metrics (dict): The metrics by key.
+        labels (dict): The label of each metric key to render, in display order.
+
+    Returns:
+        str: The HTML fragment.
+    """
+    cards = "".join(
+        f'<div class="metric"><span>{html.escape(label)}</span>'
+        f"<strong>{html.escape(str(metrics[key]))}</strong></div>"
+        for key, label in labels.items()
+    )
+    return f'<div class="metrics">{cards}</div>'
+
+
+def render_page(title: str, sections: list, updated_at: str) -> str:
+    """
+    Render a full snapshot page.
+
+    Args:
+        title (str): The title of the page.
+        sections (list): The (heading, HTML fragment) pairs of the page.
+        updated_at (str): When the snapshot was generated.
+
+    Returns:
+        str: The HTML document.
+    """
+    nav = "".join(
+        f'<a href="{file_name}">{html.escape(page_title)}</a>'
+        for file_name, page_title in SNAPSHOT_PAGES.items()
+    )
+    body = "".join(
+        f"<section><h3>{html.escape(heading)}</h3>{fragment}</section>"
+        for heading, fragment in sections
+    )
+    return (
+        "<!DOCTYPE html>"
+        '<html lang="en"><head><meta charset="utf-8">'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">'
+        f"<title>LoL Oracle - {html.escape(title)}</title>"
+        f'<meta name="description" content="{html.escape(ABOUT_TEXT)}">'
+        f"<style>{PAGE_STYLE}</style>"
+        f'<script src="{PLOTLY_JS_NAME}"></script></head>'
+        f"<body><nav>{nav}</nav><h1>{html.escape(title)}</h1>"
+        f'<p><a href="{REFERRAL_LINK}">Referral code: {REFERRAL_CODE}</a></p>'
+        f"{body}<hr><p>Updated {updated_at}</p></body></html>"
+    )
+
+
+def format_ledger(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Format bets for display, most recent first.
+
+    Args:
+        data (pd.DataFrame): The processed bets.
+
+    Returns:
+        pd.DataFrame: The bets, with dates instead of timestamps.
+    """
+    return (
+        data.drop(columns=DERIVED_COLUMNS)
+        .assign(Date=data["Date"].dt.date)
+        .sort_values(by="Date", ascending=False)
+    )
+
+
+def build_dashboard_sections(artifacts: dict, default_view: pd.DataFrame) -> list:
+    """
+    Build the sections of the Dashboard page.
+
+    Args:
+        artifacts (dict): The artifacts of the default view, by name.
+        default_view (pd.DataFrame): The bets shown in the default view.
+
+    Returns:
+        list: The (heading, HTML fragment) pairs of the page.
+    """
+    metrics = artifacts["overview"]
+    metrics = {
+        **metrics,
+        "total_winrate": f"{metrics['total_winrate']}%",
+        "total_roi": f"{metrics['total_roi']}%",
+    }
+    period_totals = artifacts[f"timeline_{SNAPSHOT_TIMESPAN}"]
+    roi_by_type = add_error_bars(
+        artifacts["type"], artifacts["type_intervals"], "Type", "ROI"
+    )
+    return [
+        ("Overview", render_metrics(metrics, DASHBOARD_METRICS)),
+        (
+            "Profit Timeline (Units)",
+            render_figure(create_profit_timeline(period_totals, SNAPSHOT_TIMESPAN)),
+        ),
+        ("Results by Day", render_table(format_period_comparison(period_totals))),
+        ("Bets Ledger", render_table(format_ledger(default_view))),
+        ("ROI by Wager Type", render_figure(create_roi_bar_chart(roi_by_type))),
+    ]
+
+
+def build_group_sections(
+    stats: pd.DataFrame,
+    column: str,
+    label: str,
+    intervals: Optional[pd.DataFrame] = None,
+) -> list:
+    """
+    Build the sections of the Leagues or Odds page.
+
+    Args:
+        stats (pd.DataFrame): The aggregates of each group.
+        column (str): The column the groups are keyed by.
+        label (str): The name of the groups in the headings.
+        intervals (Optional[pd.DataFrame]): The confidence intervals of each group.
+
+    Returns:
+        list: The (heading, HTML fragment) pairs of the page.
+    """
+    winrate_stats, roi_stats = stats, stats
+    if intervals is not None:
+        winrate_stats = add_error_bars(stats, intervals, column, "Winrate")
+        roi_stats = add_error_bars(stats, intervals, column, "ROI")
+    return [
+        (f"Bets Percentage by {label}", render_figure(create_share_pie(stats, column))),
+        (f"Profit by {label}", render_figure(create_profit_bar(stats, column))),
+        (
+            f"Winrate by {label}",
+            render_figure(create_winrate_bar(winrate_stats, column)),
+        ),
+        (f"ROI by {label}", render_figure(create_roi_bar(roi_stats, column))),
+    ]
+
+
+def build_aggregates_sections(pivot: pd.DataFrame) -> list:
+    """
+    Build the sections of the Aggregates page.
+
+    Args:
+        pivot (pd.DataFrame): The multi-measure pivot of the default view.
+
+    Returns:
+        list: The (heading, HTML fragment) pairs of the page.
+    """
+    return [
+        (title, render_table(slice_pivot(pivot, measure), index=True))
+        for measure, title in PIVOT_TABLES.items()
+    ]
+
+
+def build_pending_sections(pending_view: pd.DataFrame) -> list:
+    """
+    Build the sections of the Pending Bets page.
+
+    Args:
+        pending_view (pd.DataFrame): The pending bets shown in the default view.
+
+    Returns:
+        list: The (heading, HTML fragment) pairs of the page.
+    """
+    if pending_view.empty:
+        return [("Pending Bets", "<p>There are no pending bets currently.</p>")]
+
+    book = ExposureBook()
+    book.update(pending_view)
+    exposure_tables = []
+    for dimension in EXPOSURE_DIMENSIONS:
+        exposure = book.by(dimension).rename(columns=EXPOSURE_LABELS)
+        if dimension == "Date":
+            exposure["Date"] = exposure["Date"].dt.date
+        exposure_tables.append((f"Exposure by {dimension}", render_table(exposure)))
+
+    return [
+        ("Open Exposure", render_metrics(book.summary(), EXPOSURE_METRICS)),
+        *exposure_tables,
+        ("Pending Bets", render_table(format_ledger(pending_view))),
+    ]
+
+
+def write_file(path: Path, content: str) -> None:
+    """
+    Replace a file atomically, so the file server never serves a partial page.
+
+    Args:
+        path (Path): The path of the file.
+        content (str): The content of the file.
+    """
+    staging_path = path.with_name(f".{path.name}.tmp")
+    staging_path.write_text(content, encoding="utf-8")
+    os.replace(staging_path, path)
+
+
+def export_snapshot(
+    source: str = LEDGER_SOURCE,
+    out_dir: Path = SNAPSHOT_DIR,
+    workers: int = 1,
+    force: bool = False,
+) -> Optional[str]:
+    """
+    Export the default view of the public pages, unless the ledger did not change.
+
+    Args:
+        source (str): The ledger source.
+        out_dir (Path): The directory to write the pages to.
+        workers (int): The number of processes to compute the aggregates with.
+        force (bool): If True, regenerates the pages even if the ledger did not change.
+
+    Returns:
+        Optional[str]: The version of the exported ledger, None if it was up to date.
+    """
+    data = load_source(source, start_date=START_DATE)
+    pending = load_source(source, pending=True)
+    if data.empty:
+        raise ValueError("No bets were loaded from the source.")
+
+    data_version = combine_data_versions(
+        get_data_version(data), get_data_version(pending)
+    )
+    version_path = out_dir / VERSION_NAME
+    if not force and version_path.exists():
+        if version_path.read_text().strip() == data_version:
+            return None
+
+    default_view = apply_default_filters(process_bets_data(data))
+    artifacts = compute_artifacts(default_view, workers)
+    pending_view = pending
+    if not pending.empty:
+        pending_view = apply_default_filters(process_bets_data(pending, pending=True))
+
+    sections = {
+        "index.html": build_dashboard_sections(artifacts, default_view),
+        "leagues.html": build_group_sections(
+            artifacts["league"], "League", "League", artifacts["league_intervals"]
+        ),
+        "odds.html": build_group_sections(
+            artifacts["odds"], ODDS_GROUP_STR, "Odds Group"
+        ),
+        "aggregates.html": build_aggregates_sections(artifacts["pivot"]),
+        "pending.html": build_pending_sections(pending_view),
+    }
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if not (out_dir / PLOTLY_JS_NAME).exists():
+        write_file(out_dir / PLOTLY_JS_NAME, get_plotlyjs())
+
+    updated_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+    for file_name, page_title in SNAPSHOT_PAGES.items():
+        write_file(
+            out_dir / file_name,
+            render_page(page_title, sections[file_name], updated_at),
+        )
+    write_file(version_path, data_version)
+    return data_version
+
+
+def main() -> None:
+    """Export the static snapshot of the configured ledger."""
+    parser = argparse.ArgumentParser(
+        description="Export the default dashboard view to static HTML."
+    )
+    parser.add_argument("--ledger", choices=list(LEDGERS), default=next(iter(LEDGERS)))
+    parser.add_argument(
+        "--source",
+        help="Export this Google Sheets URL, file or synthetic source instead",
+    )
+    parser.add_argument("--out", default=str(SNAPSHOT_DIR), help="Output directory")
+    parser.add_argument("--workers", type=int, default=get_worker_count())
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenerate even if the ledger is unchanged",
+    )
+    args = parser.parse_args()
+
+    data_version = export_snapshot(
+        args.source or LEDGERS[args.ledger], Path(args.out), args.workers, args.force
+    )
+    if data_version is None:
+        print("The snapshot is up to date.")
+    else:
+        print(f"Exported the snapshot of ledger version {data_version} to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
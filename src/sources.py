@@ -0,0 +1,166 @@
+"""
+Sources Module
+
+This module reads the bets ledger from sources other than Google Sheets: local CSV,
+Parquet or JSON exports and synthetic ledgers for local runs, load tests and
+benchmarks. A source is configured as a string: a Google Sheets URL, a spreadsheet
+split into one worksheet per season as 'partitioned:<url>', a file path, or
+'synthetic[:<bets>[:<seed>]]', and a deployment can serve several named ledgers.
+"""
+
+import json
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from sheets import HEADER_ROW, ROW_INDEX_NAME
+
+DEFAULT_LEDGER = "Oracle Bets"
+SHEET_SOURCE = "sheet"
+PARTITIONED_SOURCE = "partitioned"
+FILE_SOURCE = "file"
+SYNTHETIC_SOURCE = "synthetic"
+SYNTHETIC_BETS = 10_000
+SYNTHETIC_SEED = 0
+SYNTHETIC_START = pd.Timestamp("2024-01-01")
+SYNTHETIC_DAYS = 730
+SYNTHETIC_PENDING = 5
+SYNTHETIC_LEAGUES = {
+    "LCK": ["T1", "Gen.G", "Hanwha Life", "Dplus KIA", "KT Rolster", "DRX"],
+    "LPL": ["BLG", "JDG", "Top Esports", "Weibo Gaming", "LNG", "EDG"],
+    "LEC": ["G2", "Fnatic", "MAD Lions", "Team BDS", "Team Vitality", "SK Gaming"],
+    "LCS": ["Team Liquid", "FlyQuest", "Cloud9", "100 Thieves", "NRG", "Dignitas"],
+    "PCS": ["PSG Talon", "CTBC Flying Oyster", "GAM Esports", "Frank Esports"],
+}
+SYNTHETIC_TYPES = ["ML", "Handicap", "Total Kills", "Total Maps", "First Blood"]
+SYNTHETIC_WAGERS = [0.5, 1.0, 1.5, 2.0]
+SYNTHETIC_EDGE = 1.04  # Winrate over the implied probability of the odds
+SYNTHETIC_CLOSING_NOISE = 0.05  # Spread of the closing line around the fair odds
+
+
+def parse_source(source: str) -> tuple:
+    """
+    Identify the kind of a ledger source.
+
+    Args:
+        source (str): The configured ledger source.
+
+    Returns:
+        tuple: The kind of source ('sheet', 'partitioned', 'file' or 'synthetic') and
+               its target: the URL, the file path, or the number of bets and seed of a
+               synthetic ledger.
+    """
+    if source.startswith(f"{PARTITIONED_SOURCE}:"):
+        return PARTITIONED_SOURCE, source.split(":", 1)[1]
+    if source.startswith(("http://", "https://")):
+        return SHEET_SOURCE, source
+    if source == SYNTHETIC_SOURCE or source.startswith(f"{SYNTHETIC_SOURCE}:"):
+        parameters = source.split(":")[1:]
+        n_bets = int(parameters[0]) if parameters else SYNTHETIC_BETS
+        seed = int(parameters[1]) if len(parameters) > 1 else SYNTHETIC_SEED
+        return SYNTHETIC_SOURCE, (n_bets, seed)
+    return FILE_SOURCE, Path(source)
+
+
+def parse_ledgers(config: Optional[str], default_source: str) -> dict:
+    """
+    Parse the registry of the ledgers served by a deployment.
+
+    Args:
+        config (Optional[str]): A JSON object of ledger names to sources, in display
+                                order, e.g. '{"Free": "<url>", "Premium": "<url>"}'.
+        default_source (str): The source of the only ledger when there is no config.
+
+    Returns:
+        dict: The source of each ledger, by name.
+    """
+    if not config:
+        return {DEFAULT_LEDGER: default_source}
+
+    ledgers = json.loads(config)
+    if not isinstance(ledgers, dict) or not ledgers:
+        raise ValueError("The ledgers must be a JSON object of names to sources.")
+    return {str(name): str(source) for name, source in ledgers.items()}
+
+
+def make_synthetic_ledger(
+    n_bets: int = SYNTHETIC_BETS,
+    seed: int = SYNTHETIC_SEED,
+    n_pending: int = SYNTHETIC_PENDING,
+) -> pd.DataFrame:
+    """
+    Generate a synthetic bets ledger shaped like the Google Sheets one.
+
+    Args:
+        n_bets (int): The number of bets.
+        seed (int): The seed of the generator.
+        n_pending (int): The number of most recent bets left without a result.
+
+    Returns:
+        pd.DataFrame: The raw ledger, indexed by sheet row.
+    """
+    rng = np.random.default_rng(seed)
+    leagues = np.array(list(SYNTHETIC_LEAGUES))
+    teams = np.concatenate([SYNTHETIC_LEAGUES[league] for league in leagues])
+    team_counts = np.array([len(SYNTHETIC_LEAGUES[league]) for league in leagues])
+    team_offsets = np.cumsum(team_counts) - team_counts
+
+    league_codes = rng.integers(0, len(leagues), n_bets)
+    team_codes = team_offsets[league_codes] + (
+        rng.random(n_bets) * team_counts[league_codes]
+    ).astype(np.int64)
+    odds = rng.uniform(1.2, 3.5, n_bets).round(2)
+    results = np.where(rng.random(n_bets) < SYNTHETIC_EDGE / odds, "W", "L")
+    results = results.astype(object)
+    results[n_bets - min(n_pending, n_bets) :] = pd.NA
+    days = np.sort(rng.integers(0, SYNTHETIC_DAYS, n_bets))
+    # The closing line moves towards the fair odds, from a stream of its own so the
+    # other columns do not depend on it
+    closing_noise = np.random.default_rng([seed, 1]).normal(
+        0, SYNTHETIC_CLOSING_NOISE, n_bets
+    )
+    closing_odds = (odds / SYNTHETIC_EDGE * np.exp(closing_noise)).clip(1.01).round(2)
+
+    return pd.DataFrame(
+        {
+            "Date": (SYNTHETIC_START + pd.to_timedelta(days, unit="D")).strftime(
+                "%Y-%m-%d"
+            ),
+            "League": leagues[league_codes],
+            "Team": teams[team_codes],
+            "Type": rng.choice(SYNTHETIC_TYPES, n_bets),
+            "Odds": odds,
+            "Wager": rng.choice(SYNTHETIC_WAGERS, n_bets),
+            "Result": results,
+            "Closing Odds": closing_odds,
+        },
+        index=pd.RangeIndex(
+            HEADER_ROW + 1, HEADER_ROW + 1 + n_bets, name=ROW_INDEX_NAME
+        ),
+    )
+
+
+def read_ledger_file(path: Path) -> pd.DataFrame:
+    """
+    Read a bets ledger exported to a CSV, Parquet or JSON file.
+
+    Args:
+        path (Path): The path of the file.
+
+    Returns:
+        pd.DataFrame: The raw ledger, indexed by sheet row when the export has a
+                      'Row' column, by position in the sheet otherwise.
+    """
+    readers = {".csv": pd.read_csv, ".parquet": pd.read_parquet, ".json": pd.read_json}
+    if path.suffix not in readers:
+        raise ValueError(f"Unsupported ledger file type: {path.suffix}")
+
+    bets_df = readers[path.suffix](path)
+    if ROW_INDEX_NAME in bets_df.columns:
+        return bets_df.set_index(ROW_INDEX_NAME)
+    bets_df.index = pd.RangeIndex(
+        HEADER_ROW + 1, HEADER_ROW + 1 + len(bets_df), name=ROW_INDEX_NAME
+    )
+    return bets_df
@@ -0,0 +1,179 @@
+"""
+Validation Module
+
+This module checks the rows of a raw ledger before they are processed. Sheet rows are
+entered by hand, so a bet can be entered twice in a row, and a row can hold impossible
+values: odds of 1 or less, a wager that is not positive, a settled bet dated in the
+future, or a blank in a required cell. Such rows are quarantined into a report shown
+on the pages instead of being counted, or silently dropped with the rest of their row.
+
+The checks are array predicates over whole columns, and duplicates are found by
+comparing the hash of each row with those of the few rows above it, so validation keeps
+up with million-row ledgers.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from history import hash_rows
+
+REQUIRED_COLUMNS = ["Date", "League", "Team", "Type", "Odds", "Wager"]
+ISSUE_COLUMN = "Issue"
+FUTURE_GRACE = pd.Timedelta(days=1)  # Bets dated by the timezone of the match
+REPORTS_KEPT = 16  # Quarantine reports kept, one per ledger version
+# Rows above a row searched for an identical one. Identical bets further apart, e.g.
+# the same stake at the same odds on another match day, are legitimate
+DUPLICATE_WINDOW = 2
+
+logger = logging.getLogger(__name__)
+reports_lock = threading.Lock()
+
+
+def find_duplicates(bets_df: pd.DataFrame, window: int = DUPLICATE_WINDOW) -> pd.Series:
+    """
+    Find the rows repeating one of the rows just above them, value for value.
+
+    Args:
+        bets_df (pd.DataFrame): The raw ledger, in sheet order.
+        window (int): The number of rows above each row searched for a repeat.
+
+    Returns:
+        pd.Series: The row key of the nearest identical row above each repeated row,
+                   indexed by the key of the repeat.
+    """
+    hashes = hash_rows(bets_df).to_numpy()
+    earlier = np.full(len(hashes), -1)
+    # The nearest identical row is searched last, so it is the one reported
+    for lag in range(min(window, len(hashes) - 1), 0, -1):
+        same = np.flatnonzero(hashes[lag:] == hashes[:-lag])
+        earlier[same + lag] = same
+
+    repeated = earlier >= 0
+    if not repeated.any():
+        return pd.Series(dtype=object)
+    return pd.Series(
+        bets_df.index[earlier[repeated]].to_numpy(), index=bets_df.index[repeated]
+    )
+
+
+def validate_ledger(
+    bets_df: pd.DataFrame, today: Optional[pd.Timestamp] = None
+) -> tuple:
+    """
+    Split a raw ledger into its valid rows and a report of the quarantined ones.
+
+    Args:
+        bets_df (pd.DataFrame): The raw ledger, indexed by row key.
+        today (Optional[pd.Timestamp]): The current date, to find bets settled in the
+                                        future.
+
+    Returns:
+        tuple: The valid rows, with parsed dates and numeric odds and wagers, and the
+               quarantined rows as entered, with their issues in `ISSUE_COLUMN`.
+    """
+    today = (today or pd.Timestamp.now()).normalize()
+    dates = pd.to_datetime(bets_df["Date"], errors="coerce")
+    odds = pd.to_numeric(bets_df["Odds"], errors="coerce")
+    wagers = pd.to_numeric(bets_df["Wager"], errors="coerce")
+    settled = bets_df["Result"].notna().to_numpy()
+
+    checks = {
+        f"missing {column}": bets_df[column].isna().to_numpy()
+        for column in REQUIRED_COLUMNS
+        if column in bets_df.columns
+    }
+    checks["invalid date"] = (dates.isna() & bets_df["Date"].notna()).to_numpy()
+    future = (dates > today + FUTURE_GRACE).to_numpy()
+    checks["settled in the future"] = future & settled
+    checks["invalid odds"] = (odds.isna() & bets_df["Odds"].notna()).to_numpy()
+    checks["odds not above 1"] = (odds <= 1).to_numpy()
+    checks["invalid wager"] = (wagers.isna() & bets_df["Wager"].notna()).to_numpy()
+    checks["wager not positive"] = (wagers <= 0).to_numpy()
+
+    duplicates = find_duplicates(bets_df)
+    quarantined = np.logical_or.reduce(list(checks.values()))
+    quarantined |= bets_df.index.isin(duplicates.index)
+
+    issues = pd.Series("", index=bets_df.index[quarantined], dtype=object)
+    if len(duplicates):
+        issues[duplicates.index] = "duplicate of row " + duplicates.astype(str) + "; "
+    for issue, failed in checks.items():
+        failed = failed[quarantined]
+        if failed.any():
+            issues[failed] += f"{issue}; "
+
+    report = bets_df[quarantined].assign(**{ISSUE_COLUMN: issues.str.rstrip("; ")})
+    valid = ~quarantined
+    valid_df = bets_df[valid].assign(
+        Date=dates[valid], Odds=odds[valid], Wager=wagers[valid]
+    )
+    if len(report):
+        logger.warning("Quarantined %d rows of the ledger", len(report))
+    return valid_df, report
+
+
+@st.cache_resource
+def get_quarantine_reports() -> OrderedDict:
+    """
+    Get the quarantine reports of the latest ledger versions processed.
+
+    Returns:
+        OrderedDict: The report of each data version and pending flag, oldest first.
+    """
+    return OrderedDict()
+
+
+def store_quarantine_report(
+    data_version: str, pending: bool, report: pd.DataFrame
+) -> None:
+    """
+    Keep the quarantine report of a ledger version, for the pages to display.
+
+    Args:
+        data_version (str): The data version of the raw ledger.
+        pending (bool): Whether the ledger was processed for the pending bets.
+        report (pd.DataFrame): The quarantined rows.
+    """
+    reports = get_quarantine_reports()
+    with reports_lock:
+        reports[(data_version, pending)] = report
+        reports.move_to_end((data_version, pending))
+        while len(reports) > REPORTS_KEPT:
+            reports.popitem(last=False)
+
+
+def get_quarantine_report(
+    data_version: str, pending: bool = False
+) -> Optional[pd.DataFrame]:
+    """
+    Get the quarantine report of a ledger version.
+
+    Args:
+        data_version (str): The data version of the raw ledger.
+        pending (bool): Whether the ledger was processed for the pending bets.
+
+    Returns:
+        Optional[pd.DataFrame]: The quarantined rows, None if the version was not
+                                processed recently.
+    """
+    return get_quarantine_reports().get((data_version, pending))
+
+
+def render_quarantine_report(report: Optional[pd.DataFrame]) -> None:
+    """
+    Display the quarantined rows of the ledger in a collapsed expander, if any.
+
+    Args:
+        report (Optional[pd.DataFrame]): The quarantined rows.
+    """
+    if report is None or report.empty:
+        return
+
+    with st.expander(f"⚠️ Quarantined rows ({len(report)}), not counted in the stats"):
+        st.dataframe(report.reset_index(), hide_index=True, use_container_width=True)
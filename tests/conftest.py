@@ -0,0 +1,18 @@
+"""Shared fixtures of the test suite."""
+
+import sys
+from pathlib import Path
+
+import pytest
+import streamlit as st
+
+# The app runs from `src/`, whose modules import each other by name
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+
+@pytest.fixture(autouse=True)
+def clear_streamlit_caches():
+    """Start every test without the results cached by the previous ones."""
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    yield
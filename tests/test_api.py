@@ -0,0 +1,137 @@
+"""Tests of the read-only stats API."""
+
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+import api
+
+SOURCE = "synthetic:300:1"
+
+
+@pytest.fixture
+def server():
+    """Serve the API of a small synthetic ledger on a free port."""
+    server = api.create_server(SOURCE, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, path: str, headers: dict = None) -> http.client.HTTPResponse:
+    """Send a GET request to the server, and read its response."""
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_port)
+    connection.request("GET", path, headers=headers or {})
+    response = connection.getresponse()
+    response.body = response.read()
+    connection.close()
+    return response
+
+
+def test_serves_payload_with_etag(server):
+    response = get(server, "/api/overview")
+
+    assert response.status == 200
+    assert response.getheader("ETag").startswith('"')
+    assert response.getheader("Cache-Control") == api.CACHE_CONTROL
+    body = json.loads(response.body)
+    assert body["data_version"] == server.RequestHandlerClass.store.data_version
+    assert body["data"]["total_bets"] > 0
+
+
+@pytest.mark.parametrize("path", ["/api/leagues", "/api/types/", "/api/pending"])
+def test_serves_every_endpoint(server, path):
+    response = get(server, path)
+
+    assert response.status == 200
+    assert isinstance(json.loads(response.body)["data"], list)
+
+
+def test_unknown_path_is_not_found(server):
+    response = get(server, "/api/unknown")
+
+    assert response.status == 404
+    assert response.getheader("ETag") is None
+
+
+@pytest.mark.parametrize(
+    "if_none_match", ["{etag}", "W/{etag}", '"other", {etag}', "*"]
+)
+def test_matching_etag_gets_not_modified(server, if_none_match):
+    etag = get(server, "/api/overview").getheader("ETag")
+
+    response = get(
+        server,
+        "/api/overview",
+        {"If-None-Match": if_none_match.format(etag=etag)},
+    )
+
+    assert response.status == 304
+    assert response.getheader("ETag") == etag
+    assert response.body == b""
+
+
+def test_stale_etag_gets_new_payload(server):
+    etag = get(server, "/api/overview").getheader("ETag")
+    store = server.RequestHandlerClass.store
+    store.source = "synthetic:300:2"
+
+    assert store.refresh()
+    response = get(server, "/api/overview", {"If-None-Match": etag})
+
+    assert response.status == 200
+    assert response.getheader("ETag") != etag
+
+
+def test_unchanged_ledger_keeps_etag(server):
+    etag = get(server, "/api/overview").getheader("ETag")
+
+    assert not server.RequestHandlerClass.store.refresh()
+    assert get(server, "/api/overview").getheader("ETag") == etag
+
+
+def test_etag_matches():
+    assert not api.etag_matches(None, '"a"')
+    assert not api.etag_matches('"b"', '"a"')
+    assert api.etag_matches(' "b" , W/"a"', '"a"')
+
+
+class FailingStore:
+    """A store whose refreshes fail until `failures` is exhausted."""
+
+    source = SOURCE
+    data_version = "v1"
+
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.refreshes = 0
+
+    def refresh(self) -> bool:
+        self.refreshes += 1
+        if self.refreshes <= self.failures:
+            raise ValueError("Malformed ledger")
+        return True
+
+
+def test_refresh_survives_failures(caplog):
+    store, stop = FailingStore(failures=2), threading.Event()
+    thread = threading.Thread(
+        target=api.refresh_periodically, args=(store, stop, 0.01), daemon=True
+    )
+
+    thread.start()
+    deadline = time.monotonic() + 5
+    while store.refreshes < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stop.set()
+    thread.join(timeout=5)
+
+    assert store.refreshes >= 4
+    assert not thread.is_alive()
+    assert caplog.text.count("Failed to refresh the stats") == 2
+    assert "Malformed ledger" in caplog.text
@@ -0,0 +1,125 @@
+"""Tests of the budgeted caches."""
+
+import logging
+
+import numpy as np
+import pytest
+
+import caches
+from caches import LFU, LRU, BudgetedCache, budgeted_cache
+
+ENTRY = 1000  # The estimated size of `value()`, in bytes
+
+
+def value(fill: float = 0) -> np.ndarray:
+    """Build a result weighing ENTRY bytes."""
+    return np.full(ENTRY // 8, fill)
+
+
+def cached_keys(cache: BudgetedCache) -> list:
+    """List the keys of a cache, least recently used first."""
+    return list(cache.entries)
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(monkeypatch):
+    """Give every test its own registry of caches."""
+    monkeypatch.setattr(caches, "caches", {})
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = BudgetedCache("lru", 2 * ENTRY, LRU)
+    cache.put("a", value())
+    cache.put("b", value())
+    cache.get("a")
+
+    cache.put("c", value())
+
+    assert cached_keys(cache) == ["a", "c"]
+    assert cache.evictions == 1
+    assert cache.total_bytes == 2 * ENTRY
+
+
+def test_lfu_admits_a_new_key_after_older_keys_were_hit():
+    cache = BudgetedCache("lfu", 2 * ENTRY, LFU)
+    cache.put("a", value())
+    cache.put("b", value())
+    cache.get("a")
+    cache.get("b")
+
+    cache.put("c", value())
+
+    assert cache.get("c")[0]
+    assert len(cache.entries) == 2
+
+
+def test_lfu_keeps_the_most_used_key():
+    cache = BudgetedCache("lfu_used", 2 * ENTRY, LFU)
+    cache.put("a", value())
+    cache.put("b", value())
+    for _ in range(3):
+        cache.get("a")
+    cache.get("b")
+
+    cache.put("c", value())
+
+    assert cached_keys(cache) == ["a", "c"]
+
+
+def test_lfu_ages_out_keys_no_longer_used():
+    cache = BudgetedCache("lfu_aged", 2 * ENTRY, LFU)
+    cache.put("old", value())
+    for _ in range(100):
+        cache.get("old")
+
+    # Each new key is used a few times, as the pages of a new data version would be
+    for number in range(10):
+        cache.put(number, value())
+        for _ in range(3):
+            cache.get(number)
+
+    assert "old" not in cache.entries
+    assert 9 in cache.entries
+
+
+def test_result_over_the_budget_is_not_cached(caplog):
+    cache = BudgetedCache("small", ENTRY // 2, LRU)
+
+    with caplog.at_level(logging.WARNING, logger="caches"):
+        cache.put("a", value())
+
+    assert cache.get("a") == (False, None)
+    assert cache.total_bytes == 0
+    assert "over its" in caplog.text
+
+
+def test_replacing_a_key_keeps_the_size_exact():
+    cache = BudgetedCache("replaced", 2 * ENTRY, LRU)
+    cache.put("a", value())
+    cache.put("a", value(1))
+
+    assert cache.total_bytes == ENTRY
+    assert cache.get("a")[1][0] == 1
+    assert cache.evictions == 0
+
+
+def test_invalid_policy_is_rejected():
+    with pytest.raises(ValueError):
+        BudgetedCache("invalid", ENTRY, "fifo")
+
+
+def test_decorator_caches_by_the_hashed_arguments():
+    calls = []
+
+    @budgeted_cache("decorated", 4 * ENTRY)
+    def compute(_data: np.ndarray, version: str, fill: float = 0) -> np.ndarray:
+        calls.append((version, fill))
+        return value(fill)
+
+    compute(None, "v1")
+    compute(None, "v1")
+    compute(None, "v1", fill=1)
+    compute(np.ones(3), "v2")
+
+    assert calls == [("v1", 0), ("v1", 1), ("v2", 0)]
+    assert caches.report_occupancy().set_index("Cache").loc["decorated", "Entries"] == 3
@@ -0,0 +1,54 @@
+"""Tests of the calibration of the odds."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from commons import EV_STR, IMPLIED_PROBABILITY_STR, process_bets_data
+from compute import calculate_calibration, calculate_calibration_totals
+from sources import make_synthetic_ledger
+
+
+@pytest.fixture(scope="module")
+def bets() -> pd.DataFrame:
+    return process_bets_data(make_synthetic_ledger(2000, 3, 0))
+
+
+def test_totals_are_computed_from_the_bets(bets):
+    totals = calculate_calibration_totals(bets)
+
+    win = bets["Result"].eq("W").to_numpy(dtype=float)
+    implied = bets[IMPLIED_PROBABILITY_STR].to_numpy()
+    assert totals["implied_winrate"] == round(implied.mean() * 100, 2)
+    assert totals["actual_winrate"] == round(win.mean() * 100, 2)
+    assert totals["brier_score"] == round(((implied - win) ** 2).mean(), 4)
+
+
+def test_totals_match_the_groups_before_rounding(bets):
+    totals = calculate_calibration_totals(bets)
+    calibration = calculate_calibration(bets, "League")
+
+    assert calibration["Bets"].sum() == len(bets)
+    assert totals["implied_winrate"] == pytest.approx(
+        np.average(calibration["Implied Winrate %"], weights=calibration["Bets"]),
+        abs=0.01,
+    )
+
+
+def test_totals_without_closing_odds_have_no_expected_value(bets):
+    totals = calculate_calibration_totals(bets.assign(**{EV_STR: np.nan}))
+
+    assert totals["expected_value"] is None
+
+
+def test_totals_of_no_bets():
+    totals = calculate_calibration_totals(
+        process_bets_data(make_synthetic_ledger(10, 3, 0)).iloc[:0]
+    )
+
+    assert totals == {
+        "implied_winrate": 0,
+        "actual_winrate": 0,
+        "brier_score": 0,
+        "expected_value": None,
+    }
@@ -0,0 +1,109 @@
+"""Tests of the version history of the ledgers."""
+
+import pandas as pd
+import pytest
+
+import history
+from history import DELETE, INSERT, UPDATE, LedgerHistory, diff_ledgers, hash_rows
+from sheets import records_to_frame
+from sources import make_synthetic_ledger
+
+
+def sheet_ledger(ledger_df: pd.DataFrame) -> pd.DataFrame:
+    """Read a ledger back like the Sheets loader does, with blank cells as NA."""
+    records = ledger_df.astype(object).where(ledger_df.notna(), "")
+    return records_to_frame(
+        records.to_dict("records"), list(ledger_df.columns), ledger_df.index[0]
+    )
+
+
+def edit(ledger_df: pd.DataFrame, row: int, column: str, value) -> pd.DataFrame:
+    """Change a cell, upcasting its column to object for a value of another type."""
+    edited = ledger_df.astype({column: object})
+    edited.loc[row, column] = value
+    return edited
+
+
+@pytest.fixture
+def ledger():
+    """A raw ledger of 502 bets, with its open bets blank."""
+    return sheet_ledger(make_synthetic_ledger(502, 1))
+
+
+@pytest.fixture
+def versions(ledger):
+    """A ledger edited, then with rows deleted and inserted, version after version."""
+    typo = edit(ledger, 10, "Odds", "2,1")
+    deleted = typo.drop(index=[20, 21, 400])
+    new_bets = sheet_ledger(make_synthetic_ledger(5, 2, 0).set_axis(range(504, 509)))
+    inserted = pd.concat([deleted, new_bets])
+    fixed = edit(inserted, 10, "Odds", 2.1)
+    settled = edit(fixed, 503, "Result", "W")
+    return [ledger, typo, deleted, inserted, fixed, settled]
+
+
+def test_hand_typed_cell_changes_only_its_row(ledger):
+    typo = edit(ledger, 10, "Odds", "2,1")
+
+    changed = hash_rows(typo) != hash_rows(ledger)
+
+    assert list(ledger.index[changed]) == [10]
+
+
+def test_numbers_hash_alike_whatever_their_column_type(ledger):
+    as_objects = ledger.astype(object)
+    as_floats = ledger.astype({"Wager": "float64"})
+
+    assert hash_rows(as_objects).equals(hash_rows(ledger))
+    assert hash_rows(as_floats).equals(hash_rows(ledger))
+
+
+def test_delta_holds_only_changed_rows(versions):
+    ledger, typo, deleted, inserted, *_ = versions
+
+    assert list(diff_ledgers(ledger, typo).index) == [10]
+    assert diff_ledgers(typo, deleted)[history.OP_COLUMN].eq(DELETE).sum() == 3
+    assert diff_ledgers(deleted, inserted)[history.OP_COLUMN].eq(INSERT).sum() == 5
+
+
+def test_as_of_rebuilds_every_recorded_version(tmp_path, versions):
+    ledger_history = LedgerHistory(tmp_path)
+    for number, ledger_df in enumerate(versions):
+        ledger_history.record(ledger_df, f"v{number}")
+
+    counts = ledger_history.list_versions()[[INSERT, UPDATE, DELETE]]
+    assert counts.values.tolist() == [
+        [502, 0, 0],
+        [0, 1, 0],
+        [0, 0, 3],
+        [5, 0, 0],
+        [0, 1, 0],
+        [0, 1, 0],
+    ]
+
+    reopened = LedgerHistory(tmp_path)  # Replays the deltas from disk
+    for number, ledger_df in enumerate(versions, start=1):
+        pd.testing.assert_frame_equal(reopened.as_of(number), ledger_df)
+
+
+def test_as_of_replays_from_the_last_checkpoint(tmp_path, monkeypatch, versions):
+    monkeypatch.setattr(history, "CHECKPOINT_INTERVAL", 2)
+    ledger_history = LedgerHistory(tmp_path)
+    for number, ledger_df in enumerate(versions):
+        ledger_history.record(ledger_df, f"v{number}")
+
+    kinds = ledger_history.list_versions()["kind"].tolist()
+    assert kinds == ["checkpoint", "delta"] * 3
+
+    reopened = LedgerHistory(tmp_path)
+    for number, ledger_df in enumerate(versions, start=1):
+        pd.testing.assert_frame_equal(reopened.as_of(number), ledger_df)
+
+
+def test_unrecorded_version_is_refused(tmp_path, ledger):
+    ledger_history = LedgerHistory(tmp_path)
+    ledger_history.record(ledger, "v1")
+
+    assert ledger_history.record(ledger, "v1") is None
+    with pytest.raises(ValueError):
+        ledger_history.as_of(2)
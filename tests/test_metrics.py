@@ -0,0 +1,67 @@
+"""Tests of the cache metrics."""
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freeze the clock of the metrics module, moved by hand."""
+    now = [1000.0]
+    monkeypatch.setattr(metrics.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(metrics, "cached_keys", metrics.OrderedDict())
+    return now
+
+
+def counts(cache: str) -> tuple:
+    """Read the misses, evictions and expiries of a cache."""
+    return tuple(
+        counter.values.get((cache,), 0)
+        for counter in (
+            metrics.CACHE_MISSES,
+            metrics.CACHE_EVICTIONS,
+            metrics.CACHE_EXPIRIES,
+        )
+    )
+
+
+def test_first_miss_is_neither_evicted_nor_expired(clock):
+    metrics.record_cache_miss("first", "a", ttl=60)
+
+    assert counts("first") == (1, 0, 0)
+
+
+def test_miss_within_ttl_is_an_eviction(clock):
+    metrics.record_cache_miss("evicted", "a", ttl=60)
+    clock[0] += 59
+    metrics.record_cache_miss("evicted", "a", ttl=60)
+
+    assert counts("evicted") == (2, 1, 0)
+
+
+def test_miss_after_ttl_is_an_expiry(clock):
+    metrics.record_cache_miss("expired", "a", ttl=60)
+    clock[0] += 60
+    metrics.record_cache_miss("expired", "a", ttl=60)
+
+    assert counts("expired") == (2, 0, 1)
+
+
+def test_miss_without_ttl_is_an_eviction(clock):
+    metrics.record_cache_miss("forever", "a")
+    clock[0] += 10**6
+    metrics.record_cache_miss("forever", "a")
+
+    assert counts("forever") == (2, 1, 0)
+
+
+def test_tracked_keys_are_bounded(clock, monkeypatch):
+    monkeypatch.setattr(metrics, "TRACKED_KEYS", 3)
+    for row in range(10):
+        metrics.record_cache_miss("bounded", row, ttl=60)
+    metrics.record_cache_miss("bounded", 0, ttl=60)  # Forgotten, so not an eviction
+    metrics.record_cache_miss("bounded", 9, ttl=60)
+
+    assert len(metrics.cached_keys) == 3
+    assert counts("bounded") == (12, 1, 0)
@@ -0,0 +1,247 @@
+"""Tests of the quota guard and of the last good read fallback, on the fake Sheets API."""
+
+import threading
+from http import HTTPStatus
+
+import gspread
+import pandas as pd
+import pytest
+import streamlit as st
+
+import commons
+import sheets
+from fake_sheets import SPREADSHEET_ID, Faults, create_fake_server
+from quota import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    QuotaGuard,
+    TokenBucket,
+)
+from sources import make_synthetic_ledger
+
+
+class FakeClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    """A clock for the quota guard, moved by hand."""
+    return FakeClock()
+
+
+@pytest.fixture
+def faults():
+    """The faults injected by the fake Sheets API, none until a test changes them."""
+    return Faults()
+
+
+@pytest.fixture
+def sheet_url(monkeypatch, faults):
+    """Serve a synthetic ledger on the fake Sheets API, and point the app at it."""
+    server = create_fake_server(make_synthetic_ledger(200, 1), faults=faults, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(sheets, "SHEETS_API_URL", api_url)
+    yield f"{api_url}/spreadsheets/d/{SPREADSHEET_ID}/edit"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sleeps():
+    """Record the waits of a quota guard instead of sleeping."""
+    return []
+
+
+def install_guard(monkeypatch, guard: QuotaGuard) -> QuotaGuard:
+    """Send the Sheets requests of the test through a guard of its own."""
+    monkeypatch.setattr(sheets, "get_quota_guard", lambda: guard)
+    return guard
+
+
+def read_values(sheet_url: str) -> list:
+    """Open the worksheet of the ledger and read its first cells."""
+    return sheets.open_worksheet(sheet_url).get("A1:B3")
+
+
+def test_token_bucket_allows_burst_then_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_acquire() == pytest.approx(0.5)
+
+    clock.advance(0.5)
+    assert bucket.try_acquire() == 0
+    clock.advance(60)
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_acquire() > 0
+
+
+def test_token_bucket_gives_up_after_timeout(clock):
+    bucket = TokenBucket(rate=0.01, capacity=1, clock=clock)
+
+    assert bucket.acquire(timeout=1)
+    assert not bucket.acquire(timeout=1)
+
+
+def test_breaker_opens_after_threshold_failures(clock):
+    breaker = CircuitBreaker(threshold=3, reset_timeout=60, clock=clock)
+
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_half_opens_after_cooldown(clock):
+    breaker = CircuitBreaker(threshold=1, reset_timeout=60, clock=clock)
+    breaker.record_failure()
+
+    clock.advance(59)
+    assert not breaker.allow()
+    clock.advance(1)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # A single probe at a time
+
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_failed_probe_opens_breaker_again(clock):
+    breaker = CircuitBreaker(threshold=1, reset_timeout=60, clock=clock)
+    breaker.record_failure()
+    clock.advance(60)
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    clock.advance(60)
+    assert breaker.allow()
+
+
+def test_rate_limited_request_is_retried_after_backoff(
+    monkeypatch, sheet_url, faults, sleeps
+):
+    def sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+        faults.update({"error_rate": 0})  # The quota recovers during the backoff
+
+    install_guard(
+        monkeypatch, QuotaGuard(TokenBucket(rate=1000, capacity=1000), sleep=sleep)
+    )
+    faults.update({"error_rate": 1, "status": HTTPStatus.TOO_MANY_REQUESTS})
+
+    assert read_values(sheet_url)[0][:2] == ["Date", "League"]
+    assert len(sleeps) == 1
+    assert faults.errors == 1
+
+
+def test_backoff_grows_until_retries_are_exhausted(
+    monkeypatch, sheet_url, faults, sleeps
+):
+    monkeypatch.setattr("quota.random.uniform", lambda low, high: high)
+    install_guard(
+        monkeypatch,
+        QuotaGuard(
+            TokenBucket(rate=1000, capacity=1000),
+            CircuitBreaker(threshold=100),
+            retries=3,
+            sleep=sleeps.append,
+        ),
+    )
+    faults.update({"error_rate": 1, "status": HTTPStatus.TOO_MANY_REQUESTS})
+
+    with pytest.raises(gspread.exceptions.APIError) as error:
+        read_values(sheet_url)
+
+    assert error.value.code == HTTPStatus.TOO_MANY_REQUESTS
+    assert sleeps == [0.5, 1.0, 2.0]
+    assert faults.requests == 4
+
+
+def test_client_errors_are_not_retried(monkeypatch, sheet_url, faults, sleeps):
+    guard = install_guard(
+        monkeypatch,
+        QuotaGuard(TokenBucket(rate=1000, capacity=1000), sleep=sleeps.append),
+    )
+    worksheet = sheets.open_worksheet(sheet_url)
+    faults.update({"error_rate": 1, "status": HTTPStatus.BAD_REQUEST})
+
+    with pytest.raises(gspread.exceptions.APIError):
+        worksheet.get("A1:B3")
+
+    assert sleeps == []
+    assert guard.breaker.state == CLOSED
+
+
+def test_breaker_fails_fast_during_outage(monkeypatch, sheet_url, faults, clock):
+    guard = install_guard(
+        monkeypatch,
+        QuotaGuard(
+            TokenBucket(rate=1000, capacity=1000),
+            CircuitBreaker(threshold=3, reset_timeout=60, clock=clock),
+            retries=0,
+        ),
+    )
+    worksheet = sheets.open_worksheet(sheet_url)
+    faults.update({"error_rate": 1, "status": HTTPStatus.SERVICE_UNAVAILABLE})
+
+    for _ in range(3):
+        with pytest.raises(gspread.exceptions.APIError):
+            worksheet.get("A1:B3")
+    requests = faults.requests
+
+    with pytest.raises(CircuitOpenError):
+        worksheet.get("A1:B3")
+    assert faults.requests == requests  # The API was spared
+
+    clock.advance(60)
+    faults.update({"error_rate": 0})
+    assert worksheet.get("A1:B3")  # The probe goes through and closes the circuit
+    assert guard.breaker.state == CLOSED
+
+
+def test_outage_serves_last_good_read(monkeypatch, sheet_url, faults):
+    install_guard(
+        monkeypatch,
+        QuotaGuard(TokenBucket(rate=1000, capacity=1000), retries=0),
+    )
+    ledger = commons.load_source(sheet_url)
+    assert len(ledger) == 200
+
+    st.cache_data.clear()  # The cached read expired
+    faults.update({"error_rate": 1, "status": HTTPStatus.SERVICE_UNAVAILABLE})
+
+    pd.testing.assert_frame_equal(commons.load_source(sheet_url), ledger)
+    assert faults.errors > 0
+
+
+def test_outage_without_good_read_is_empty(monkeypatch, sheet_url, faults):
+    install_guard(
+        monkeypatch,
+        QuotaGuard(TokenBucket(rate=1000, capacity=1000), retries=0),
+    )
+    faults.update({"error_rate": 1, "status": HTTPStatus.SERVICE_UNAVAILABLE})
+
+    ledger = commons.load_source(sheet_url)
+
+    assert ledger.empty and ledger.columns.empty
@@ -0,0 +1,121 @@
+"""Tests of the validation of the raw ledgers."""
+
+import pandas as pd
+import pytest
+
+from sources import make_synthetic_ledger
+from validation import ISSUE_COLUMN, find_duplicates, validate_ledger
+
+TODAY = pd.Timestamp("2024-09-01")
+BET = {
+    "Date": "2024-08-20",
+    "League": "LCK",
+    "Team": "T1",
+    "Type": "ML",
+    "Odds": 1.85,
+    "Wager": 1,
+    "Result": "W",
+    "Premium": pd.NA,
+}
+
+
+def make_ledger(*changes: dict) -> pd.DataFrame:
+    """Build a raw ledger of distinct bets, each changed by one of the dicts."""
+    rows = [
+        {**BET, "Team": f"Team {number}", **change}
+        for number, change in enumerate(changes)
+    ]
+    return pd.DataFrame(rows, index=pd.RangeIndex(2, 2 + len(rows), name="Row"))
+
+
+def quarantined_issues(ledger: pd.DataFrame) -> dict:
+    """Validate a ledger, and get the issues of its quarantined rows by row key."""
+    _, report = validate_ledger(ledger, TODAY)
+    return report[ISSUE_COLUMN].to_dict()
+
+
+def test_valid_rows_are_kept_and_parsed():
+    ledger = make_ledger({}, {"Odds": "2.5", "Wager": "0.5", "Result": pd.NA})
+
+    valid, report = validate_ledger(ledger, TODAY)
+
+    assert report.empty
+    assert list(valid.index) == [2, 3]
+    assert valid["Date"].dtype == "datetime64[ns]"
+    assert valid["Odds"].tolist() == [1.85, 2.5]
+    assert valid["Wager"].tolist() == [1, 0.5]
+
+
+@pytest.mark.parametrize(
+    "change, issue",
+    [
+        ({"League": pd.NA}, "missing League"),
+        ({"Odds": pd.NA}, "missing Odds"),
+        ({"Date": "next tuesday"}, "invalid date"),
+        ({"Date": "2024-09-05"}, "settled in the future"),
+        ({"Odds": "2,1"}, "invalid odds"),
+        ({"Odds": 1}, "odds not above 1"),
+        ({"Wager": "1u"}, "invalid wager"),
+        ({"Wager": 0}, "wager not positive"),
+    ],
+)
+def test_invalid_row_is_quarantined(change, issue):
+    assert quarantined_issues(make_ledger({}, change, {})) == {3: issue}
+
+
+def test_open_bet_may_be_dated_in_the_future():
+    ledger = make_ledger({"Date": "2024-09-05", "Result": pd.NA})
+
+    assert quarantined_issues(ledger) == {}
+
+
+def test_blank_optional_cell_keeps_the_row():
+    assert quarantined_issues(make_ledger({"Premium": pd.NA, "Result": pd.NA})) == {}
+
+
+def test_issues_of_a_row_are_listed_together():
+    ledger = make_ledger({"Odds": 0.5, "Wager": -1})
+
+    assert quarantined_issues(ledger) == {2: "odds not above 1; wager not positive"}
+
+
+def test_row_entered_twice_is_a_duplicate():
+    ledger = make_ledger({}, {}, {}, {})
+    ledger.loc[4] = ledger.loc[3]
+
+    assert quarantined_issues(ledger) == {4: "duplicate of row 3"}
+
+
+def test_repeat_within_window_is_a_duplicate():
+    ledger = make_ledger({}, {}, {})
+    ledger.loc[4] = ledger.loc[2]
+
+    assert quarantined_issues(ledger) == {4: "duplicate of row 2"}
+
+
+def test_identical_bets_far_apart_are_kept():
+    ledger = make_ledger({}, {}, {}, {})
+    ledger.loc[5] = ledger.loc[2]
+
+    assert quarantined_issues(ledger) == {}
+
+
+def test_repeats_point_to_the_nearest_identical_row():
+    ledger = make_ledger({}, {}, {})
+    ledger.loc[3:4] = ledger.loc[2].to_numpy()
+
+    assert find_duplicates(ledger).to_dict() == {3: 2, 4: 3}
+
+
+def test_duplicates_ignore_the_type_of_numbers():
+    ledger = make_ledger({}, {}).astype({"Wager": object})
+    ledger.loc[3] = ledger.loc[2].to_numpy()
+    ledger.loc[3, "Wager"] = 1.0
+
+    assert find_duplicates(ledger).to_dict() == {3: 2}
+
+
+def test_synthetic_ledger_has_no_duplicates():
+    ledger = make_synthetic_ledger(100_000, 1)
+
+    assert find_duplicates(ledger).empty